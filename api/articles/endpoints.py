@@ -1,45 +1,203 @@
-from datetime import datetime
-from typing import Annotated, Any
+import zlib
+from collections.abc import AsyncGenerator, AsyncIterable
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from api.articles.serializers import ArticleListResponse
-from storage.mongo import MongoRepository, get_database
+from api.articles.filters import ArticleFilters, ArticlePage, ArticleView, CountMode, DateStatsQuery, ProviderStatsQuery
+from api.articles.serializers import (
+    ArticleFacetsItem,
+    ArticleListResponse,
+    ArticleResource,
+    DateCount,
+    DateStatsResponse,
+    ProviderCount,
+    ProviderStatsResponse,
+    TotalCountItem,
+    render_article_lines,
+    render_article_list,
+    render_article_snippets,
+)
+from api.cache import ResponseCache
+from api.metrics import SERIALIZATION_SECONDS
+from storage.mongo import ARTICLE_FIELDS, AsyncMongoRepository
 
 router = APIRouter()
 
+ESTIMATED_COUNT_LIMIT = 10_000  # articles counted at most when estimating, past it the total is a lower bound
+PROVIDER_FACETS = 20  # providers counted, those with the most articles first
+EXPORT_BATCH_SIZE = 500  # articles per round trip to MongoDB, and per chunk streamed: ~2 MB with full content
 
-def get_db() -> MongoRepository:
-    return get_database()
+
+def get_db(request: Request) -> AsyncMongoRepository:
+    return request.app.state.db
+
+
+def get_response_cache(request: Request) -> ResponseCache:
+    return request.app.state.response_cache
 
 
 @router.get("/v1/articles", response_model=ArticleListResponse)
-def get_articles(
-    db: Annotated[MongoRepository, Depends(get_db)],
-    title: str | None = Query(None, description="Text in title"),
-    content: str | None = Query(None, description="Text in content"),
-    start_date: datetime | None = Query(None, description="Start date for filtering"),
-    end_date: datetime | None = Query(None, description="End date for filtering"),
-    news_provider: str | None = Query(None, description="News provider"),
-    skip: int = Query(0, description="Number of articles to skip"),
-    limit: int = Query(50, description="Number of articles to return"),
-):
-    query: dict[str, Any] = {}
-    if title:
-        query["title"] = {"$regex": title, "$options": "i"}
-    if content:
-        query["content"] = {"$regex": content, "$options": "i"}
-    if news_provider:
-        query["news_provided_by"] = {"$regex": news_provider, "$options": "i"}
-
-    if start_date or end_date:
-        date_filter = {}
-        if start_date:
-            date_filter["$gte"] = start_date
-        if end_date:
-            date_filter["$lte"] = end_date
-        if date_filter:
-            query["date"] = date_filter
-
-    articles = db.get_articles(query, skip=skip, limit=limit)
-    return ArticleListResponse.from_articles(articles=articles)
+async def get_articles(
+    request: Request,
+    db: Annotated[AsyncMongoRepository, Depends(get_db)],
+    response_cache: Annotated[ResponseCache, Depends(get_response_cache)],
+    page: Annotated[ArticlePage, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    async def render() -> bytes:
+        documents, total, facets = await _find_page(db, page)
+        next_cursor = page.next_cursor(documents)
+        if page.view == ArticleView.SNIPPET:
+            return render_article_snippets(
+                documents, snippet_length=page.snippet_length, next_cursor=next_cursor, total=total, facets=facets
+            )
+        return render_article_list(documents, next_cursor=next_cursor, total=total, facets=facets)
+
+    cached = await response_cache.get_or_render(ResponseCache.key(request.url.path, page), db=db, render=render)
+    return cached.to_response(if_none_match=if_none_match)
+
+
+@router.get(
+    "/v1/articles/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One article per line"}},
+)
+async def export_articles(
+    db: Annotated[AsyncMongoRepository, Depends(get_db)],
+    filters: Annotated[ArticleFilters, Query()],
+    accept_encoding: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """
+    All the articles matching the filters, as newline delimited JSON, streamed straight from a MongoDB cursor:
+    memory stays the same however many there are. Compressed with gzip if the client accepts it.
+    """
+    documents = db.find_articles(
+        filters.query,
+        limit=0,
+        sort=filters.sort,
+        projection=dict.fromkeys(ARTICLE_FIELDS, True),
+        batch_size=EXPORT_BATCH_SIZE,
+    )
+    chunks = _ndjson_chunks(documents, chunk_size=EXPORT_BATCH_SIZE)
+    headers = {"Vary": "Accept-Encoding"}
+    if _accepts_gzip(accept_encoding):
+        chunks = _gzipped(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
+
+
+@router.get("/v1/articles/stats/providers", response_model=ProviderStatsResponse)
+async def get_provider_stats(
+    request: Request,
+    db: Annotated[AsyncMongoRepository, Depends(get_db)],
+    response_cache: Annotated[ResponseCache, Depends(get_response_cache)],
+    stats: Annotated[ProviderStatsQuery, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Number of articles matching the filters of each provider, counted by MongoDB."""
+
+    async def render() -> bytes:
+        counts = await db.count_by_provider(stats.query, limit=stats.limit)
+        with SERIALIZATION_SECONDS.time(format="provider_stats"):
+            items = [ProviderCount.model_validate(count) for count in counts]
+            return ProviderStatsResponse(items=items).model_dump_json().encode()
+
+    cached = await response_cache.get_or_render(ResponseCache.key(request.url.path, stats), db=db, render=render)
+    return cached.to_response(if_none_match=if_none_match)
+
+
+@router.get("/v1/articles/stats/dates", response_model=DateStatsResponse)
+async def get_date_stats(
+    request: Request,
+    db: Annotated[AsyncMongoRepository, Depends(get_db)],
+    response_cache: Annotated[ResponseCache, Depends(get_response_cache)],
+    stats: Annotated[DateStatsQuery, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Number of articles matching the filters published each day (or week, month, year), counted by MongoDB."""
+
+    async def render() -> bytes:
+        buckets = await db.count_by_date(stats.query, unit=stats.interval)
+        with SERIALIZATION_SECONDS.time(format="date_stats"):
+            items = [DateCount.from_bucket(bucket) for bucket in buckets]
+            return DateStatsResponse(interval=stats.interval, items=items).model_dump_json().encode()
+
+    cached = await response_cache.get_or_render(ResponseCache.key(request.url.path, stats), db=db, render=render)
+    return cached.to_response(if_none_match=if_none_match)
+
+
+@router.get("/v1/articles/{article_id}", response_model=ArticleResource)
+async def get_article(db: Annotated[AsyncMongoRepository, Depends(get_db)], article_id: str):
+    article = await db.get_article(article_id)
+    if article is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+    return ArticleResource.from_article(article)
+
+
+async def _find_page(
+    db: AsyncMongoRepository,
+    page: ArticlePage,
+) -> tuple[list[dict], TotalCountItem | None, ArticleFacetsItem | None]:
+    """Documents of the page, along with the total and facets asked for, counted in the same aggregation."""
+    estimated = page.count_mode == CountMode.ESTIMATED
+    total_from_metadata = page.include_total and estimated and not page.filters_query
+    count = page.include_total and not total_from_metadata
+
+    if not (count or page.include_facets):
+        documents = [
+            document
+            async for document in db.find_articles(
+                page.query, skip=page.skip, limit=page.limit, sort=page.sort, projection=page.projection
+            )
+        ]
+        counts = {"total": None, "providers": None}
+    else:
+        counts = await db.find_articles_with_counts(
+            page.filters_query,
+            page_query=page.cursor_query,
+            skip=page.skip,
+            limit=page.limit,
+            sort=page.sort,
+            projection=page.projection,
+            count=count,
+            count_limit=ESTIMATED_COUNT_LIMIT if estimated else None,
+            provider_counts=PROVIDER_FACETS if page.include_facets else 0,
+        )
+        documents = counts["items"]
+
+    total = None
+    if total_from_metadata:
+        total = TotalCountItem(value=await db.estimate_articles_count(), exact=False)
+    elif count:
+        total = TotalCountItem(value=counts["total"], exact=not estimated or counts["total"] < ESTIMATED_COUNT_LIMIT)
+    facets = ArticleFacetsItem(news_provided_by=counts["providers"]) if page.include_facets else None
+    return documents, total, facets
+
+
+async def _ndjson_chunks(documents: AsyncIterable[dict], chunk_size: int) -> AsyncGenerator[bytes]:
+    batch = []
+    async for document in documents:
+        batch.append(document)
+        if len(batch) == chunk_size:
+            yield render_article_lines(batch)
+            batch.clear()
+    if batch:
+        yield render_article_lines(batch)
+
+
+async def _gzipped(chunks: AsyncIterable[bytes]) -> AsyncGenerator[bytes]:
+    compressor = zlib.compressobj(level=6, wbits=31)  # 31: with the gzip header and trailer
+    async for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "") not in {"q=0", "q=0.0", "q=0.00", "q=0.000"}
+    return False
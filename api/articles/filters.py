@@ -0,0 +1,172 @@
+import base64
+import binascii
+import json
+import re
+from collections.abc import Mapping
+from datetime import datetime
+from enum import StrEnum
+from typing import Any
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from storage.mongo import NEWEST_FIRST_SORT, TEXT_SCORE_SORT, provider_key, snippet_projection
+
+MAX_PAGE_SIZE = 1000
+
+
+class ProviderMatch(StrEnum):
+    CONTAINS = "contains"
+    PREFIX = "prefix"  # uses the provider index
+    EXACT = "exact"  # uses the provider index
+
+
+class ArticleView(StrEnum):
+    FULL = "full"
+    SNIPPET = "snippet"  # the beginning of the content only, cut by MongoDB: much lighter pages
+
+
+class CountMode(StrEnum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"  # from the collection metadata without filters, otherwise counting up to a limit
+
+
+class StatsInterval(StrEnum):
+    DAY = "day"
+    WEEK = "week"  # starting on mondays
+    MONTH = "month"
+    YEAR = "year"
+
+
+class ArticleFilters(BaseModel):
+    """Query parameters filtering articles, and the MongoDB query they translate to."""
+
+    title: str | None = Field(None, description="Text in title")
+    content: str | None = Field(None, description="Text in content")
+    start_date: datetime | None = Field(None, description="Start date for filtering")
+    end_date: datetime | None = Field(None, description="End date for filtering")
+    news_provider: str | None = Field(None, description="News provider")
+    news_provider_match: ProviderMatch = Field(ProviderMatch.CONTAINS, description="How to match the news provider")
+    search: str | None = Field(None, description="Words in title or content, most relevant articles first")
+    collapse_duplicates: bool = Field(False, description="Whether to leave out articles repeating another one")
+
+    @property
+    def query(self) -> dict[str, Any]:
+        query: dict[str, Any] = {}
+        if self.search:
+            query["$text"] = {"$search": self.search}
+        if self.title:
+            query["title"] = {"$regex": re.escape(self.title), "$options": "i"}
+        if self.content:
+            query["content"] = {"$regex": re.escape(self.content), "$options": "i"}
+        if self.news_provider:
+            query["_provider_key"] = self._provider_filter
+        if self.collapse_duplicates:
+            query["_duplicate_of"] = None  # marked by the crawler as it stores them, the original ones are unmarked
+
+        if self.start_date or self.end_date:
+            date_filter = {}
+            if self.start_date:
+                date_filter["$gte"] = self.start_date
+            if self.end_date:
+                date_filter["$lte"] = self.end_date
+            query["date"] = date_filter
+        return query
+
+    @property
+    def sort(self) -> list[tuple[str, Any]]:
+        return TEXT_SCORE_SORT if self.search else NEWEST_FIRST_SORT
+
+    @property
+    def _provider_filter(self) -> str | dict[str, str]:
+        key = provider_key(self.news_provider)
+        match self.news_provider_match:
+            case ProviderMatch.EXACT:
+                return key
+            case ProviderMatch.PREFIX:
+                return {"$regex": f"^{re.escape(key)}"}  # anchored and case-sensitive, so it's an index range scan
+            case ProviderMatch.CONTAINS:
+                return {"$regex": re.escape(key)}
+
+
+class ArticlePage(ArticleFilters):
+    """
+    Filters along with the page of articles to return.
+    Pages are best fetched by `cursor`: it seeks straight to the next page on the sort index,
+    while `skip` walks over all the articles skipped, and shifts as new ones are stored.
+    """
+
+    cursor: str | None = Field(None, description="Where the page starts, as the `next_cursor` of the previous one")
+    skip: int = Field(0, description="Number of articles to skip")
+    limit: int = Field(50, ge=1, le=MAX_PAGE_SIZE, description="Number of articles to return")
+    view: ArticleView = Field(ArticleView.FULL, description="Whether to return the whole content or a snippet")
+    snippet_length: int = Field(200, ge=1, le=2000, description="Characters of content in snippets")
+    include_total: bool = Field(False, description="Whether to count all the articles matching the filters")
+    count_mode: CountMode = Field(CountMode.EXACT, description="Whether to count exactly, or estimate on large sets")
+    include_facets: bool = Field(False, description="Whether to count the articles matching the filters by provider")
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, value: str | None) -> str | None:
+        if value is not None:
+            decode_cursor(value)
+        return value
+
+    @model_validator(mode="after")
+    def validate_cursor_order(self) -> "ArticlePage":
+        if self.cursor and self.search:
+            raise ValueError("Search results are sorted by relevance and can't be paged by cursor, use skip instead")
+        return self
+
+    @property
+    def query(self) -> dict[str, Any]:
+        return self.filters_query | (self.cursor_query or {})
+
+    @property
+    def filters_query(self) -> dict[str, Any]:
+        """Query of the filters alone, that totals and facets count over, whatever the page."""
+        return super().query
+
+    @property
+    def cursor_query(self) -> dict[str, Any] | None:
+        if not self.cursor:
+            return None
+        # newest first: articles older than the last one of the previous page, or as old but with a lower _id
+        date, _id = decode_cursor(self.cursor)
+        return {"$or": [{"date": {"$lt": date}}, {"date": date, "_id": {"$lt": _id}}]}
+
+    @property
+    def projection(self) -> dict[str, Any] | None:
+        if self.view == ArticleView.SNIPPET:
+            return snippet_projection(self.snippet_length + 1)  # one more, to tell whether it was cut
+        return None
+
+    def next_cursor(self, documents: list[Mapping[str, Any]]) -> str | None:
+        """Cursor to the page after the article `documents`, if there may be one."""
+        if self.search or not documents or len(documents) < self.limit:
+            return None
+        return encode_cursor(date=documents[-1]["date"], article_id=documents[-1]["_id"])
+
+
+class ProviderStatsQuery(ArticleFilters):
+    limit: int = Field(
+        50, ge=1, le=1000, description="Number of providers to return, those with the most articles first"
+    )
+
+
+class DateStatsQuery(ArticleFilters):
+    interval: StatsInterval = Field(StatsInterval.DAY, description="Period of time articles are counted by")
+
+
+def encode_cursor(date: datetime, article_id: ObjectId | str) -> str:
+    position = {"date": date.isoformat(), "id": str(article_id)}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position["date"]), ObjectId(position["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
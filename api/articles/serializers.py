@@ -1,12 +1,15 @@
-from collections.abc import Iterable
-from typing import Self
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any, NotRequired, Self, TypedDict
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
+from api.metrics import SERIALIZATION_SECONDS
 from models.article import Article
 
 
 class ArticleListResource(BaseModel):
+    id: str | None = None
     title: str
     date: str
     news_provided_by: str
@@ -15,6 +18,7 @@ class ArticleListResource(BaseModel):
     @classmethod
     def from_article(cls, article: Article) -> Self:
         return cls(
+            id=article.id,
             title=article.title,
             date=article.date.strftime("%Y-%m-%dT%H:%M:%S"),
             news_provided_by=article.news_provided_by,
@@ -22,11 +26,214 @@ class ArticleListResource(BaseModel):
         )
 
 
+class ArticleSnippetResource(BaseModel):
+    id: str | None = None
+    title: str
+    date: str
+    news_provided_by: str
+    snippet: str
+
+
+class ArticleResource(ArticleListResource):
+    url: str
+
+    @classmethod
+    def from_article(cls, article: Article) -> Self:
+        return cls(
+            id=article.id,
+            url=article.url,
+            title=article.title,
+            date=article.date.strftime("%Y-%m-%dT%H:%M:%S"),
+            news_provided_by=article.news_provided_by,
+            content=article.content,
+        )
+
+
+class ProviderCount(BaseModel):
+    news_provided_by: str
+    count: int
+
+
+class ProviderStatsResponse(BaseModel):
+    items: list[ProviderCount]
+
+
+class DateCount(BaseModel):
+    date: str
+    count: int
+
+    @classmethod
+    def from_bucket(cls, bucket: Mapping[str, Any]) -> Self:
+        return cls(date=_format_date(bucket["date"]), count=bucket["count"])
+
+
+class DateStatsResponse(BaseModel):
+    interval: str
+    items: list[DateCount]
+
+
+class TotalCount(BaseModel):
+    value: int
+    exact: bool  # otherwise, an estimate, or a lower bound when it's the limit counted up to
+
+
+class ArticleFacets(BaseModel):
+    news_provided_by: list[ProviderCount]
+
+
 class ArticleListResponse(BaseModel):
-    items: list[ArticleListResource]
+    items: list[ArticleListResource] | list[ArticleSnippetResource]
+    next_cursor: str | None = None
+    total: TotalCount | None = None  # with `include_total` only
+    facets: ArticleFacets | None = None  # with `include_facets` only
 
     @classmethod
-    def from_articles(cls, articles: Iterable[Article]) -> Self:
+    def from_articles(cls, articles: Iterable[Article], next_cursor: str | None = None) -> Self:
         return cls(
             items=[ArticleListResource.from_article(article) for article in articles],
+            next_cursor=next_cursor,
         )
+
+
+# Raw path for list pages: MongoDB documents go straight to the response shape, with no model built per article,
+# and are encoded by pydantic-core in one go. The JSON is the same as the `ArticleListResponse` above.
+
+
+class ArticleListItem(TypedDict):
+    id: str
+    title: str
+    date: str
+    news_provided_by: str
+    content: str
+
+
+class ArticleSnippetItem(TypedDict):
+    id: str
+    title: str
+    date: str
+    news_provided_by: str
+    snippet: str
+
+
+class ArticleItem(ArticleListItem):
+    url: str
+
+
+class TotalCountItem(TypedDict):
+    value: int
+    exact: bool
+
+
+class ProviderCountItem(TypedDict):
+    news_provided_by: str
+    count: int
+
+
+class ArticleFacetsItem(TypedDict):
+    news_provided_by: list[ProviderCountItem]
+
+
+class ArticleListPage(TypedDict):
+    items: list[ArticleListItem]
+    next_cursor: str | None
+    total: NotRequired[TotalCountItem]
+    facets: NotRequired[ArticleFacetsItem]
+
+
+class ArticleSnippetPage(TypedDict):
+    items: list[ArticleSnippetItem]
+    next_cursor: str | None
+    total: NotRequired[TotalCountItem]
+    facets: NotRequired[ArticleFacetsItem]
+
+
+ARTICLE_LIST_PAGE = TypeAdapter(ArticleListPage)
+ARTICLE_SNIPPET_PAGE = TypeAdapter(ArticleSnippetPage)
+ARTICLE_ITEM = TypeAdapter(ArticleItem)
+
+
+@SERIALIZATION_SECONDS.time(format="list")
+def render_article_list(
+    documents: Iterable[Mapping[str, Any]],
+    next_cursor: str | None = None,
+    total: TotalCountItem | None = None,
+    facets: ArticleFacetsItem | None = None,
+) -> bytes:
+    items = [
+        ArticleListItem(
+            id=str(document["_id"]),
+            title=document.get("title", ""),
+            date=_format_date(document["date"]),
+            news_provided_by=document.get("news_provided_by", ""),
+            content=document.get("content", ""),
+        )
+        for document in documents
+    ]
+    page = ArticleListPage(items=items, next_cursor=next_cursor)
+    _add_counts(page, total=total, facets=facets)
+    return ARTICLE_LIST_PAGE.dump_json(page)
+
+
+@SERIALIZATION_SECONDS.time(format="snippets")
+def render_article_snippets(
+    documents: Iterable[Mapping[str, Any]],
+    snippet_length: int,
+    next_cursor: str | None = None,
+    total: TotalCountItem | None = None,
+    facets: ArticleFacetsItem | None = None,
+) -> bytes:
+    items = [
+        ArticleSnippetItem(
+            id=str(document["_id"]),
+            title=document.get("title", ""),
+            date=_format_date(document["date"]),
+            news_provided_by=document.get("news_provided_by", ""),
+            snippet=snippet(document.get("content", ""), length=snippet_length),
+        )
+        for document in documents
+    ]
+    page = ArticleSnippetPage(items=items, next_cursor=next_cursor)
+    _add_counts(page, total=total, facets=facets)
+    return ARTICLE_SNIPPET_PAGE.dump_json(page)
+
+
+@SERIALIZATION_SECONDS.time(format="ndjson")
+def render_article_lines(documents: Iterable[Mapping[str, Any]]) -> bytes:
+    """Articles as newline delimited JSON, one line each, as `ArticleResource` renders them."""
+    return b"".join(
+        ARTICLE_ITEM.dump_json(
+            ArticleItem(
+                id=str(document["_id"]),
+                url=document.get("url", ""),
+                title=document.get("title", ""),
+                date=_format_date(document["date"]),
+                news_provided_by=document.get("news_provided_by", ""),
+                content=document.get("content", ""),
+            )
+        )
+        + b"\n"
+        for document in documents
+    )
+
+
+def snippet(content: str, length: int) -> str:
+    if len(content) <= length:
+        return content
+    return content[:length].rstrip() + "…"
+
+
+def _add_counts(
+    page: ArticleListPage | ArticleSnippetPage,
+    total: TotalCountItem | None,
+    facets: ArticleFacetsItem | None,
+) -> None:
+    # only when asked for, so that pages without stay as they were
+    if total is not None:
+        page["total"] = total
+    if facets is not None:
+        page["facets"] = facets
+
+
+def _format_date(date: datetime) -> str:
+    # MongoDB hands back naive datetimes, so this is "%Y-%m-%dT%H:%M:%S", several times faster than strftime
+    return date.isoformat(timespec="seconds")
@@ -0,0 +1,84 @@
+"""
+Compare the cost per article of rendering list pages: through models, as before, or straight from the documents.
+
+    uv run python -m api.benchmarks.serialization
+"""
+
+import argparse
+import json
+import random
+import string
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from api.articles.serializers import ArticleListResponse, render_article_list
+from models.article import Article
+
+PAGE_SIZES = [50, 500, 5000]
+
+
+def _fake_documents(count: int) -> list[dict]:
+    """Documents as MongoDB hands them back, with press release sized content."""
+    rng = random.Random(count)
+
+    def words(length: int) -> str:
+        return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(length))
+
+    started_at = datetime(2024, 1, 1)  # noqa: DTZ001, naive as MongoDB hands it back
+    return [
+        {
+            "_id": ObjectId(),
+            "url": f"https://www.prnewswire.com/news-releases/article-{n}.html",
+            "title": words(12),
+            "date": started_at + timedelta(minutes=n),
+            "news_provided_by": words(2),
+            "content": words(500),
+            "last_modified": None,
+        }
+        for n in range(count)
+    ]
+
+
+def _render_through_models(documents: list[dict]) -> bytes:
+    # what the endpoint did: a model per document, then a resource per model, then FastAPI validating
+    # the response against `response_model` and encoding it with the standard json module
+    articles = [
+        Article(id=str(document["_id"]), **{k: v for k, v in document.items() if k != "_id"}) for document in documents
+    ]
+    response = ArticleListResponse.from_articles(articles)
+    # the totals and facets the raw path leaves out when not asked for
+    validated = ArticleListResponse.model_validate(response.model_dump(exclude_unset=True))
+    return json.dumps(
+        validated.model_dump(mode="json", exclude_unset=True), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def _render_raw(documents: list[dict]) -> bytes:
+    return render_article_list(documents)
+
+
+def _microseconds_per_article(render, documents: list[dict], rounds: int) -> float:
+    seconds = min(timeit.repeat(lambda: render(documents), number=rounds, repeat=3))
+    return seconds * 1_000_000 / (rounds * len(documents))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=50_000, help="articles rendered per measure, over all rounds")
+    args = arg_parser.parse_args()
+
+    print(f"{'page size':>10}{'models µs/article':>20}{'raw µs/article':>17}{'speedup':>10}")  # noqa: T201
+    for page_size in PAGE_SIZES:
+        documents = _fake_documents(page_size)
+        assert json.loads(_render_through_models(documents)) == json.loads(_render_raw(documents))
+
+        rounds = max(1, args.rows // page_size)
+        through_models = _microseconds_per_article(_render_through_models, documents, rounds)
+        raw = _microseconds_per_article(_render_raw, documents, rounds)
+        print(f"{page_size:>10}{through_models:>20.2f}{raw:>17.2f}{through_models / raw:>9.1f}x")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+from storage.mongo import AsyncMongoRepository
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CachedResponse":
+        return cls(body=body, etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+    def to_response(self, if_none_match: str | None = None) -> Response:
+        # no-cache: clients may keep the response, but must revalidate it, as it changes with every crawl
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if if_none_match and self.etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> CachedResponse | None: ...
+
+    def set(self, key: str, value: CachedResponse) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryBackend:
+    """In-process backend, keeping up to `max_entries` for `ttl` seconds, evicting the least recently used first."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """
+    Cache of serialized responses, keyed on the request path and its normalized parameters.
+    Responses are dropped when the crawler bumps the generation of the articles; to keep cache hits off MongoDB,
+    the generation is read at most once every `generation_check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        generation_check_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.backend = backend
+        self.generation_check_interval = generation_check_interval
+        self._clock = clock
+        self._generation: int | None = None
+        self._generation_checked_at = float("-inf")
+
+    @staticmethod
+    def key(path: str, params: BaseModel) -> str:
+        # defaults excluded, so "?limit=50" and no limit at all share their entry
+        return f"{path}?{params.model_dump_json(exclude_defaults=True)}"
+
+    async def get_or_render(
+        self,
+        key: str,
+        db: AsyncMongoRepository,
+        render: Callable[[], Awaitable[bytes]],
+    ) -> CachedResponse:
+        await self._check_generation(db)
+        cached = self.backend.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        cached = CachedResponse.from_body(await render())
+        if self._generation == generation:  # otherwise it may have been rendered from articles since changed
+            self.backend.set(key, cached)
+        return cached
+
+    async def _check_generation(self, db: AsyncMongoRepository) -> None:
+        now = self._clock()
+        if now - self._generation_checked_at < self.generation_check_interval:
+            return
+        self._generation_checked_at = now
+
+        generation = await db.get_generation()
+        if generation != self._generation:
+            self.backend.clear()
+            self._generation = generation
@@ -1,14 +1,47 @@
+import asyncio
 import os
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.articles import endpoints
+from api.cache import MemoryBackend, ResponseCache
+from api.metrics import RequestMetricsMiddleware
+from metrics import CONTENT_TYPE, REGISTRY
+from storage.mongo import get_async_database, get_database
+
+
+def ensure_indexes() -> None:
+    db = get_database()
+    try:
+        db.ensure_indexes()
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    await asyncio.to_thread(ensure_indexes)
+    # one client for the lifetime of the app, so all requests share its connection pool
+    app.state.db = get_async_database()
+    app.state.response_cache = ResponseCache(
+        backend=MemoryBackend(
+            max_entries=int(os.getenv("API_CACHE_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("API_CACHE_TTL", "60")),
+        ),
+        generation_check_interval=float(os.getenv("API_CACHE_GENERATION_CHECK_INTERVAL", "5")),
+    )
+    yield
+    await app.state.db.close()
+
 
 app = FastAPI(
     title="Wire Scout API",
     description="API for PR Newswire content",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 
@@ -17,7 +50,14 @@ def read_root():
     return {"message": "Welcome to Wire Scout API!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Metrics of the process, in the Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 app.include_router(endpoints.router)
+app.add_middleware(RequestMetricsMiddleware)
 
 
 # Default to development server origin if not set
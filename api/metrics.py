@@ -0,0 +1,48 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import REGISTRY
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "api_request_duration_seconds",
+    "Time to handle requests, until their response is sent whole, by route.",
+    labels=["method", "route", "status"],
+)
+SERIALIZATION_SECONDS = REGISTRY.histogram(
+    "api_serialization_duration_seconds",
+    "Time to render response bodies, by format.",
+    labels=["format"],
+)
+
+
+class RequestMetricsMiddleware:
+    """Times every HTTP request, labelled by its route template (e.g. `/v1/articles/{article_id}`), not its path."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = 500  # unless a response starts
+
+        async def send_and_record_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            route = scope.get("route")  # set by the router once matched
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started_at,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
@@ -1,23 +1,35 @@
+import gzip
+import json
 import unittest
 from datetime import UTC, datetime, timedelta
+from unittest import mock
 
+from bson import ObjectId
 from fastapi.testclient import TestClient
 
+from api.articles import endpoints
+from api.articles.filters import ArticleFilters, ArticlePage, encode_cursor
 from api.main import app
 from models.article import Article
 from models.tests.factories import ArticleFactory
 from storage.mongo import get_database
 
 
+def newest_first(articles: list[Article]) -> list[Article]:
+    # articles of the same date come last stored first
+    return sorted(reversed(articles), key=lambda article: article.date, reverse=True)
+
+
 class TestArticlesEndpoints(unittest.TestCase):
     url = "/v1/articles"
 
     def setUp(self):
-        self.client = TestClient(app)
+        self.client = self.enterContext(TestClient(app))  # runs the lifespan, opening the shared client
 
         self.db = get_database()
         self.db._db.articles.drop()
         self.addCleanup(self.db._db.articles.drop)
+        self.addCleanup(self.db._db.meta.drop)
 
     def assertContract(self, resource: dict, article: Article):
         self.assertEqual(resource["title"], article.title)
@@ -34,7 +46,7 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(5, len(items))
-        for received_item, article in zip(items, articles):
+        for received_item, article in zip(items, newest_first(articles), strict=True):
             self.assertContract(received_item, article)
 
     def test_get_articles_filter_by_title(self):
@@ -50,7 +62,7 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(4, len(items))
-        for received_item, article in zip(items, article_with_title):
+        for received_item, article in zip(items, newest_first(article_with_title), strict=True):
             self.assertContract(received_item, article)
 
     def test_get_articles_filter_by_content(self):
@@ -66,7 +78,7 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(4, len(items))
-        for received_item, article in zip(items, article_with_content):
+        for received_item, article in zip(items, newest_first(article_with_content), strict=True):
             self.assertContract(received_item, article)
 
     def test_get_articles_filter_by_news_provider(self):
@@ -82,9 +94,53 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(4, len(items))
-        for received_item, article in zip(items, article_with_provider):
+        for received_item, article in zip(items, newest_first(article_with_provider), strict=True):
             self.assertContract(received_item, article)
 
+    def test_get_articles_filter_by_title_with_special_characters(self):
+        article = ArticleFactory.create(title="Revenue (Q1) up 5%+ [preliminary]")
+        ArticleFactory.create_batch(2, title="Revenue Q1 up")  # noise
+
+        response = self.client.get(self.url, params={"title": "(q1) up 5%+ ["})
+        self.assertEqual(200, response.status_code)
+
+        items = response.json()["items"]
+        self.assertEqual(1, len(items))
+        self.assertContract(items[0], article)
+
+    def test_get_articles_filter_by_news_provider_match(self):
+        ArticleFactory.create(news_provided_by="Acme Inc.")
+        ArticleFactory.create(news_provided_by="ACME  Holdings")
+        ArticleFactory.create(news_provided_by="Big Acme")
+
+        for match, news_provider, expected_providers in [
+            ("contains", "acme", {"Acme Inc.", "ACME  Holdings", "Big Acme"}),
+            ("prefix", "acme", {"Acme Inc.", "ACME  Holdings"}),
+            ("prefix", "Acme holdings", {"ACME  Holdings"}),
+            ("exact", "acme inc.", {"Acme Inc."}),
+            ("exact", "acme", set()),
+        ]:
+            with self.subTest(match=match, news_provider=news_provider):
+                response = self.client.get(
+                    self.url, params={"news_provider": news_provider, "news_provider_match": match}
+                )
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(expected_providers, {item["news_provided_by"] for item in response.json()["items"]})
+
+    def test_search_articles(self):
+        self.db.ensure_indexes()
+        in_content = ArticleFactory.create(title="Quarterly report", content="Record earnings this quarter")
+        in_title = ArticleFactory.create(title="Record earnings announced", content="Details to follow")
+        ArticleFactory.create_batch(3, title="Unrelated", content="Nothing to see")  # noise
+
+        response = self.client.get(self.url, params={"search": "earnings"})
+        self.assertEqual(200, response.status_code)
+
+        items = response.json()["items"]
+        self.assertEqual(2, len(items))
+        self.assertContract(items[0], in_title)  # matches in the title weigh more
+        self.assertContract(items[1], in_content)
+
     def test_get_articles_filter_by_date_range(self):
         reference_date = datetime.now(tz=UTC)
         start = reference_date - timedelta(days=2)
@@ -106,7 +162,7 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(6, len(items))
-        for received_item, article in zip(items, article_with_date):
+        for received_item, article in zip(items, newest_first(article_with_date), strict=True):
             self.assertContract(received_item, article)
 
     def test_get_articles_filter_by_start_date_only(self):
@@ -125,7 +181,7 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(4, len(items))
-        for received_item, article in zip(items, article_with_date):
+        for received_item, article in zip(items, newest_first(article_with_date), strict=True):
             self.assertContract(received_item, article)
 
     def test_get_articles_filter_by_end_date_only(self):
@@ -144,7 +200,7 @@ class TestArticlesEndpoints(unittest.TestCase):
 
         items = response.json()["items"]
         self.assertEqual(4, len(items))
-        for received_item, article in zip(items, article_with_date):
+        for received_item, article in zip(items, newest_first(article_with_date), strict=True):
             self.assertContract(received_item, article)
 
     def test_get_articles_with_skip_and_limit(self):
@@ -156,13 +212,311 @@ class TestArticlesEndpoints(unittest.TestCase):
         items = response.json()["items"]
         self.assertEqual(4, len(items))
 
-        expected_items = article_with_title[3:7]  # items 4, 5, 6, 7
-        for received_item, article in zip(items, expected_items):
+        expected_items = newest_first(article_with_title)[3:7]  # items 4, 5, 6, 7
+        for received_item, article in zip(items, expected_items, strict=True):
+            self.assertContract(received_item, article)
+
+    def test_get_articles_with_invalid_limit(self):
+        for limit in (0, -1, 100_000):
+            with self.subTest(limit=limit):
+                response = self.client.get(self.url, params={"limit": limit, "include_total": True})
+                self.assertEqual(422, response.status_code)
+
+    def test_get_articles_by_cursor(self):
+        articles = newest_first(
+            [
+                # same date, so ordered by id; naive, as the dates faked for the others
+                *ArticleFactory.create_batch(3, date=datetime(2024, 1, 2, tzinfo=UTC).replace(tzinfo=None)),
+                *ArticleFactory.create_batch(4),
+            ]
+        )
+
+        received_items = []
+        params = {"limit": 3}
+        while True:
+            response = self.client.get(self.url, params=params)
+            self.assertEqual(200, response.status_code)
+            page = response.json()
+            received_items.extend(page["items"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+            ArticleFactory.create(date=datetime.now(tz=UTC))  # newer articles don't shift the next pages
+
+        self.assertEqual(len(articles), len(received_items))
+        for received_item, article in zip(received_items, articles, strict=True):
             self.assertContract(received_item, article)
 
+    def test_get_articles_by_cursor_with_filters(self):
+        ArticleFactory.create_batch(3, news_provided_by="Acme Inc.")
+        ArticleFactory.create_batch(3)  # noise
+
+        first_page = self.client.get(self.url, params={"news_provider": "acme", "limit": 2}).json()
+        second_page = self.client.get(
+            self.url, params={"news_provider": "acme", "limit": 2, "cursor": first_page["next_cursor"]}
+        ).json()
+
+        self.assertEqual(1, len(second_page["items"]))
+        self.assertEqual("Acme Inc.", second_page["items"][0]["news_provided_by"])
+        self.assertIsNone(second_page["next_cursor"])
+
+    def test_get_articles_invalid_cursor(self):
+        for params in ({"cursor": "invalid"}, {"cursor": "eyJkYXRlIjogMX0=", "limit": 1}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params=params)
+                self.assertEqual(422, response.status_code)
+
+    def test_get_articles_search_by_cursor(self):
+        response = self.client.get(self.url, params={"search": "earnings", "cursor": "eyJkYXRlIjogMX0="})
+        self.assertEqual(422, response.status_code)
+
+    def test_get_articles_snippet(self):
+        long_article = ArticleFactory.create(content="Lorem ipsum " * 100)
+        short_article = ArticleFactory.create(content="Short")
+
+        response = self.client.get(self.url, params={"view": "snippet", "snippet_length": 20})
+        self.assertEqual(200, response.status_code)
+
+        items = {item["id"]: item for item in response.json()["items"]}
+        self.assertEqual(2, len(items))
+        for item in items.values():
+            self.assertNotIn("content", item)
+
+        long_item = items[self.client.get(self.url, params={"title": long_article.title}).json()["items"][0]["id"]]
+        self.assertEqual("Lorem ipsum Lorem ip…", long_item["snippet"])
+        self.assertEqual(long_article.title, long_item["title"])
+        short_item = items[self.client.get(self.url, params={"title": short_article.title}).json()["items"][0]["id"]]
+        self.assertEqual("Short", short_item["snippet"])
+
+    def test_get_articles_collapse_duplicates(self):
+        original = ArticleFactory.create()
+        ArticleFactory.create(content=original.content, duplicate_of=original.url)
+
+        all_articles = self.client.get(self.url).json()["items"]
+        collapsed = self.client.get(self.url, params={"collapse_duplicates": True}).json()["items"]
+
+        self.assertEqual(2, len(all_articles))
+        self.assertEqual([original.title], [item["title"] for item in collapsed])
+
+    def test_get_articles_with_total(self):
+        articles = newest_first(ArticleFactory.create_batch(5, news_provided_by="Acme Inc."))
+        ArticleFactory.create(news_provided_by="Noise Corp.")  # noise
+
+        params = {"news_provider": "acme", "limit": 2, "include_total": True}
+        first_page = self.client.get(self.url, params=params).json()
+        second_page = self.client.get(self.url, params=params | {"cursor": first_page["next_cursor"]}).json()
+
+        for page, page_articles in ((first_page, articles[:2]), (second_page, articles[2:4])):
+            self.assertEqual({"value": 5, "exact": True}, page["total"])  # of the filters, whatever the page
+            self.assertEqual([article.title for article in page_articles], [item["title"] for item in page["items"]])
+        self.assertNotIn("total", self.client.get(self.url, params={"limit": 2}).json())
+
+    def test_get_articles_with_estimated_total(self):
+        ArticleFactory.create_batch(4, news_provided_by="Acme Inc.")
+        ArticleFactory.create(news_provided_by="Noise Corp.")
+        params = {"limit": 1, "include_total": True, "count_mode": "estimated"}
+
+        with mock.patch.object(endpoints, "ESTIMATED_COUNT_LIMIT", 3):
+            counted_up_to_limit = self.client.get(self.url, params=params | {"news_provider": "acme"}).json()
+            counted_below_limit = self.client.get(self.url, params=params | {"news_provider": "noise"}).json()
+            from_metadata = self.client.get(self.url, params=params).json()
+
+        self.assertEqual({"value": 3, "exact": False}, counted_up_to_limit["total"])
+        self.assertEqual({"value": 1, "exact": True}, counted_below_limit["total"])
+        self.assertEqual({"value": 5, "exact": False}, from_metadata["total"])
+        self.assertEqual(1, len(from_metadata["items"]))
+
+    def test_get_articles_with_facets(self):
+        ArticleFactory.create_batch(3, news_provided_by="Acme Inc.", title="Acme news")
+        ArticleFactory.create(news_provided_by="Wire Scout", title="Acme news")
+        ArticleFactory.create(news_provided_by="Noise Corp.")  # noise
+
+        page = self.client.get(self.url, params={"title": "acme", "limit": 1, "include_facets": True}).json()
+
+        self.assertEqual(1, len(page["items"]))
+        self.assertNotIn("total", page)
+        self.assertEqual(
+            {
+                "news_provided_by": [
+                    {"news_provided_by": "Acme Inc.", "count": 3},
+                    {"news_provided_by": "Wire Scout", "count": 1},
+                ]
+            },
+            page["facets"],
+        )
+
+    def test_get_article(self):
+        article = ArticleFactory.create()
+        ArticleFactory.create_batch(2)  # noise
+        article_id = self.client.get(self.url, params={"title": article.title}).json()["items"][0]["id"]
+
+        response = self.client.get(f"{self.url}/{article_id}")
+        self.assertEqual(200, response.status_code)
+
+        resource = response.json()
+        self.assertContract(resource, article)
+        self.assertEqual(article_id, resource["id"])
+        self.assertEqual(article.url, resource["url"])
+
+    def test_get_article_not_found(self):
+        for article_id in ("0123456789abcdef01234567", "invalid"):
+            with self.subTest(article_id=article_id):
+                response = self.client.get(f"{self.url}/{article_id}")
+                self.assertEqual(404, response.status_code)
+
+    def test_export_articles(self):
+        articles = ArticleFactory.create_batch(5)
+
+        with mock.patch.object(endpoints, "EXPORT_BATCH_SIZE", 2):  # streamed in several chunks
+            response = self.client.get(f"{self.url}/export", headers={"Accept-Encoding": "identity"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("application/x-ndjson", response.headers["Content-Type"])
+        self.assertNotIn("Content-Encoding", response.headers)
+
+        lines = response.text.splitlines()
+        self.assertEqual(5, len(lines))
+        for line, article in zip(lines, newest_first(articles), strict=True):
+            resource = json.loads(line)
+            self.assertContract(resource, article)
+            self.assertEqual(article.url, resource["url"])
+
+    def test_export_articles_filtered(self):
+        articles = ArticleFactory.create_batch(2, news_provided_by="Wire Scout Inc.")
+        ArticleFactory.create_batch(3, news_provided_by="Noise Corp.")  # noise
+
+        response = self.client.get(f"{self.url}/export", params={"news_provider": "wire scout"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [article.url for article in newest_first(articles)],
+            [json.loads(line)["url"] for line in response.text.splitlines()],
+        )
+
+    def test_export_articles_gzip(self):
+        articles = ArticleFactory.create_batch(3)
+
+        with self.client.stream("GET", f"{self.url}/export", headers={"Accept-Encoding": "gzip"}) as response:
+            self.assertEqual("gzip", response.headers["Content-Encoding"])
+            body = gzip.decompress(b"".join(response.iter_raw()))
+
+        self.assertEqual(
+            [article.url for article in newest_first(articles)],
+            [json.loads(line)["url"] for line in body.splitlines()],
+        )
+
+    def test_get_provider_stats(self):
+        ArticleFactory.create_batch(3, news_provided_by="Acme Inc.")
+        ArticleFactory.create(news_provided_by="ACME  Inc.")  # same provider, once normalized
+        ArticleFactory.create_batch(2, news_provided_by="Wire Scout")
+        ArticleFactory.create(news_provided_by="Noise Corp.")
+
+        response = self.client.get(f"{self.url}/stats/providers")
+        self.assertEqual(200, response.status_code)
+
+        counts = [(item["news_provided_by"].casefold(), item["count"]) for item in response.json()["items"]]
+        self.assertEqual([("acme inc.", 4), ("wire scout", 2), ("noise corp.", 1)], counts)
+
+        with self.subTest("With filters and limit"):
+            response = self.client.get(
+                f"{self.url}/stats/providers", params={"news_provider": "o", "limit": 1}
+            )  # all but Acme Inc.
+            self.assertEqual([{"news_provided_by": "Wire Scout", "count": 2}], response.json()["items"])
+
+    def test_get_date_stats(self):
+        for day, count in ((1, 2), (2, 1), (9, 3)):
+            ArticleFactory.create_batch(count, date=datetime(2024, 1, day, 10))  # noqa: DTZ001
+        ArticleFactory.create(date=datetime(2024, 1, 1, 23, 59))  # noqa: DTZ001
+        ArticleFactory.create(date=datetime(2023, 12, 31))  # noqa: DTZ001, filtered out
+
+        params = {"start_date": "2024-01-01T00:00:00"}
+        response = self.client.get(f"{self.url}/stats/dates", params=params)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            {
+                "interval": "day",
+                "items": [
+                    {"date": "2024-01-01T00:00:00", "count": 3},
+                    {"date": "2024-01-02T00:00:00", "count": 1},
+                    {"date": "2024-01-09T00:00:00", "count": 3},
+                ],
+            },
+            response.json(),
+        )
+
+        with self.subTest("By week"):
+            response = self.client.get(f"{self.url}/stats/dates", params=params | {"interval": "week"})
+            self.assertEqual(
+                [{"date": "2024-01-01T00:00:00", "count": 4}, {"date": "2024-01-08T00:00:00", "count": 3}],
+                response.json()["items"],
+            )
+
+    def test_get_articles_cached_until_next_crawl(self):
+        ArticleFactory.create_batch(2)
+        self.client.app.state.response_cache.generation_check_interval = 0
+
+        first_response = self.client.get(self.url)
+        ArticleFactory.create()  # stored, but not crawled yet
+        second_response = self.client.get(self.url, params={"limit": 50})  # same query, normalized
+
+        self.assertEqual(first_response.content, second_response.content)
+        self.assertEqual(2, len(second_response.json()["items"]))
+
+        self.db.bump_generation()
+        self.assertEqual(3, len(self.client.get(self.url).json()["items"]))
+
+    def test_get_articles_not_modified(self):
+        ArticleFactory.create_batch(2)
+
+        response = self.client.get(self.url)
+        etag = response.headers["ETag"]
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response.headers["ETag"])
+
+        response = self.client.get(self.url, params={"limit": 1}, headers={"If-None-Match": etag})
+        self.assertEqual(200, response.status_code)
+
     def test_get_articles_filter_by_date_range_invalid_date(self):
         response = self.client.get(self.url + "?start_date=invalid&end_date=invalid")
         self.assertEqual(422, response.status_code)
 
         error_msg = response.json()["detail"][0]["msg"]
         self.assertIn("Input should be a valid datetime", error_msg)
+
+
+class TestArticlesQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.db = get_database()
+        self.db._db.articles.drop()
+        self.addCleanup(self.db._db.articles.drop)
+
+        with TestClient(app):  # indexes are ensured on startup
+            pass
+        ArticleFactory.create_batch(5)
+
+    def assertUsesIndex(self, filters: ArticleFilters, index_name: str):
+        self.assertIn(index_name, self.db.used_indexes(filters.query, sort=filters.sort))
+
+    def test_query_plan_date_range(self):
+        now = datetime.now(tz=UTC)
+        self.assertUsesIndex(ArticleFilters(start_date=now - timedelta(days=1), end_date=now), "date_id_desc")
+        self.assertUsesIndex(ArticleFilters(start_date=now), "date_id_desc")
+
+    def test_query_plan_news_provider(self):
+        for match in ("prefix", "exact"):
+            with self.subTest(match=match):
+                filters = ArticleFilters(news_provider="Acme", news_provider_match=match)
+                self.assertUsesIndex(filters, "provider_key_date_id_desc")
+
+    def test_query_plan_newest_first(self):
+        self.assertUsesIndex(ArticleFilters(), "date_id_desc")
+        cursor = encode_cursor(date=datetime.now(tz=UTC), article_id=ObjectId())
+        self.assertUsesIndex(ArticlePage(cursor=cursor), "date_id_desc")
+
+    def test_query_plan_search(self):
+        self.assertUsesIndex(ArticleFilters(search="earnings"), "title_content_text")
+
+    def test_query_plan_collection_scan(self):
+        self.assertEqual(set(), self.db.used_indexes(ArticleFilters(title="earnings").query, sort=None))
@@ -0,0 +1,115 @@
+import unittest
+
+from api.cache import CachedResponse, MemoryBackend, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StandInDatabase:
+    """Stand-in for `AsyncMongoRepository`, with a generation bumped at will."""
+
+    def __init__(self):
+        self.generation = 0
+        self.generation_reads = 0
+
+    async def get_generation(self) -> int:
+        self.generation_reads += 1
+        return self.generation
+
+
+class TestCachedResponse(unittest.TestCase):
+    def test_to_response(self):
+        cached = CachedResponse.from_body(b'{"items":[]}')
+
+        response = cached.to_response()
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b'{"items":[]}', response.body)
+        self.assertEqual(cached.etag, response.headers["ETag"])
+
+    def test_to_response_not_modified(self):
+        cached = CachedResponse.from_body(b'{"items":[]}')
+
+        for if_none_match in (cached.etag, f'"other", W/{cached.etag}'):
+            with self.subTest(if_none_match=if_none_match):
+                response = cached.to_response(if_none_match=if_none_match)
+                self.assertEqual(304, response.status_code)
+                self.assertEqual(b"", response.body)
+
+        self.assertEqual(200, cached.to_response(if_none_match='"other"').status_code)
+
+
+class TestMemoryBackend(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = MemoryBackend(max_entries=2, ttl=10, clock=self.clock)
+
+    def test_evicts_least_recently_used(self):
+        for key in ("a", "b"):
+            self.backend.set(key, CachedResponse.from_body(key.encode()))
+        self.backend.get("a")
+
+        self.backend.set("c", CachedResponse.from_body(b"c"))
+
+        self.assertIsNotNone(self.backend.get("a"))
+        self.assertIsNone(self.backend.get("b"))
+        self.assertIsNotNone(self.backend.get("c"))
+
+    def test_expires(self):
+        self.backend.set("a", CachedResponse.from_body(b"a"))
+
+        self.clock.now = 9.9
+        self.assertIsNotNone(self.backend.get("a"))
+        self.clock.now = 10
+        self.assertIsNone(self.backend.get("a"))
+        self.assertEqual(0, len(self.backend))
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.db = StandInDatabase()
+        self.cache = ResponseCache(backend=MemoryBackend(), generation_check_interval=5, clock=self.clock)
+        self.renders = 0
+
+    async def render(self) -> bytes:
+        self.renders += 1
+        return f"render {self.renders}".encode()
+
+    async def test_get_or_render(self):
+        first = await self.cache.get_or_render("key", db=self.db, render=self.render)
+        second = await self.cache.get_or_render("key", db=self.db, render=self.render)
+        other = await self.cache.get_or_render("other", db=self.db, render=self.render)
+
+        self.assertEqual(b"render 1", first.body)
+        self.assertEqual(first, second)
+        self.assertEqual(b"render 2", other.body)
+        self.assertEqual(1, self.db.generation_reads)
+
+    async def test_invalidates_on_new_generation(self):
+        await self.cache.get_or_render("key", db=self.db, render=self.render)
+        self.db.generation += 1
+
+        self.clock.now = 4.9  # not checked yet
+        self.assertEqual(b"render 1", (await self.cache.get_or_render("key", db=self.db, render=self.render)).body)
+
+        self.clock.now = 5
+        self.assertEqual(b"render 2", (await self.cache.get_or_render("key", db=self.db, render=self.render)).body)
+        self.assertEqual(2, self.db.generation_reads)
+
+    async def test_not_stored_when_generation_changes_while_rendering(self):
+        self.cache.generation_check_interval = 0
+
+        async def render_while_crawling() -> bytes:
+            self.db.generation += 1
+            await self.cache._check_generation(self.db)  # e.g. by a concurrent request
+            return await self.render()
+
+        await self.cache.get_or_render("key", db=self.db, render=render_while_crawling)
+
+        self.assertIsNone(self.cache.backend.get("key"))
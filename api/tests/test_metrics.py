@@ -0,0 +1,56 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.metrics import REQUEST_SECONDS, SERIALIZATION_SECONDS
+from metrics import CONTENT_TYPE
+from models.tests.factories import ArticleFactory
+from storage.mongo import get_database
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.client = self.enterContext(TestClient(app))
+
+        self.db = get_database()
+        self.addCleanup(self.db._db.articles.drop)
+        self.addCleanup(self.db._db.meta.drop)
+
+    def test_request_duration(self):
+        ArticleFactory.create()
+        article_id = self.client.get("/v1/articles").json()["items"][0]["id"]
+        requests = REQUEST_SECONDS.count(method="GET", route="/v1/articles/{article_id}", status=200)
+        missing = REQUEST_SECONDS.count(method="GET", route="/v1/articles/{article_id}", status=404)
+
+        self.client.get(f"/v1/articles/{article_id}")
+        self.client.get("/v1/articles/missing")
+
+        # by route template, not path
+        self.assertEqual(
+            requests + 1, REQUEST_SECONDS.count(method="GET", route="/v1/articles/{article_id}", status=200)
+        )
+        self.assertEqual(
+            missing + 1, REQUEST_SECONDS.count(method="GET", route="/v1/articles/{article_id}", status=404)
+        )
+
+    def test_serialization_duration(self):
+        ArticleFactory.create_batch(3)
+        renders = SERIALIZATION_SECONDS.count(format="list")
+
+        self.client.get("/v1/articles")
+
+        self.assertEqual(renders + 1, SERIALIZATION_SECONDS.count(format="list"))
+
+    def test_metrics(self):
+        self.client.get("/v1/articles")
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(CONTENT_TYPE, response.headers["Content-Type"])
+        self.assertIn(
+            'api_request_duration_seconds_count{method="GET",route="/v1/articles",status="200"}', response.text
+        )
+        self.assertIn("# TYPE api_serialization_duration_seconds histogram", response.text)
+        self.assertIn("# TYPE mongo_command_duration_seconds histogram", response.text)
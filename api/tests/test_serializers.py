@@ -0,0 +1,63 @@
+import functools
+import json
+import unittest
+from datetime import datetime
+
+from bson import ObjectId
+
+from api.articles.serializers import ArticleListResponse, render_article_list, render_article_snippets, snippet
+from models.article import Article
+
+
+def make_document(**fields) -> dict:
+    return {
+        "_id": ObjectId(),
+        "url": "https://www.prnewswire.com/news-releases/article.html",
+        "title": "Acme announces “record” results",
+        "date": datetime(2024, 1, 2, 10, 30, 15, 123000),  # noqa: DTZ001, as MongoDB hands it back
+        "news_provided_by": "Acme Inc.",
+        "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
+        "last_modified": None,
+    } | fields
+
+
+class TestRenderArticleList(unittest.TestCase):
+    def test_same_as_models(self):
+        documents = [make_document(), make_document(content="")]
+        articles = [
+            Article(id=str(document["_id"]), **{k: v for k, v in document.items() if k != "_id"})
+            for document in documents
+        ]
+
+        rendered = render_article_list(documents, next_cursor="cursor")
+
+        self.assertEqual(
+            ArticleListResponse.from_articles(articles, next_cursor="cursor").model_dump(exclude_unset=True),
+            json.loads(rendered),
+        )
+
+    def test_with_counts(self):
+        total = {"value": 10_000, "exact": False}
+        facets = {"news_provided_by": [{"news_provided_by": "Acme Inc.", "count": 10_000}]}
+
+        for render in (render_article_list, functools.partial(render_article_snippets, snippet_length=6)):
+            with self.subTest(render=render):
+                page = json.loads(render([make_document()], total=total, facets=facets))
+                self.assertEqual(total, page["total"])
+                self.assertEqual(facets, page["facets"])
+                ArticleListResponse.model_validate(page)  # as documented
+
+    def test_snippets(self):
+        documents = [make_document(content="Lorem ipsum dolor"), make_document(content="Lorem")]
+
+        page = json.loads(render_article_snippets(documents, snippet_length=6))
+
+        self.assertEqual(["Lorem…", "Lorem"], [item["snippet"] for item in page["items"]])
+        self.assertEqual("2024-01-02T10:30:15", page["items"][0]["date"])
+        self.assertNotIn("content", page["items"][0])
+        self.assertIsNone(page["next_cursor"])
+
+    def test_snippet(self):
+        self.assertEqual("Lorem ipsum", snippet("Lorem ipsum", length=11))
+        self.assertEqual("Lorem…", snippet("Lorem ipsum", length=6))
+        self.assertEqual("", snippet("", length=6))
@@ -0,0 +1,182 @@
+import asyncio
+import io
+import itertools
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Self
+from urllib.parse import urlsplit
+
+import httpx
+
+from crawler.browser import SITEMAP_URL, Browser, SitemapEntry
+from crawler.cache import HttpCache
+from crawler.http import USER_AGENT
+from crawler.ledger import CrawlLedger
+from crawler.metrics import observe_fetch
+from crawler.parser import NewsParser, parse_entry
+from crawler.throttle import Throttle
+from crawler.writer import ArticleWriter
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+class AsyncCrawler:
+    """
+    Asyncio crawl engine: all fetches share a keep-alive connection pool and run concurrently,
+    up to `concurrency` requests in flight overall and `per_host_limit` per host.
+    Parsing is CPU-bound, so it runs in `parse_executor` (default: the loop's thread pool) to keep the loop free.
+    With an `http_cache`, fetches are conditional and a 304 is served from the cache.
+    With a `throttle`, requests to each host are sent at its rate, and throttled or failed ones are retried.
+    """
+
+    def __init__(
+        self,
+        writer: ArticleWriter,
+        concurrency: int = 200,
+        per_host_limit: int = 50,
+        timeout: float = 30.0,
+        parse_executor: Executor | None = None,
+        parser_class: type[NewsParser] = NewsParser,
+        http_cache: HttpCache | None = None,
+        ledger: CrawlLedger | None = None,
+        throttle: Throttle | None = None,
+    ) -> None:
+        self.writer = writer
+        self.ledger = ledger
+        self.throttle = throttle
+        self.http_cache = http_cache
+        self.parser_class = parser_class
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.parse_executor = parse_executor
+
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={"User-Agent": USER_AGENT},
+            timeout=timeout,
+            follow_redirects=True,
+        )
+        self._host_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host_limit)
+        )
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def get_news_entries(
+        self,
+        sitemap_url: str = SITEMAP_URL,
+        since: datetime | None = None,
+    ) -> list[SitemapEntry]:
+        """Fetch the sitemap index, then all of its child sitemaps modified `since` concurrently."""
+        index_content = await self._fetch_sitemap(sitemap_url)
+        child_sitemap_urls = [
+            sitemap.url
+            for sitemap in Browser._iter_sitemap_index(io.BytesIO(index_content))
+            if sitemap.is_modified_since(since)
+        ]
+        child_contents = await asyncio.gather(*(self._fetch_sitemap(url) for url in child_sitemap_urls))
+        return [
+            entry
+            for content in child_contents
+            for entry in Browser._iter_urlset(io.BytesIO(content))
+            if entry.is_modified_since(since)
+        ]
+
+    async def crawl(self, entries: Iterable[SitemapEntry]) -> int:
+        """
+        Fetch, parse and hand over to the writer all `entries`, returning how many articles were parsed.
+        Raises the writer's error if it stopped taking them, cancelling the fetches left.
+        """
+        pending: asyncio.Queue[SitemapEntry | None] = asyncio.Queue(maxsize=self.concurrency * 2)
+        try:
+            # a worker failing cancels the others and the feeding below, which would otherwise block on a full queue
+            async with asyncio.TaskGroup() as workers:
+                tasks = [workers.create_task(self._work(pending)) for _ in range(self.concurrency)]
+
+                # planning entries may read and write MongoDB (see `CrawlLedger.plan`), so they're pulled off the loop
+                entries = iter(entries)
+                while batch := await asyncio.to_thread(list, itertools.islice(entries, self.concurrency)):
+                    for entry in batch:
+                        await pending.put(entry)
+                for _ in tasks:
+                    await pending.put(None)
+        except ExceptionGroup as errors:  # every worker failing on the same stopped writer: one is enough to tell
+            raise errors.exceptions[0] from None
+
+        return sum(task.result() for task in tasks)
+
+    async def _work(self, pending: asyncio.Queue[SitemapEntry | None]) -> int:
+        parsed = 0
+        while (entry := await pending.get()) is not None:
+            if await self._parse_and_store(entry):
+                parsed += 1
+        return parsed
+
+    async def _parse_and_store(self, entry: SitemapEntry) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            with observe_fetch("article"):
+                html_content = await self._fetch(entry.url)
+            if self.ledger is not None:  # may flush the states recorded to MongoDB, as may `failed`
+                await asyncio.to_thread(self.ledger.fetched, entry.url)
+            article = await loop.run_in_executor(
+                self.parse_executor, parse_entry, entry, html_content, self.parser_class
+            )
+        except Exception as e:  # recorded to be retried by a later run, rather than ending this one
+            logging.exception(f"Failed to parse article at {entry.url}")
+            if self.ledger is not None:
+                await asyncio.to_thread(self.ledger.failed, entry.url, reason=e)
+            return False
+
+        await asyncio.to_thread(self.writer.put, article)
+        logging.info(f"Parsed article {article.title}")
+        return True
+
+    async def _fetch_sitemap(self, url: str) -> bytes:
+        with observe_fetch("sitemap"):
+            return await self._fetch(url)
+
+    async def _fetch(self, url: str) -> bytes:
+        if self.http_cache is None:
+            resp = await self._get(url)
+            resp.raise_for_status()
+            return resp.content
+
+        # the cache index and bodies are on disk, so they're read and written off the loop
+        resp = await self._get(url, headers=await asyncio.to_thread(self.http_cache.validators, url))
+        if resp.status_code == httpx.codes.NOT_MODIFIED:
+            content = await asyncio.to_thread(self.http_cache.load, url)
+            if content is not None:
+                return content
+            resp = await self._get(url)  # evicted since the validators were read
+
+        resp.raise_for_status()
+        await asyncio.to_thread(
+            self.http_cache.store,
+            url,
+            content=resp.content,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            content_type=resp.headers.get("Content-Type"),
+        )
+        return resp.content
+
+    async def _get(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        async def request() -> httpx.Response:
+            # the host slot is only held while the request is in flight, not while waiting to retry it
+            async with self._host_slots[urlsplit(url).netloc]:
+                return await self._client.get(url, headers=headers)
+
+        if self.throttle is None:
+            return await request()
+        return await self.throttle.send_async(url, request)
@@ -0,0 +1,48 @@
+"""
+Compare the cost of parsing release header dates: with dateutil, as before, or with the dedicated parser.
+
+    uv run python -m crawler.benchmarks.dates
+"""
+
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from crawler.dates import TIMEZONES, parse_release_date
+
+
+def _header_dates(count: int) -> list[str]:
+    """Header dates of a day of releases, many of them published in the same minute."""
+    rng = random.Random(count)
+    day = datetime(2026, 10, 17, 6, tzinfo=TIMEZONES["ET"])
+    return [(day + timedelta(minutes=rng.randrange(12 * 60))).strftime("%b %d, %Y, %H:%M ET") for _ in range(count)]
+
+
+def _microseconds_per_date(parse, texts: list[str]) -> float:
+    seconds = min(timeit.repeat(lambda: [parse(text) for text in texts], number=1, repeat=3))
+    return seconds * 1_000_000 / len(texts)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--dates", type=int, default=20_000, help="dates parsed per measure")
+    args = arg_parser.parse_args()
+
+    texts = _header_dates(args.dates)
+    assert all(parser.parse(text, tzinfos=TIMEZONES) == parse_release_date(text) for text in texts)
+    parse_release_date.cache_clear()
+
+    measures = {
+        "dateutil": lambda text: parser.parse(text, tzinfos=TIMEZONES),
+        "dedicated": parse_release_date.__wrapped__,
+        "memoized": parse_release_date,
+    }
+    for name, parse in measures.items():
+        print(f"{name:>10}{_microseconds_per_date(parse, texts):>10.2f} µs/date")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare the parser engines over the sample articles: time per article and peak memory.
+
+    uv run python -m crawler.benchmarks.parser
+"""
+
+import argparse
+import multiprocessing
+import resource
+import timeit
+from pathlib import Path
+
+from crawler.lxml_parser import LxmlNewsParser
+from crawler.parser import NewsParser
+
+SAMPLES_DIR = Path(__file__).parents[1] / "tests" / "data"
+ENGINES: dict[str, type[NewsParser]] = {"soup": NewsParser, "lxml": LxmlNewsParser}
+
+
+def _parse_all(parser_class: type[NewsParser], samples: list[bytes]) -> None:
+    for html_content in samples:
+        _ = parser_class(url="https://fake.url", html_content=html_content).article
+
+
+def _measure(engine: str, samples: list[bytes], rounds: int) -> tuple[float, float]:
+    """Milliseconds per article, and peak RSS in MiB, for an engine running in a fresh process."""
+    seconds = timeit.timeit(lambda: _parse_all(ENGINES[engine], samples), number=rounds)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return seconds * 1000 / (rounds * len(samples)), peak_rss / 1024
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=20, help="times each sample is parsed")
+    args = arg_parser.parse_args()
+
+    samples = [path.read_bytes() for path in sorted(SAMPLES_DIR.glob("sample_*.html"))]
+    context = multiprocessing.get_context("spawn")  # a fresh process per engine, so peak memory is not shared
+    results = {}
+    for engine in ENGINES:
+        with context.Pool(processes=1) as pool:
+            results[engine] = pool.apply(_measure, (engine, samples, args.rounds))
+
+    print(f"{'engine':<8}{'ms/article':>12}{'peak RSS MiB':>14}")  # noqa: T201
+    for engine, (ms_per_article, peak_mib) in results.items():
+        print(f"{engine:<8}{ms_per_article:>12.2f}{peak_mib:>14.1f}")  # noqa: T201
+    print(f"lxml is {results['soup'][0] / results['lxml'][0]:.1f}x faster")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,157 @@
+import io
 import logging
 import xml.etree.ElementTree as ET
 from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import partial
+from typing import IO
 
-import requests
+from crawler.executor import map_bounded
+from crawler.http import fetch, get, get_http_cache
+from crawler.metrics import observe_fetch
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
 SITEMAP_URL = "https://www.prnewswire.com/sitemap-news.xml"
+SITEMAP_WORKERS = 8  # child sitemaps fetched at the same time
+SITEMAP_NS = {
+    "sm": "http://www.sitemaps.org/schemas/sitemap/0.9",
+    "news": "http://www.google.com/schemas/sitemap-news/0.9",
+}
+SITEMAP_TAG = f"{{{SITEMAP_NS['sm']}}}sitemap"
+URL_TAG = f"{{{SITEMAP_NS['sm']}}}url"
+
+
+@dataclass(frozen=True)
+class SitemapEntry:
+    url: str
+    lastmod: datetime | None = None
+    publication_date: datetime | None = None
+
+    @property
+    def modified_at(self) -> datetime | None:
+        """Most reliable hint of when the article last changed."""
+        return self.lastmod or self.publication_date
+
+    def is_modified_since(self, since: datetime | None) -> bool:
+        """Whether the entry may have changed since `since`; entries without any date hint always may."""
+        if since is None or self.modified_at is None:
+            return True
+        return as_utc(self.modified_at) >= as_utc(since)
 
 
 class Browser:
     @classmethod
     def get_news_links(cls) -> Generator[str]:
-        for sitemap_url in cls._get_sitemap_urls(SITEMAP_URL):
-            yield from cls._extract_article_links(sitemap_url)
+        for entry in cls.get_news_entries():
+            yield entry.url
+
+    @classmethod
+    def get_news_entries(cls, since: datetime | None = None) -> Generator[SitemapEntry]:
+        """
+        Stream all article entries from the news sitemap.
+        When `since` is given, child sitemaps and articles not modified since then are skipped without being fetched.
+        """
+        child_sitemap_urls = [
+            sitemap.url for sitemap in cls._get_sitemaps(SITEMAP_URL) if sitemap.is_modified_since(since)
+        ]
+        # a few child sitemaps ahead of the crawl at most, rather than the whole sitemap as soon as it starts;
+        # each one is read through in one go, as a stream left waiting on the crawl would time out
+        extract = partial(cls._extract_article_entries, since=since)
+        for entries in map_bounded(extract, child_sitemap_urls, max_workers=SITEMAP_WORKERS, window=SITEMAP_WORKERS):
+            yield from entries
 
     @classmethod
     def _get_sitemap_urls(cls, sitemap_url: str) -> list[str]:
         """Fetch and parse a sitemap index, returning all child sitemap URLs."""
-        resp = requests.get(sitemap_url)
-        tree = ET.fromstring(resp.content)
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        return [elem.text for elem in tree.findall("sm:sitemap/sm:loc", ns) if elem.text]
+        return [sitemap.url for sitemap in cls._get_sitemaps(sitemap_url)]
+
+    @classmethod
+    def _get_sitemaps(cls, sitemap_url: str) -> list[SitemapEntry]:
+        """Fetch and parse a sitemap index, returning all child sitemaps with their modification date."""
+        with cls._open(sitemap_url) as stream:
+            return list(cls._iter_sitemap_index(stream))
 
     @classmethod
     def _extract_article_links(cls, child_sitemap_url: str) -> list[str]:
         """Given a sitemap fragment, return all article URLs within it."""
-        resp = requests.get(child_sitemap_url)
-        tree = ET.fromstring(resp.content)
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        return [elem.text for elem in tree.findall("sm:url/sm:loc", ns) if elem.text]
+        return [entry.url for entry in cls._extract_article_entries(child_sitemap_url)]
+
+    @classmethod
+    def _extract_article_entries(cls, child_sitemap_url: str, since: datetime | None = None) -> list[SitemapEntry]:
+        """
+        Given a sitemap fragment, return all article entries within it modified `since`, with their modification hints.
+        Entries are filtered as parsed, so only those kept are held in memory.
+        """
+        with cls._open(child_sitemap_url) as stream:
+            return [entry for entry in cls._iter_urlset(stream) if entry.is_modified_since(since)]
+
+    @classmethod
+    @contextmanager
+    def _open(cls, url: str) -> Generator[IO[bytes]]:
+        """
+        Stream a response body, so sitemaps are parsed while downloaded and never held whole in memory.
+        With an HTTP cache set, the body is revalidated and read whole instead, to be cached.
+        Timed as a sitemap fetch, parsing along included.
+        """
+        with observe_fetch("sitemap"):
+            if get_http_cache() is not None:
+                yield io.BytesIO(fetch(url))
+                return
+
+            with get(url, stream=True) as resp:
+                resp.raise_for_status()
+                resp.raw.decode_content = True
+                yield resp.raw
+
+    @classmethod
+    def _iter_sitemap_index(cls, source: IO[bytes]) -> Generator[SitemapEntry]:
+        for sitemap_elem in _iterparse(source, tag=SITEMAP_TAG):
+            url = sitemap_elem.findtext("sm:loc", namespaces=SITEMAP_NS)
+            if url:
+                yield SitemapEntry(
+                    url=url.strip(),
+                    lastmod=_parse_datetime(sitemap_elem.findtext("sm:lastmod", namespaces=SITEMAP_NS)),
+                )
+
+    @classmethod
+    def _iter_urlset(cls, source: IO[bytes]) -> Generator[SitemapEntry]:
+        for url_elem in _iterparse(source, tag=URL_TAG):
+            url = url_elem.findtext("sm:loc", namespaces=SITEMAP_NS)
+            if url:
+                yield SitemapEntry(
+                    url=url.strip(),
+                    lastmod=_parse_datetime(url_elem.findtext("sm:lastmod", namespaces=SITEMAP_NS)),
+                    publication_date=_parse_datetime(
+                        url_elem.findtext("news:news/news:publication_date", namespaces=SITEMAP_NS)
+                    ),
+                )
+
+
+def _iterparse(source: IO[bytes], tag: str) -> Generator[ET.Element]:
+    """Yield every complete `tag` element, dropping it from the tree right after, so memory stays flat."""
+    root = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event == "end" and elem.tag == tag:
+            yield elem
+            root.clear()
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        logging.warning(f"Could not parse sitemap date {value!r}")
+        return None
+
+
+def as_utc(value: datetime) -> datetime:
+    # MongoDB hands back naive datetimes in UTC
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
@@ -0,0 +1,198 @@
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 1024**3  # 1 GiB
+EVICTION_BATCH_SIZE = 100
+TEMPORARY_FILE_MAX_AGE = 3600  # seconds: older ones were left behind by a crash rather than being written
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    url: str
+    path: Path
+    etag: str | None = None
+    last_modified: str | None = None
+    content_type: str | None = None
+
+
+class HttpCache:
+    """
+    On-disk cache of raw HTTP responses.
+    Bodies are content-addressed (stored once per SHA-256, however many URLs serve them), and an SQLite index maps
+    each URL to its body and validators (ETag / Last-Modified), so the crawler can revalidate instead of re-downloading.
+    Once over `max_bytes`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        (self.directory / "objects").mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index = sqlite3.connect(self.directory / "index.sqlite3", check_same_thread=False)
+        self._index.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._index.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._index.execute("CREATE INDEX IF NOT EXISTS responses_digest ON responses (digest)")
+        self._index.commit()
+        self._remove_orphans()
+        (self._bytes,) = self._index.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM responses)"
+        ).fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._index.close()
+
+    def get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self._index.execute(
+                "SELECT digest, etag, last_modified, content_type FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        digest, etag, last_modified, content_type = row
+        return CachedResponse(
+            url=url,
+            path=self._object_path(digest),
+            etag=etag,
+            last_modified=last_modified,
+            content_type=content_type,
+        )
+
+    def path_for(self, url: str) -> Path | None:
+        """Where the cached body of `url` is, e.g. to re-parse it offline with `NewsParser.from_file`."""
+        cached = self.get(url)
+        return cached.path if cached else None
+
+    def validators(self, url: str) -> dict[str, str]:
+        """Headers turning a request for `url` into a conditional one."""
+        cached = self.get(url)
+        if cached is None:
+            return {}
+        headers = {}
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def load(self, url: str) -> bytes | None:
+        """Cached body of `url`, or None if it's not (or no longer) cached."""
+        cached = self.get(url)
+        if cached is None:
+            return None
+        try:
+            content = cached.path.read_bytes()
+        except FileNotFoundError:  # evicted in the meantime
+            return None
+        with self._lock:
+            self._index.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._index.commit()
+        return content
+
+    def store(
+        self,
+        url: str,
+        content: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        content_type: str | None = None,
+    ) -> Path:
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        # all under the lock: a body must not be unlinked, as no longer referenced, right as it's stored again
+        with self._lock:
+            if not self._is_referenced(digest):
+                self._bytes += len(content)
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+                    tmp.write(content)
+                Path(tmp.name).replace(path)  # atomic: readers never see a partial body
+
+            previous = self._index.execute("SELECT digest, size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._index.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(content), etag, last_modified, content_type, time.time()),
+            )
+            if previous is not None and previous[0] != digest:  # the body it replaces may no longer be needed
+                self._release(*previous)
+            self._evict(keep_url=url)
+            self._index.commit()
+        return path
+
+    def urls(self, content_type: str | None = None) -> list[str]:
+        """Cached URLs, optionally only those whose content type starts with `content_type`."""
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT url FROM responses WHERE ? IS NULL OR content_type LIKE ? || '%' ORDER BY url",
+                (content_type, content_type),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    @property
+    def size(self) -> int:
+        """Bytes taken by the cached bodies."""
+        with self._lock:
+            return self._bytes
+
+    def _is_referenced(self, digest: str) -> bool:
+        return self._index.execute("SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)).fetchone() is not None
+
+    def _release(self, digest: str, size: int) -> None:
+        """Delete the body of `digest` once no URL refers to it anymore."""
+        if not self._is_referenced(digest):
+            self._object_path(digest).unlink(missing_ok=True)
+            self._bytes -= size
+
+    def _evict(self, keep_url: str) -> None:
+        while self._bytes > self.max_bytes:
+            # the oldest entries a few at a time, rather than the whole index on every store
+            oldest_first = self._index.execute(
+                "SELECT url, digest, size FROM responses WHERE url != ? ORDER BY accessed_at LIMIT ?",
+                (keep_url, EVICTION_BATCH_SIZE),
+            ).fetchall()
+            if not oldest_first:
+                return
+            for url, digest, entry_size in oldest_first:
+                if self._bytes <= self.max_bytes:
+                    return
+                self._index.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._release(digest, entry_size)
+
+    def _remove_orphans(self) -> None:
+        """
+        Delete bodies no URL refers to, e.g. left behind by a crash between storing a body and indexing it,
+        and temporary files left behind by one while writing it.
+        """
+        stale_before = time.time() - TEMPORARY_FILE_MAX_AGE
+        for path in (self.directory / "objects").glob("*/*"):
+            if path.name.startswith("tmp"):
+                try:
+                    orphaned = path.stat().st_mtime < stale_before  # otherwise maybe being written by another process
+                except FileNotFoundError:  # it just was, and took the place of its body
+                    continue
+            else:
+                orphaned = not self._is_referenced(path.name)
+            if orphaned:
+                path.unlink(missing_ok=True)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.directory / "objects" / digest[:2] / digest
@@ -0,0 +1,81 @@
+import logging
+import signal
+import threading
+import time
+from collections.abc import Callable
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+class PollInterval:
+    """
+    Time to wait between two polls, adapted to how often new articles show up: it aims at finding about `target`
+    of them per poll, at a rate smoothed over the last polls, between `minimum` and `maximum` seconds.
+    Polls finding nothing make it grow back towards `maximum` as the rate estimate decays.
+    """
+
+    def __init__(
+        self,
+        minimum: float = 30.0,
+        maximum: float = 900.0,
+        initial: float = 120.0,
+        target: float = 5.0,
+        smoothing: float = 0.3,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target
+        self.smoothing = smoothing
+        self.seconds = min(max(initial, minimum), maximum)
+        self.rate: float | None = None  # new articles per second
+
+    def update(self, new: int, elapsed: float) -> float:
+        """Account for `new` articles found over the last `elapsed` seconds, and return the next interval."""
+        rate = new / elapsed if elapsed > 0 else 0.0
+        self.rate = rate if self.rate is None else self.smoothing * rate + (1 - self.smoothing) * self.rate
+        self.seconds = self.maximum if self.rate == 0 else min(max(self.target / self.rate, self.minimum), self.maximum)
+        return self.seconds
+
+
+class CrawlDaemon:
+    """
+    Run `poll` over and over, waiting a `PollInterval` in between: `poll` crawls what changed since the last time,
+    returns how many new articles it found, and is handed an event set when it should stop and drain.
+    SIGTERM and SIGINT stop the daemon gracefully: the poll in flight finishes what it started, and no other runs.
+    """
+
+    def __init__(
+        self,
+        poll: Callable[[threading.Event], int],
+        interval: PollInterval | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.poll = poll
+        self.interval = interval or PollInterval()
+        self.stopping = threading.Event()
+        self._clock = clock
+
+    def run(self) -> None:
+        last_poll_at = None
+        while not self.stopping.is_set():
+            poll_at = self._clock()
+            try:
+                new = self.poll(self.stopping)
+            except Exception:  # the next poll may well succeed, e.g. once the sitemap is back up
+                logging.exception("Crawl poll failed")
+                new = 0
+            if last_poll_at is not None:  # the first poll catches up with the backlog, not the rate
+                self.interval.update(new, elapsed=poll_at - last_poll_at)
+            last_poll_at = poll_at
+            logging.info(f"Found {new} new articles, polling again in {self.interval.seconds:.0f}s")
+            self.stopping.wait(self.interval.seconds)
+        logging.info("Crawl daemon stopped")
+
+    def stop(self, *_) -> None:
+        """Stop after the poll in flight, if any: usable as a signal handler."""
+        logging.info("Stopping the crawl daemon, draining the poll in flight")
+        self.stopping.set()
+
+    def handle_signals(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
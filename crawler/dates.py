@@ -0,0 +1,53 @@
+import functools
+import re
+from datetime import UTC, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from dateutil import parser
+
+# zones named without standard or daylight time, e.g. "ET", follow DST; those naming it have a fixed offset
+TIMEZONES = {
+    "ET": ZoneInfo("America/New_York"),
+    "EST": timezone(timedelta(hours=-5)),
+    "EDT": timezone(timedelta(hours=-4)),
+    "CT": ZoneInfo("America/Chicago"),
+    "CST": timezone(timedelta(hours=-6)),
+    "CDT": timezone(timedelta(hours=-5)),
+    "MT": ZoneInfo("America/Denver"),
+    "MST": timezone(timedelta(hours=-7)),
+    "MDT": timezone(timedelta(hours=-6)),
+    "PT": ZoneInfo("America/Los_Angeles"),
+    "PST": timezone(timedelta(hours=-8)),
+    "PDT": timezone(timedelta(hours=-7)),
+    "GMT": UTC,
+    "UTC": UTC,
+}
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+# e.g. "Oct 17, 2026, 09:00 ET", "October 17, 2026 at 9:00 AM ET"
+_RELEASE_DATE = re.compile(
+    r"(?P<month>[A-Za-z]{3,9})\.? (?P<day>\d{1,2}), (?P<year>\d{4}),? (?:at )?"
+    r"(?P<hour>\d{1,2}):(?P<minute>\d{2})(?: ?(?P<meridiem>[AaPp])\.?[Mm]\.?)? (?P<zone>[A-Z]{2,3})"
+)
+
+
+@functools.lru_cache(maxsize=4096)  # releases published in the same minute share their date
+def parse_release_date(text: str) -> datetime:
+    """
+    Parse the date of a release header, in one of PR Newswire's formats, or whatever dateutil makes of it otherwise.
+    Raises ValueError when it's not a date at all.
+    """
+    match = _RELEASE_DATE.fullmatch(text.strip())
+    if match is None:
+        return parser.parse(text, tzinfos=TIMEZONES)
+    month = match["month"][:3].casefold()
+    zone = TIMEZONES.get(match["zone"])
+    if month not in MONTHS or zone is None:
+        return parser.parse(text, tzinfos=TIMEZONES)
+
+    hour = int(match["hour"])
+    if match["meridiem"] is not None:
+        hour = hour % 12 + (12 if match["meridiem"] in "Pp" else 0)
+    return datetime(
+        int(match["year"]), MONTHS.index(month) + 1, int(match["day"]), hour, int(match["minute"]), tzinfo=zone
+    )
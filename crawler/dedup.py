@@ -0,0 +1,61 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Self
+
+from storage import MongoRepository
+from storage.fingerprint import MIN_SHINGLES, SIMHASH_BITS, Fingerprint
+
+
+class DuplicateIndex:
+    """
+    In-memory index of the fingerprints of recent articles, to tell when an article repeats another one stored
+    under a different URL: with the same content once normalized, or nearly (at most `max_distance` bits apart).
+    Signatures are split in `max_distance + 1` bands: two of them that close have at least one band in common,
+    so only those sharing a band are compared.
+    Contents with fewer than `min_shingles` distinct shingles (e.g. empty, when the body of the article was not found)
+    are too short to tell apart: they're neither indexed nor matched.
+    """
+
+    def __init__(self, max_distance: int = 7, min_shingles: int = MIN_SHINGLES) -> None:
+        if not 0 <= max_distance < SIMHASH_BITS:
+            raise ValueError(f"max_distance must be between 0 and {SIMHASH_BITS - 1}")
+        self.max_distance = max_distance
+        self.min_shingles = min_shingles
+        bands = max_distance + 1
+        self._band_bounds = [(i * SIMHASH_BITS // bands, (i + 1) * SIMHASH_BITS // bands) for i in range(bands)]
+        self._urls_by_hash: dict[str, str] = {}
+        self._bands: list[defaultdict[int, list[tuple[int, str]]]] = [defaultdict(list) for _ in range(bands)]
+
+    @classmethod
+    def load(cls, db: MongoRepository, since: datetime, max_distance: int = 7) -> Self:
+        index = cls(max_distance=max_distance)
+        for url, fingerprint in db.get_fingerprints(since=since):
+            index.add(url, fingerprint)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._urls_by_hash)
+
+    def find_duplicate(self, url: str, fingerprint: Fingerprint) -> str | None:
+        """URL of an article indexed that `url` duplicates, if any."""
+        if fingerprint.shingles < self.min_shingles:
+            return None
+        original_url = self._urls_by_hash.get(fingerprint.content_hash)
+        if original_url is not None and original_url != url:
+            return original_url
+
+        for band, key in enumerate(self._band_keys(fingerprint.simhash)):
+            for simhash, original_url in self._bands[band].get(key, ()):
+                if original_url != url and (simhash ^ fingerprint.simhash).bit_count() <= self.max_distance:
+                    return original_url
+        return None
+
+    def add(self, url: str, fingerprint: Fingerprint) -> None:
+        if fingerprint.shingles < self.min_shingles:
+            return
+        self._urls_by_hash.setdefault(fingerprint.content_hash, url)
+        for band, key in enumerate(self._band_keys(fingerprint.simhash)):
+            self._bands[band][key].append((fingerprint.simhash, url))
+
+    def _band_keys(self, simhash: int) -> list[int]:
+        return [(simhash >> start) & ((1 << (end - start)) - 1) for start, end in self._band_bounds]
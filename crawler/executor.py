@@ -0,0 +1,29 @@
+import itertools
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+
+def map_bounded[T, R](
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    window: int | None = None,
+) -> Generator[R]:
+    """
+    Call `fn` on every item from a pool of `max_workers` threads, yielding results as they complete.
+    Unlike `Executor.map`, which submits every item up front, at most `window` items (default: twice the workers)
+    are in flight at once, pulled from `items` as others complete: memory stays flat however many there are.
+    The pool is shut down once done, or when the generator is closed, cancelling what was not started yet.
+    """
+    window = window or 2 * max_workers
+    items = iter(items)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        in_flight: set[Future[R]] = {pool.submit(fn, item) for item in itertools.islice(items, window)}
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            in_flight |= {pool.submit(fn, item) for item in itertools.islice(items, len(done))}
+            for future in done:
+                yield future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,81 @@
+from functools import cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crawler.cache import HttpCache
+from crawler.throttle import Throttle
+
+POOL_MAXSIZE = 64  # connections kept alive per host, shared by all crawler threads
+USER_AGENT = "wire-scout/0.1"
+
+_http_cache: HttpCache | None = None
+_throttle: Throttle | None = None
+
+
+@cache
+def get_session() -> requests.Session:
+    """Process-wide HTTP session, so fetches reuse keep-alive connections instead of opening new ones."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_http_cache() -> HttpCache | None:
+    return _http_cache
+
+
+def set_http_cache(http_cache: HttpCache | None) -> None:
+    """Route all `fetch` calls through `http_cache` (or stop caching, with None)."""
+    global _http_cache  # noqa: PLW0603
+    _http_cache = http_cache
+
+
+def get_throttle() -> Throttle | None:
+    return _throttle
+
+
+def set_throttle(throttle: Throttle | None) -> None:
+    """Send all requests within the limits of `throttle` (or without any, with None)."""
+    global _throttle  # noqa: PLW0603
+    _throttle = throttle
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the process-wide session, within the limits of the throttle set, if any."""
+    throttle = _throttle
+    if throttle is None:
+        return get_session().get(url, **kwargs)
+    return throttle.send(url, lambda: get_session().get(url, **kwargs))
+
+
+def fetch(url: str) -> bytes:
+    """
+    Fetch a response body.
+    With an HTTP cache set, the request is conditional on the cached validators, and a 304 is served from the cache.
+    """
+    http_cache = _http_cache
+    if http_cache is None:
+        resp = get(url)
+        resp.raise_for_status()
+        return resp.content
+
+    resp = get(url, headers=http_cache.validators(url))
+    if resp.status_code == requests.codes.not_modified:
+        content = http_cache.load(url)
+        if content is not None:
+            return content
+        resp = get(url)  # evicted since the validators were read
+
+    resp.raise_for_status()
+    http_cache.store(
+        url,
+        content=resp.content,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+        content_type=resp.headers.get("Content-Type"),
+    )
+    return resp.content
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Self
+
+from crawler.browser import SitemapEntry, as_utc
+from storage import MongoRepository
+
+
+class SeenUrlIndex:
+    """
+    In-memory index of the article URLs already stored, and when each one was last modified.
+    Used to skip fetching articles that did not change since the last crawl.
+    """
+
+    def __init__(self, known_urls: dict[str, datetime | None]) -> None:
+        self._known_urls = known_urls
+
+    @classmethod
+    def load(cls, db: MongoRepository) -> Self:
+        return cls(known_urls=db.get_url_index())
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._known_urls
+
+    def __len__(self) -> int:
+        return len(self._known_urls)
+
+    def is_new_or_changed(self, entry: SitemapEntry) -> bool:
+        if entry.url not in self._known_urls:
+            return True
+
+        modified_at = entry.modified_at
+        known_modified_at = self._known_urls[entry.url]
+        if modified_at is None or known_modified_at is None:
+            return False
+        return as_utc(modified_at) > as_utc(known_modified_at)
+
+    def add(self, url: str, modified_at: datetime | None = None) -> None:
+        self._known_urls[url] = modified_at
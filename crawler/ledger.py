@@ -0,0 +1,154 @@
+import itertools
+import logging
+import threading
+from collections.abc import Callable, Generator, Iterable
+from datetime import UTC, datetime, timedelta
+from enum import StrEnum
+from typing import Any, Self
+
+from crawler.browser import SitemapEntry, as_utc
+from storage import MongoRepository
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+class UrlState(StrEnum):
+    PENDING = "pending"  # planned to be crawled
+    FETCHED = "fetched"
+    PARSED = "parsed"  # handed over to the writer
+    STORED = "stored"
+    FAILED = "failed"  # with its reason, retried by later runs
+
+
+UNFINISHED_STATES = [UrlState.PENDING, UrlState.FETCHED, UrlState.PARSED]
+
+
+class CrawlLedger:
+    """
+    Persisted record of the state of every URL a crawl run goes through, so that:
+    - a run that died (e.g. on a container restart) can be resumed, crawling only what it left unfinished;
+    - failed URLs are retried by later runs, after a delay doubling with each attempt, up to `max_attempts`.
+    States are recorded from any thread, buffered and written in bulk every `flush_size` URLs.
+    Once `stop` is set, no more entries are planned: those left stay pending, for the run to be resumed.
+    """
+
+    def __init__(
+        self,
+        db: MongoRepository,
+        run_id: str,
+        failed: dict[str, tuple[int, datetime | None]] | None = None,
+        resumed: bool = False,
+        flush_size: int = 500,
+        retry_delay: timedelta = timedelta(minutes=15),
+        max_retry_delay: timedelta = timedelta(days=1),
+        max_attempts: int = 6,
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+        stop: threading.Event | None = None,
+    ) -> None:
+        self.db = db
+        self.run_id = run_id
+        self.resumed = resumed
+        self.flush_size = flush_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self.stop = stop
+        self._failed = failed or {}  # URL: attempts so far, and when to retry it (never, once given up)
+        self._pending_states: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, db: MongoRepository, engine: str, **kwargs) -> Self:
+        return cls(db, run_id=db.start_crawl_run(engine=engine), failed=db.get_failed_urls(), **kwargs)
+
+    @classmethod
+    def resume(cls, db: MongoRepository, **kwargs) -> Self | None:
+        """Ledger of the last run, if it did not complete."""
+        run = db.get_unfinished_crawl_run()
+        if run is None:
+            return None
+        return cls(db, run_id=run["_id"], failed=db.get_failed_urls(), resumed=True, **kwargs)
+
+    def plan(self, entries: Iterable[SitemapEntry] | None) -> Generator[SitemapEntry]:
+        """
+        Entries to crawl, recorded as pending: the failed ones due for a retry, then `entries` but the failed ones
+        not due yet. A resumed run crawls what it left unfinished instead of `entries`.
+        """
+        if self.resumed:
+            entries = (
+                SitemapEntry(
+                    url=state["_id"], lastmod=state.get("lastmod"), publication_date=state.get("publication_date")
+                )
+                for state in self.db.get_url_states(self.run_id, states=UNFINISHED_STATES)
+            )
+        retried = [SitemapEntry(url=url) for url in self._due_for_retry()]
+        planned = (entry for entry in entries or () if entry.url not in self._failed)
+
+        for batch in itertools.batched(itertools.chain(retried, planned), self.flush_size):
+            for entry in self._planned(batch):
+                if self.stopped:
+                    logging.info(f"Stopping crawl run {self.run_id}, leaving what's left of it to be resumed")
+                    return
+                yield entry
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop is not None and self.stop.is_set()
+
+    def fetched(self, url: str) -> None:
+        self._record(url, state=UrlState.FETCHED)
+
+    def parsed(self, url: str) -> None:
+        self._record(url, state=UrlState.PARSED)
+
+    def stored(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self._record(url, state=UrlState.STORED, reason=None, attempts=0, next_attempt_at=None)
+
+    def failed(self, url: str, reason: BaseException | str) -> None:
+        attempts = self._failed.get(url, (0, None))[0] + 1
+        next_attempt_at = None  # given up
+        if attempts < self.max_attempts:
+            next_attempt_at = self._clock() + min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+        self._record(
+            url,
+            state=UrlState.FAILED,
+            reason=repr(reason) if isinstance(reason, BaseException) else reason,
+            attempts=attempts,
+            next_attempt_at=next_attempt_at,
+        )
+
+    def flush(self) -> None:
+        with self._lock:
+            states, self._pending_states = self._pending_states, {}
+        if states:
+            self.db.record_url_states(self.run_id, states)
+
+    def close(self, completed: bool = True) -> None:
+        """Write all the states recorded, and mark the run as completed, or failed (so that it can be resumed)."""
+        self.flush()
+        self.db.finish_crawl_run(self.run_id, completed=completed)
+
+    def _due_for_retry(self) -> list[str]:
+        now = self._clock()
+        return [
+            url
+            for url, (_, next_attempt_at) in self._failed.items()
+            if next_attempt_at is not None and as_utc(next_attempt_at) <= now
+        ]
+
+    def _planned(self, entries: tuple[SitemapEntry, ...]) -> tuple[SitemapEntry, ...]:
+        for entry in entries:
+            self._record(
+                entry.url, state=UrlState.PENDING, lastmod=entry.lastmod, publication_date=entry.publication_date
+            )
+        self.flush()  # before they are crawled, so they can be resumed
+        return entries
+
+    def _record(self, url: str, **fields: Any) -> None:
+        with self._lock:
+            self._pending_states[url] = self._pending_states.get(url, {}) | fields
+            full = len(self._pending_states) >= self.flush_size
+        if full:
+            self.flush()
@@ -0,0 +1,105 @@
+from functools import cached_property
+
+import lxml.html
+from lxml import etree
+
+from crawler.parser import NewsParser
+
+
+def _has_class(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# Compiled once: the same handful of lookups run against every article
+HEADER_XPATH = etree.XPath(f"(//header[{_has_class('release-header')}])[1]")
+TITLE_XPATH = etree.XPath("(.//h1)[1]")
+PROVIDER_XPATH = etree.XPath("(.//a/strong)[1]")
+DATE_XPATH = etree.XPath(f"(.//p[{_has_class('mb-no')}])[1]")
+CONTENT_XPATH = etree.XPath(f"(//section[{_has_class('release-body')}]//*[{_has_class('col-lg-10')}])[1]")
+METADATA_XPATH = etree.XPath('(//script[@type="application/ld+json"])[1]')
+TEXT_XPATH = etree.XPath("descendant-or-self::text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+PREFORMATTED_XPATH = etree.XPath("boolean(ancestor-or-self::pre or ancestor-or-self::textarea)")
+
+
+class LxmlNewsParser(NewsParser):
+    """
+    `NewsParser` running straight on lxml with precompiled XPath lookups.
+    Skipping the BeautifulSoup tree makes it several times faster and lighter, with the same results.
+    """
+
+    @cached_property
+    def _tree(self) -> lxml.html.HtmlElement | None:
+        html_content = self.html_content
+        if isinstance(html_content, str):
+            html_content = html_content.encode()
+        try:
+            return lxml.html.document_fromstring(html_content)
+        except etree.ParserError:  # empty document
+            return None
+
+    def _parse_document(self) -> None:
+        self._tree
+
+    def _first(self, xpath: etree.XPath, element: lxml.html.HtmlElement | None = None) -> lxml.html.HtmlElement | None:
+        element = self._tree if element is None else element
+        if element is None:
+            return None
+        found = xpath(element)
+        return found[0] if found else None
+
+    @cached_property
+    def _body_header(self) -> lxml.html.HtmlElement | None:
+        return self._first(HEADER_XPATH)
+
+    @property
+    def _body_title(self) -> str | None:
+        if self._body_header is None:
+            return None
+        title_el = self._first(TITLE_XPATH, self._body_header)
+        return _stripped_text(title_el) if title_el is not None else None
+
+    @property
+    def _body_provider(self) -> str | None:
+        if self._body_header is None:
+            return None
+        provider_el = self._first(PROVIDER_XPATH, self._body_header)
+        return _stripped_text(provider_el) if provider_el is not None else None
+
+    @property
+    def _body_date_text(self) -> str | None:
+        if self._body_header is None:
+            return None
+        date_el = self._first(DATE_XPATH, self._body_header)
+        return _stripped_text(date_el) if date_el is not None else None
+
+    @property
+    def _body_content(self) -> str:
+        content_el = self._first(CONTENT_XPATH)
+        return _text(content_el) if content_el is not None else ""
+
+    @property
+    def _metadata_json(self) -> str | None:
+        script_el = self._first(METADATA_XPATH)
+        return script_el.text if script_el is not None else None
+
+
+# BeautifulSoup text semantics, so both parsers extract the very same strings:
+# script/style contents are skipped, and whitespace-only strings collapse to a newline or a space (unless preformatted).
+
+
+def _text(element: lxml.html.HtmlElement) -> str:
+    return "".join(
+        string if string.strip() or _is_preformatted(string) else ("\n" if "\n" in string else " ")
+        for string in TEXT_XPATH(element)
+    )
+
+
+def _stripped_text(element: lxml.html.HtmlElement) -> str:
+    return "".join(string.strip() for string in TEXT_XPATH(element))
+
+
+def _is_preformatted(string: etree._ElementUnicodeResult) -> bool:
+    container = string.getparent()
+    if string.is_tail:
+        container = container.getparent()
+    return container is not None and PREFORMATTED_XPATH(container)
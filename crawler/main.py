@@ -1,45 +1,337 @@
+import argparse
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Self
 
-import requests
-
-from crawler.browser import Browser
-from crawler.parser import NewsParser
-from storage import get_database
+from crawler.aio import AsyncCrawler
+from crawler.browser import Browser, SitemapEntry
+from crawler.cache import HttpCache
+from crawler.daemon import CrawlDaemon, PollInterval
+from crawler.dedup import DuplicateIndex
+from crawler.executor import map_bounded
+from crawler.http import get_http_cache, get_throttle, set_http_cache, set_throttle
+from crawler.index import SeenUrlIndex
+from crawler.ledger import CrawlLedger
+from crawler.lxml_parser import LxmlNewsParser
+from crawler.parser import NewsParser, parse_entry
+from crawler.pipeline import CrawlPipeline
+from crawler.throttle import Throttle
+from crawler.writer import ArticleWriter
+from metrics import serve, write_textfile
+from storage import BulkWriteSummary, get_database
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
 db = get_database()
 
+SINCE_MARGIN = timedelta(minutes=15)  # sitemap dates may lag behind the actual change
+DUPLICATES_WINDOW = timedelta(days=30)  # articles published since then are looked up for duplicates
+
+PARSERS: dict[str, type[NewsParser]] = {"lxml": LxmlNewsParser, "soup": NewsParser}
+
+
+@dataclass
+class CrawlOptions:
+    full: bool = False  # re-crawl articles that are already stored
+    engine: str = "threads"  # threads, async, pipeline or offline
+    parser: str = "lxml"  # one of PARSERS
+    workers: int = 32  # threads engine: fetching threads
+    rate: float = 10.0  # requests per second to each host
+    concurrency: int = 200  # async engine: fetches in flight
+    per_host_limit: int = 50  # async engine: fetches in flight per host
+    fetch_workers: int = 32  # pipeline engine: fetching threads
+    parse_workers: int | None = None  # pipeline engine: parsing processes, default to CPUs
+    since: datetime | None = None  # skip sitemap entries not modified since, default to the last successful crawl
+    cache_dir: Path | None = None  # keep raw responses there, to revalidate them and re-parse them offline
+    cache_max_mb: int = 1024  # evict the least recently used responses over that size
+    duplicates: str = "mark"  # mark, skip or keep articles repeating a recent one under another URL
+    resume: bool = False  # crawl only what the last run left unfinished, if it did not complete
+    metrics_file: Path | None = None  # write the crawler metrics there after each crawl, in the Prometheus format
+
+    @property
+    def parser_class(self) -> type[NewsParser]:
+        return PARSERS[self.parser]
 
-def _parse_and_store(url: str) -> str | None:
+
+def _parse_and_store(
+    entry: SitemapEntry,
+    writer: ArticleWriter,
+    parser_class: type[NewsParser],
+    ledger: CrawlLedger,
+) -> str | None:
     """
-    Parse an article from a URL and store it in the database.
+    Parse an article from a sitemap entry and hand it over to be stored in the database.
     """
     try:
-        article = NewsParser.from_url(url=url).article
-        article_id = db.save_article(article)
-        logging.info(f"Saved article {article.title}")
-        return str(article_id)
-    except (ValueError, requests.HTTPError):
-        logging.exception(f"Failed to parse article at {url}")
+        html_content = NewsParser._get_html(url=entry.url)
+        ledger.fetched(entry.url)
+        article = parse_entry(entry, html_content=html_content, parser_class=parser_class)
+    except Exception as e:  # recorded to be retried by a later run, rather than ending this one
+        logging.exception(f"Failed to parse article at {entry.url}")
+        ledger.failed(entry.url, reason=e)
         return None
 
+    writer.put(article)
+    logging.info(f"Parsed article {article.title}")
+    return article.url
+
+
+def _skip_seen(entries: Iterable[SitemapEntry], seen: SeenUrlIndex | None) -> Generator[SitemapEntry]:
+    if seen is None:
+        yield from entries
+        return
+
+    skipped = 0
+    for entry in entries:
+        if seen.is_new_or_changed(entry):
+            yield entry
+        else:
+            skipped += 1
+    logging.info(f"Skipped {skipped} articles already stored and unchanged")
+
+
+def _crawl_threaded(
+    writer: ArticleWriter, seen: SeenUrlIndex | None, options: CrawlOptions, ledger: CrawlLedger
+) -> int:
+    sitemap_entries = None if ledger.resumed else _skip_seen(Browser.get_news_entries(since=options.since), seen=seen)
+    entries = ledger.plan(sitemap_entries)
+
+    parse_and_store = partial(_parse_and_store, writer=writer, parser_class=options.parser_class, ledger=ledger)
+    return sum(url is not None for url in map_bounded(parse_and_store, entries, max_workers=options.workers))
+
+
+async def _crawl_async(
+    writer: ArticleWriter,
+    seen: SeenUrlIndex | None,
+    options: CrawlOptions,
+    ledger: CrawlLedger,
+) -> int:
+    async with AsyncCrawler(
+        writer=writer,
+        concurrency=options.concurrency,
+        per_host_limit=options.per_host_limit,
+        parser_class=options.parser_class,
+        http_cache=get_http_cache(),
+        ledger=ledger,
+        throttle=get_throttle(),
+    ) as crawler:
+        sitemap_entries = None
+        if not ledger.resumed:
+            sitemap_entries = _skip_seen(await crawler.get_news_entries(since=options.since), seen=seen)
+        return await crawler.crawl(ledger.plan(sitemap_entries))
+
+
+def _crawl_pipeline(
+    writer: ArticleWriter, seen: SeenUrlIndex | None, options: CrawlOptions, ledger: CrawlLedger
+) -> int:
+    sitemap_entries = None if ledger.resumed else _skip_seen(Browser.get_news_entries(since=options.since), seen=seen)
+    pipeline = CrawlPipeline(
+        writer=writer,
+        fetch_workers=options.fetch_workers,
+        parse_workers=options.parse_workers,
+        parser_class=options.parser_class,
+        ledger=ledger,
+    )
+    return pipeline.run(ledger.plan(sitemap_entries))
+
+
+def _crawl_offline(writer: ArticleWriter, seen: SeenUrlIndex | None, options: CrawlOptions, ledger: CrawlLedger) -> int:
+    """Re-parse all articles in the HTTP cache, without fetching anything (e.g. after a parser fix)."""
+    http_cache = get_http_cache()
+    if http_cache is None:
+        raise ValueError("The offline engine re-parses the HTTP cache, set one with --cache-dir")
+
+    parsed = 0
+    for url in http_cache.urls(content_type="text/html"):
+        try:
+            article = options.parser_class.from_file(url=url, filepath=http_cache.path_for(url)).article
+        except ValueError:
+            logging.exception(f"Failed to parse cached article at {url}")
+            continue
+        writer.put(article)
+        parsed += 1
+    return parsed
+
 
-def scrape():
+ENGINES = {"threads": _crawl_threaded, "pipeline": _crawl_pipeline, "offline": _crawl_offline}
+
+
+@dataclass
+class CrawlIndexes:
+    """
+    In-memory indexes a crawl loads from the database: of the articles stored, to skip those that did not change,
+    and of the fingerprints of recent ones, to find duplicates. The writer keeps them up to date, so that a daemon
+    loads them only once.
+    """
+
+    seen: SeenUrlIndex | None = None
+    duplicates: DuplicateIndex | None = None
+
+    @classmethod
+    def load(cls, options: CrawlOptions) -> Self:
+        indexes = cls()
+        if not options.full and options.engine != "offline":
+            indexes.seen = SeenUrlIndex.load(db)
+            logging.info(f"Loaded {len(indexes.seen)} known article URLs")
+        if options.duplicates != "keep":
+            indexes.duplicates = DuplicateIndex.load(db, since=datetime.now(UTC) - DUPLICATES_WINDOW)
+            logging.info(f"Loaded the fingerprints of {len(indexes.duplicates)} recent articles")
+        return indexes
+
+
+def _setup(options: CrawlOptions) -> None:
+    db.ensure_indexes()
+    set_throttle(Throttle(rate=options.rate))
+    if options.cache_dir is not None:
+        set_http_cache(HttpCache(directory=options.cache_dir, max_bytes=options.cache_max_mb * 1024**2))
+
+
+def scrape(
+    options: CrawlOptions | None = None,
+    indexes: CrawlIndexes | None = None,
+    stop: threading.Event | None = None,
+) -> BulkWriteSummary:
+    """
+    Crawl the sitemap and store its articles.
+    Unless `full` is set, articles already stored and not modified since are not fetched again,
+    and neither are sitemaps and entries not modified since the last successful crawl.
+    Once `stop` is set, the articles in flight are stored but no other is crawled: the run is left to be resumed.
+    """
+    options = options or CrawlOptions()
+    started_at = datetime.now(UTC)
     logging.info("Starting scrape cycle")
-    urls = Browser.get_news_links()
+    if indexes is None:
+        _setup(options)
+        indexes = CrawlIndexes.load(options)
+    if indexes.seen is not None:
+        last_crawl_at = db.get_last_crawl_at()
+        if options.since is None and last_crawl_at is not None:
+            options = replace(options, since=last_crawl_at - SINCE_MARGIN)
+            logging.info(f"Skipping sitemap entries not modified since {options.since}")
+
+    ledger = CrawlLedger.resume(db, stop=stop) if options.resume else None
+    if ledger is not None:
+        logging.info(f"Resuming crawl run {ledger.run_id}")
+    else:
+        ledger = CrawlLedger.start(db, engine=options.engine, stop=stop)
+
+    try:
+        with ArticleWriter(
+            db=db,
+            duplicates=indexes.duplicates,
+            skip_duplicates=options.duplicates == "skip",
+            ledger=ledger,
+            seen=indexes.seen,
+        ) as writer:
+            if options.engine == "async":
+                parsed = asyncio.run(_crawl_async(writer, indexes.seen, options, ledger))
+            else:
+                parsed = ENGINES[options.engine](writer, indexes.seen, options, ledger)
+    except BaseException:
+        ledger.close(completed=False)
+        raise
+    stopped = ledger.stopped
+    ledger.close(completed=not stopped)
 
-    pool = ThreadPoolExecutor()
+    # offline, nothing was fetched; resumed or stopped, not everything: the next crawl still starts from the last one
+    if options.engine != "offline" and not ledger.resumed and not stopped:
+        db.set_last_crawl_at(started_at)
+    summary = writer.summary
+    if summary.inserted or summary.updated:
+        db.bump_generation()
+    logging.info(
+        f"Scrape cycle {'stopped' if stopped else 'complete'}, parsed {parsed} articles: "
+        f"{summary.inserted} new, {summary.updated} updated, {summary.unchanged} unchanged, {writer.failed} failed, "
+        f"{writer.duplicated} duplicates"
+    )
+    if options.metrics_file is not None:
+        write_textfile(options.metrics_file)
+    return summary
+
+
+def run_daemon(options: CrawlOptions, interval: PollInterval) -> None:
+    """
+    Poll the sitemap for new and changed articles until SIGTERM, resuming the last run first if it did not complete.
+    """
+    _setup(options)
+    indexes = CrawlIndexes.load(options)
+    resume = True
 
-    article_ids = []
-    for article_id in pool.map(_parse_and_store, urls):
-        if article_id is not None:
-            article_ids.append(article_id)
+    def poll(stop: threading.Event) -> int:
+        nonlocal resume
+        summary = scrape(replace(options, resume=resume), indexes=indexes, stop=stop)
+        resume = False
+        return summary.inserted
 
-    logging.info(f"Scrape cycle complete, stored {len(article_ids)} articles")
+    daemon = CrawlDaemon(poll=poll, interval=interval)
+    daemon.handle_signals()
+    daemon.run()
 
 
 if __name__ == "__main__":
-    scrape()
+    arg_parser = argparse.ArgumentParser(description="Crawl PR Newswire articles into the database.")
+    arg_parser.add_argument("--full", action="store_true", help="re-crawl articles that are already stored")
+    arg_parser.add_argument(
+        "--daemon", action="store_true", help="keep polling the sitemap for new articles, until SIGTERM"
+    )
+    arg_parser.add_argument(
+        "--min-interval", type=float, default=30.0, help="daemon: shortest wait between polls, in seconds"
+    )
+    arg_parser.add_argument(
+        "--max-interval", type=float, default=900.0, help="daemon: longest wait between polls, in seconds"
+    )
+    arg_parser.add_argument(
+        "--resume", action="store_true", help="resume the last crawl run if it did not complete, instead of a new one"
+    )
+    arg_parser.add_argument("--engine", choices=["threads", "async", "pipeline", "offline"], default="threads")
+    arg_parser.add_argument("--parser", choices=list(PARSERS), default="lxml", help="HTML parser engine")
+    arg_parser.add_argument("--workers", type=int, default=32, help="fetching threads (threads engine)")
+    arg_parser.add_argument("--rate", type=float, default=10.0, help="requests per second to each host")
+    arg_parser.add_argument("--concurrency", type=int, default=200, help="fetches in flight (async engine)")
+    arg_parser.add_argument("--per-host-limit", type=int, default=50, help="fetches in flight per host (async engine)")
+    arg_parser.add_argument("--fetch-workers", type=int, default=32, help="fetching threads (pipeline engine)")
+    arg_parser.add_argument("--parse-workers", type=int, help="parsing processes (pipeline engine, default: CPUs)")
+    arg_parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="skip sitemap entries not modified since (default: last crawl)"
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=os.getenv("CRAWLER_CACHE_DIR"),
+        help="cache raw responses there, revalidating them on the next crawls (default: $CRAWLER_CACHE_DIR)",
+    )
+    arg_parser.add_argument("--cache-max-mb", type=int, default=1024, help="HTTP cache size cap")
+    arg_parser.add_argument(
+        "--duplicates",
+        choices=["mark", "skip", "keep"],
+        default="mark",
+        help="what to do with articles repeating a recent one under another URL: store them marked, or not at all",
+    )
+    arg_parser.add_argument(
+        "--metrics-port", type=int, help="serve the crawler metrics on that port, at /metrics, for Prometheus to scrape"
+    )
+    arg_parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="write the crawler metrics to that file after each crawl, e.g. for node_exporter's textfile collector",
+    )
+    args = vars(arg_parser.parse_args())
+    if (metrics_port := args.pop("metrics_port")) is not None:
+        serve(metrics_port)
+    daemon = args.pop("daemon")
+    interval = PollInterval(minimum=args.pop("min_interval"), maximum=args.pop("max_interval"))
+    options = CrawlOptions(**args)
+    if not daemon:
+        scrape(options)
+    elif options.full or options.engine == "offline":
+        arg_parser.error("--daemon only crawls what's new, it can't be --full nor use the offline engine")
+    else:
+        run_daemon(options, interval=interval)
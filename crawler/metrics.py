@@ -0,0 +1,71 @@
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
+from metrics import REGISTRY
+
+FETCH_SECONDS = REGISTRY.histogram(
+    "crawler_fetch_duration_seconds",
+    "Time to fetch sitemaps (streamed and parsed along) and articles, retries included.",
+    labels=["kind"],
+)
+FETCHES = REGISTRY.counter(
+    "crawler_fetches_total",
+    "Sitemaps and articles fetched, by outcome: ok, or why they failed.",
+    labels=["kind", "outcome"],
+)
+FETCH_RETRIES = REGISTRY.counter(
+    "crawler_fetch_retries_total",
+    "Requests retried by the throttle, by reason.",
+    labels=["reason"],
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "crawler_parse_stage_duration_seconds",
+    "Time spent in each stage of parsing articles: building the document, then extracting each field.",
+    labels=["parser", "stage"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+PARSE_FAILURES = REGISTRY.counter(
+    "crawler_parse_failures_total",
+    "Articles that could not be parsed, by reason.",
+    labels=["parser", "reason"],
+)
+WRITE_BATCH_SECONDS = REGISTRY.histogram(
+    "crawler_write_batch_duration_seconds",
+    "Time to store batches of articles.",
+)
+WRITE_BATCH_SIZE = REGISTRY.histogram(
+    "crawler_write_batch_size",
+    "Articles per batch stored.",
+    buckets=(1, 10, 50, 100, 250, 500, 1000),
+)
+ARTICLES_WRITTEN = REGISTRY.counter(
+    "crawler_articles_written_total",
+    "Articles stored, by result: inserted, updated or unchanged; or skipped, as duplicates.",
+    labels=["result"],
+)
+WRITE_FAILURES = REGISTRY.counter(
+    "crawler_write_failures_total",
+    "Articles that could not be stored, by reason.",
+    labels=["reason"],
+)
+
+
+def failure_reason(error: BaseException) -> str:
+    """Short label for why something failed: the HTTP status of error responses, the type of the error otherwise."""
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return f"http_{status_code}" if status_code is not None else type(error).__name__
+
+
+@contextmanager
+def observe_fetch(kind: str) -> Generator[None]:
+    """Time a fetch of a `kind` of resource (sitemap or article), and count it along with its outcome."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        FETCHES.inc(kind=kind, outcome=failure_reason(e))
+        raise
+    finally:
+        FETCH_SECONDS.observe(time.perf_counter() - started_at, kind=kind)
+    FETCHES.inc(kind=kind, outcome="ok")
@@ -1,29 +1,30 @@
 import json
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from functools import cached_property
 from pathlib import Path
 from typing import Self
 
-import requests
 from bs4 import BeautifulSoup
 from bs4.element import PageElement
-from dateutil import parser
 
+from crawler.browser import SitemapEntry
+from crawler.dates import parse_release_date
+from crawler.http import fetch
+from crawler.metrics import PARSE_FAILURES, PARSE_SECONDS, failure_reason, observe_fetch
 from models.article import Article
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
 SITEMAP_URL = "https://www.prnewswire.com/sitemap-news.xml"
-TZINFOS = {"ET": timezone(timedelta(hours=-4))}  # TODO: extend to more timezones
 
 
 @dataclass
 class NewsParser:
     url: str
-    html_content: str | None = None
+    html_content: str | bytes | None = None
 
     @classmethod
     def from_url(cls, url: str) -> Self:
@@ -32,9 +33,8 @@ class NewsParser:
 
     @classmethod
     def from_file(cls, url: str, filepath: Path) -> Self:
-        with filepath.open() as f:
-            html_content = f.read()
-        return cls(url=url, html_content=html_content)
+        # raw bytes, just as fetched, so re-parsing a cached response gives the very same article
+        return cls(url=url, html_content=filepath.read_bytes())
 
     @cached_property
     def _soup(self) -> BeautifulSoup:
@@ -42,14 +42,27 @@ class NewsParser:
 
     @cached_property
     def article(self) -> Article:
-        title = self.title
-        date = self.date
-        provider = self.provider
+        parser = type(self).__name__
+        try:
+            with PARSE_SECONDS.time(parser=parser, stage="document"):
+                self._parse_document()
+            with PARSE_SECONDS.time(parser=parser, stage="title"):
+                title = self.title
+            with PARSE_SECONDS.time(parser=parser, stage="date"):
+                date = self.date
+            with PARSE_SECONDS.time(parser=parser, stage="provider"):
+                provider = self.provider
+        except Exception as e:
+            PARSE_FAILURES.inc(parser=parser, reason=failure_reason(e))
+            raise
 
         if not all([title, date, provider]):
+            PARSE_FAILURES.inc(parser=parser, reason="missing_fields")
             raise ValueError(f"Missing required fields: title={title}, date={date}, provider={provider}")
 
-        return Article(url=self.url, title=title, date=date, news_provided_by=provider, content=self.content)
+        with PARSE_SECONDS.time(parser=parser, stage="content"):
+            content = self.content
+        return Article(url=self.url, title=title, date=date, news_provided_by=provider, content=content)
 
     @property
     def title(self) -> str | None:
@@ -75,11 +88,14 @@ class NewsParser:
         return self._body_content.strip() if self._body_content else ""
 
     @classmethod
-    def _get_html(cls, url: str) -> str:
-        """Helper to fetch raw HTML content from a URL."""
-        resp = requests.get(url)
-        resp.raise_for_status()
-        return resp.content
+    def _get_html(cls, url: str) -> bytes:
+        """Helper to fetch the raw HTML bytes of a URL, left for the parser to decode as their charset says."""
+        with observe_fetch("article"):
+            return fetch(url)
+
+    def _parse_document(self) -> None:
+        """Build the tree the fields are extracted from, up front: so that its cost is timed on its own."""
+        self._soup
 
     # --------------------
     # BODY EXTRACTION
@@ -107,17 +123,20 @@ class NewsParser:
 
     @property
     def _body_date(self) -> datetime | None:
+        date_str = self._body_date_text
+        if not date_str:
+            return None
+
+        return parse_release_date(date_str)
+
+    @property
+    def _body_date_text(self) -> str | None:
         if not self._body_header:
             return None
         date_el = self._body_header.find("p", class_="mb-no")
         if not date_el:
             return None
-
-        date_str = date_el.get_text(strip=True)
-        if not date_str:
-            return None
-
-        return parser.parse(date_str, tzinfos=TZINFOS)
+        return date_el.get_text(strip=True)
 
     @property
     def _body_content(self) -> str:
@@ -134,15 +153,22 @@ class NewsParser:
 
     @cached_property
     def _metadata(self) -> dict:
-        script_tag = self._soup.find("script", type="application/ld+json")
-        if not (script_tag and hasattr(script_tag, "string") and script_tag.string):
+        metadata_json = self._metadata_json
+        if not metadata_json:
             return {}
         try:
-            return json.loads(script_tag.string)
+            return json.loads(metadata_json)
         except (json.JSONDecodeError, KeyError):
             logging.warning("Could not parse date from JSON script.")
             return {}
 
+    @property
+    def _metadata_json(self) -> str | None:
+        script_tag = self._soup.find("script", type="application/ld+json")
+        if not (script_tag and hasattr(script_tag, "string") and script_tag.string):
+            return None
+        return script_tag.string
+
     @property
     def _metadata_date_published(self) -> datetime | None:
         date_str = self._metadata.get("datePublished")
@@ -164,3 +190,13 @@ class NewsParser:
     @property
     def _metadata_publisher(self) -> str | None:
         return self._metadata.get("publisher", {}).get("name")
+
+
+def parse_entry(
+    entry: SitemapEntry,
+    html_content: str | bytes,
+    parser_class: type[NewsParser] = NewsParser,
+) -> Article:
+    """Parse the article fetched for a sitemap entry; a plain function, so it can be shipped to worker processes."""
+    article = parser_class(url=entry.url, html_content=html_content).article
+    return article.model_copy(update={"last_modified": entry.modified_at})
@@ -0,0 +1,175 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from crawler.browser import SitemapEntry
+from crawler.ledger import CrawlLedger
+from crawler.parser import NewsParser, parse_entry
+from crawler.writer import ArticleWriter
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+_DONE = object()
+
+
+@dataclass
+class StageCounter:
+    """Thread-safe throughput counter of a pipeline stage."""
+
+    name: str
+    processed: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def success(self) -> None:
+        with self._lock:
+            self.processed += 1
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failed += 1
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second since the stage started."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.processed} ok, {self.failed} failed, {self.throughput:.1f}/s"
+
+
+class CrawlPipeline:
+    """
+    Crawler split in stages connected by bounded queues, so each one is sized for its own bottleneck:
+
+    - fetch: `fetch_workers` threads downloading raw HTML (I/O-bound);
+    - parse: `parse_workers` processes running `NewsParser` (CPU-bound, so it scales with cores, not the GIL);
+    - handover: articles parsed are put on the `ArticleWriter` queue, to be stored in bulk.
+
+    A full queue blocks the stage feeding it, so a slow stage throttles the ones upstream instead of buffering.
+    The writer keeps count of the articles actually stored, in its own `summary` and `failed`;
+    if it fails to take articles at all, the pipeline stops and `run` raises its error.
+    """
+
+    def __init__(
+        self,
+        writer: ArticleWriter,
+        fetch_workers: int = 32,
+        parse_workers: int | None = None,
+        queue_size: int = 256,
+        parser_class: type[NewsParser] = NewsParser,
+        ledger: CrawlLedger | None = None,
+    ) -> None:
+        self.writer = writer
+        self.parser_class = parser_class
+        self.ledger = ledger
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.counters = {name: StageCounter(name=name) for name in ("fetch", "parse", "handover")}
+        self._stopped = threading.Event()
+        self._error: Exception | None = None
+        self._lock = threading.Lock()
+
+    def run(self, entries: Iterable[SitemapEntry]) -> int:
+        """
+        Crawl all `entries`, returning how many articles were handed over to the writer.
+        Raises the writer's error if it stopped taking them: the entries left are not crawled, to be resumed later.
+        """
+        fetch_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        parse_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._stopped.clear()
+        self._error = None
+
+        with ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        ) as parse_pool:
+            fetchers = self._start_workers(self.fetch_workers, self._fetch, fetch_queue, parse_queue)
+            parsers = self._start_workers(self.parse_workers, self._parse, parse_queue, parse_pool)
+
+            try:
+                for entry in entries:
+                    if self._stopped.is_set():
+                        break
+                    fetch_queue.put(entry)
+            finally:  # e.g. failing to read the sitemap: the workers still finish with what's queued, and stop
+                self._stop_workers(fetchers, fetch_queue)
+                self._stop_workers(parsers, parse_queue)
+
+        for counter in self.counters.values():
+            logging.info(f"Pipeline stage {counter}")
+        if self._error is not None:
+            raise self._error
+        return self.counters["handover"].processed
+
+    @staticmethod
+    def _start_workers(count: int, target: Callable, *args) -> list[threading.Thread]:
+        workers = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    @staticmethod
+    def _stop_workers(workers: list[threading.Thread], inbox: queue.Queue) -> None:
+        for _ in workers:
+            inbox.put(_DONE)
+        for worker in workers:
+            worker.join()
+
+    def _fetch(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while (entry := inbox.get()) is not _DONE:
+            if self._stopped.is_set():  # only draining the queue, so that nothing upstream blocks on it
+                continue
+            try:
+                html_content = NewsParser._get_html(url=entry.url)
+            except Exception as e:  # a worker dying would stall the whole stage
+                self.counters["fetch"].failure()
+                logging.exception(f"Failed to fetch article at {entry.url}")
+                if self.ledger is not None:
+                    self.ledger.failed(entry.url, reason=e)
+                continue
+            self.counters["fetch"].success()
+            if self.ledger is not None:
+                self.ledger.fetched(entry.url)
+            outbox.put((entry, html_content))
+
+    def _parse(self, inbox: queue.Queue, parse_pool: ProcessPoolExecutor) -> None:
+        # each of these threads keeps exactly one article in flight on the process pool
+        while (item := inbox.get()) is not _DONE:
+            if self._stopped.is_set():
+                continue
+            entry, html_content = item
+            try:
+                article = parse_pool.submit(parse_entry, entry, html_content, self.parser_class).result()
+            except Exception as e:  # a worker dying would stall the whole stage
+                self.counters["parse"].failure()
+                logging.exception(f"Failed to parse article at {entry.url}")
+                if self.ledger is not None:
+                    self.ledger.failed(entry.url, reason=e)
+                continue
+            self.counters["parse"].success()
+
+            try:
+                self.writer.put(article)
+            except Exception as e:  # e.g. the writer stopped: nothing parsed from now on could be stored
+                self.counters["handover"].failure()
+                logging.exception(f"Failed to hand over article at {entry.url}, stopping the pipeline")
+                self._stop(e)
+                continue
+            self.counters["handover"].success()
+
+    def _stop(self, error: Exception) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._stopped.set()
@@ -0,0 +1,98 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local HTTP server standing in for PR Newswire, serving fixed `routes` and tracking concurrent requests.
+    Bodies are served with an ETag, and requests revalidating the current one get a 304.
+    With a `capacity`, requests over that many in flight get a 429, with `retry_after` if set.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        routes: dict[str, bytes],
+        delay: float = 0.0,
+        capacity: int | None = None,
+        retry_after: str | None = None,
+    ):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.routes = routes
+        self.delay = delay
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.not_modified = 0
+        self.throttled = 0
+        self.requests: list[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> None:
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server: StandInServer = self.server
+        with server._lock:
+            server.requests.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            over_capacity = server.capacity is not None and server.in_flight > server.capacity
+            server.throttled += over_capacity
+        time.sleep(server.delay)
+        with server._lock:
+            server.in_flight -= 1
+
+        if over_capacity:
+            self.send_response(429)
+            if server.retry_after is not None:
+                self.send_header("Retry-After", server.retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = server.routes.get(self.path)
+        etag = f'"{hashlib.sha256(body).hexdigest()}"' if body is not None else None
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            with server._lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200 if body is not None else 404)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+    def log_message(self, *args):
+        pass
+
+
+class CollectingWriter:
+    """Stand-in for `ArticleWriter`, keeping the articles in memory."""
+
+    def __init__(self):
+        self.articles = []
+
+    def put(self, article):
+        self.articles.append(article)
@@ -0,0 +1,165 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from datetime import UTC, datetime
+from pathlib import Path
+
+from crawler.aio import AsyncCrawler
+from crawler.browser import SitemapEntry
+from crawler.cache import HttpCache
+from crawler.tests.server import CollectingWriter, StandInServer
+from crawler.throttle import Throttle
+
+
+def load_fixture(filename):
+    return (Path(__file__).parent / "data" / filename).read_bytes()
+
+
+class TestAsyncCrawler(unittest.IsolatedAsyncioTestCase):
+    def start_server(self, routes: dict[str, bytes], delay: float = 0.0, **kwargs) -> StandInServer:
+        server = StandInServer(routes=routes, delay=delay, **kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    async def test_get_news_entries(self):
+        server = self.start_server(routes={})
+        server.routes.update(
+            {
+                "/sitemap-news.xml": (
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f"<sitemap><loc>{server.base_url}/sitemap1.xml</loc></sitemap>"
+                    f"<sitemap><loc>{server.base_url}/sitemap2.xml</loc></sitemap>"
+                    "</sitemapindex>"
+                ).encode(),
+                "/sitemap1.xml": load_fixture("sitemap1.xml"),
+                "/sitemap2.xml": load_fixture("sitemap2.xml"),
+            }
+        )
+
+        async with AsyncCrawler(writer=CollectingWriter()) as crawler:
+            entries = await crawler.get_news_entries(sitemap_url=f"{server.base_url}/sitemap-news.xml")
+
+        self.assertEqual(
+            [SitemapEntry(url="http://article1.com"), SitemapEntry(url="http://article2.com")],
+            entries,
+        )
+
+    async def test_get_news_entries_since(self):
+        server = self.start_server(routes={})
+        server.routes.update(
+            {
+                "/sitemap-news.xml": (
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f"<sitemap><loc>{server.base_url}/old.xml</loc><lastmod>2023-12-01T00:00:00Z</lastmod></sitemap>"
+                    f"<sitemap><loc>{server.base_url}/recent.xml</loc><lastmod>2024-01-02T00:00:00Z</lastmod></sitemap>"
+                    "</sitemapindex>"
+                ).encode(),
+                "/recent.xml": load_fixture("sitemap_news_articles.xml"),
+            }
+        )
+
+        async with AsyncCrawler(writer=CollectingWriter()) as crawler:
+            entries = await crawler.get_news_entries(
+                sitemap_url=f"{server.base_url}/sitemap-news.xml",
+                since=datetime(2024, 1, 1, 17, 0, tzinfo=UTC),
+            )
+
+        self.assertEqual(["/sitemap-news.xml", "/recent.xml"], server.requests)
+        self.assertEqual(
+            [
+                "https://www.prnewswire.com/news-releases/article-1.html",
+                "https://www.prnewswire.com/news-releases/article-3.html",
+            ],
+            [entry.url for entry in entries],
+        )
+
+    async def test_crawl(self):
+        server = self.start_server(
+            routes={
+                "/article-1.html": load_fixture("sample_001.html"),
+                "/article-2.html": load_fixture("sample_002.html"),
+            }
+        )
+        entries = [
+            SitemapEntry(url=f"{server.base_url}/article-1.html"),
+            SitemapEntry(url=f"{server.base_url}/article-2.html"),
+            SitemapEntry(url=f"{server.base_url}/missing.html"),
+        ]
+        writer = CollectingWriter()
+
+        async with AsyncCrawler(writer=writer) as crawler:
+            parsed = await crawler.crawl(entries)
+
+        self.assertEqual(2, parsed)
+        self.assertEqual(
+            {"Workday Inc.", "Whataburger"},
+            {article.news_provided_by for article in writer.articles},
+        )
+
+    async def test_crawl_plans_off_the_loop(self):
+        server = self.start_server(routes={"/article-1.html": load_fixture("sample_001.html")})
+        threads = []
+
+        def planned():  # as `CrawlLedger.plan`, which reads and writes MongoDB
+            threads.append(threading.get_ident())
+            yield SitemapEntry(url=f"{server.base_url}/article-1.html")
+
+        async with AsyncCrawler(writer=CollectingWriter()) as crawler:
+            self.assertEqual(1, await crawler.crawl(planned()))
+
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_crawl_revalidates_cached(self):
+        server = self.start_server(routes={"/article-1.html": load_fixture("sample_001.html")})
+        entries = [SitemapEntry(url=f"{server.base_url}/article-1.html")]
+        http_cache = HttpCache(directory=Path(self.enterContext(tempfile.TemporaryDirectory())))
+        self.addCleanup(http_cache.close)
+        writer = CollectingWriter()
+
+        for _ in range(2):
+            async with AsyncCrawler(writer=writer, http_cache=http_cache) as crawler:
+                await crawler.crawl(entries)
+
+        self.assertEqual(1, server.not_modified)
+        self.assertEqual(2, len(writer.articles))
+        self.assertEqual(writer.articles[0], writer.articles[1])
+
+    async def test_crawl_per_host_limit(self):
+        server = self.start_server(routes={"/article.html": b"<html></html>"}, delay=0.05)
+        entries = [SitemapEntry(url=f"{server.base_url}/article.html") for _ in range(20)]
+
+        async with AsyncCrawler(writer=CollectingWriter(), concurrency=20, per_host_limit=4) as crawler:
+            parsed = await crawler.crawl(entries)
+
+        self.assertEqual(0, parsed)  # blank pages are not articles
+        self.assertEqual(20, len(server.requests))
+        self.assertLessEqual(server.max_in_flight, 4)
+        self.assertGreater(server.max_in_flight, 1)
+
+    async def test_crawl_throttled(self):
+        server = self.start_server(
+            routes={"/article-1.html": load_fixture("sample_001.html")}, delay=0.02, capacity=2, retry_after="0"
+        )
+        entries = [SitemapEntry(url=f"{server.base_url}/article-1.html") for _ in range(12)]
+        throttle = Throttle(rate=1000, max_retries=10)
+
+        async with AsyncCrawler(writer=CollectingWriter(), per_host_limit=6, throttle=throttle) as crawler:
+            parsed = await crawler.crawl(entries)
+
+        self.assertEqual(12, parsed)  # no article lost
+        self.assertGreater(server.throttled, 0)
+        self.assertEqual(server.throttled, throttle.retries)
+
+    async def test_crawl_writer_failing(self):
+        server = self.start_server(routes={"/article-1.html": load_fixture("sample_001.html")})
+        entries = [SitemapEntry(url=f"{server.base_url}/article-1.html") for _ in range(20)]
+
+        class FailingWriter:
+            def put(self, article):
+                raise RuntimeError("The article writer stopped, articles are no longer stored")
+
+        async with AsyncCrawler(writer=FailingWriter(), concurrency=2) as crawler:
+            with self.assertRaisesRegex(RuntimeError, "writer stopped"):
+                await asyncio.wait_for(crawler.crawl(entries), timeout=10)
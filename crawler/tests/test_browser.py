@@ -1,15 +1,31 @@
 import unittest
+from datetime import UTC, datetime, timedelta, timezone
 from pathlib import Path
 
 import responses
 
-from crawler.browser import SITEMAP_URL, Browser
+from crawler.browser import SITEMAP_URL, Browser, SitemapEntry
 
 
 def load_fixture(filename):
     return (Path(__file__).parent / "data" / filename).read_text()
 
 
+class TestSitemapEntry(unittest.TestCase):
+    def test_is_modified_since(self):
+        since = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+        self.assertTrue(SitemapEntry(url="http://article1.com").is_modified_since(since))
+        self.assertTrue(SitemapEntry(url="http://article1.com", lastmod=since).is_modified_since(None))
+        self.assertTrue(SitemapEntry(url="http://article1.com", lastmod=since).is_modified_since(since))
+        self.assertFalse(
+            SitemapEntry(url="http://article1.com", lastmod=since - timedelta(seconds=1)).is_modified_since(since)
+        )
+        self.assertFalse(  # naive dates are UTC
+            SitemapEntry(url="http://article1.com", lastmod=datetime(2024, 1, 1, 11, 0)).is_modified_since(since)  # noqa: DTZ001
+        )
+
+
 class TestBrowser(unittest.TestCase):
     @responses.activate
     def test_get_sitemap_urls(self):
@@ -76,6 +92,34 @@ class TestBrowser(unittest.TestCase):
             ],
         )
 
+    @responses.activate
+    def test_extract_article_entries(self):
+        sitemap_content = load_fixture("sitemap_news_articles.xml")
+        child_sitemap_url = "http://www.example.com/sitemap1.xml"
+        responses.add(responses.GET, child_sitemap_url, body=sitemap_content, status=200)
+
+        entries = Browser._extract_article_entries(child_sitemap_url)
+
+        eastern = timezone(timedelta(hours=-5))
+        self.assertEqual(
+            entries,
+            [
+                SitemapEntry(
+                    url="https://www.prnewswire.com/news-releases/article-1.html",
+                    lastmod=datetime(2024, 1, 2, 10, 30, tzinfo=UTC),
+                    publication_date=datetime(2024, 1, 1, 9, 0, tzinfo=eastern),
+                ),
+                SitemapEntry(
+                    url="https://www.prnewswire.com/news-releases/article-2.html",
+                    publication_date=datetime(2024, 1, 1, 11, 0, tzinfo=eastern),
+                ),
+                SitemapEntry(url="https://www.prnewswire.com/news-releases/article-3.html"),
+            ],
+        )
+        self.assertEqual(entries[0].modified_at, datetime(2024, 1, 2, 10, 30, tzinfo=UTC))
+        self.assertEqual(entries[1].modified_at, datetime(2024, 1, 1, 11, 0, tzinfo=eastern))
+        self.assertIsNone(entries[2].modified_at)
+
     @responses.activate
     def test_get_news_links(self):
         sitemap_index_content = load_fixture("sitemap_index.xml")
@@ -99,11 +143,37 @@ class TestBrowser(unittest.TestCase):
         links = list(Browser.get_news_links())
 
         self.assertEqual(len(responses.calls), 3)
-        self.assertEqual(
+        self.assertCountEqual(  # child sitemaps are yielded as they're fetched
             links,
             ["http://article1.com", "http://article2.com"],
         )
 
+    @responses.activate
+    def test_get_news_entries_since(self):
+        sitemap_index_content = load_fixture("sitemap_index_with_lastmod.xml")
+        responses.add(responses.GET, SITEMAP_URL, body=sitemap_index_content, status=200)
+        for child_sitemap in ("sitemap-recent.xml", "sitemap-undated.xml"):
+            responses.add(
+                responses.GET,
+                f"http://www.example.com/{child_sitemap}",
+                body=load_fixture("sitemap_news_articles.xml"),
+                status=200,
+            )
+
+        since = datetime(2024, 1, 1, 17, 0, tzinfo=UTC)
+        entries = list(Browser.get_news_entries(since=since))
+
+        self.assertEqual(3, len(responses.calls))  # the old child sitemap is never fetched
+        self.assertEqual(
+            [
+                "https://www.prnewswire.com/news-releases/article-1.html",  # modified after
+                # article-2 was published before
+                "https://www.prnewswire.com/news-releases/article-3.html",  # no date
+            ]
+            * 2,
+            [entry.url for entry in entries],
+        )
+
     @responses.activate
     def test_get_news_links_with_empty_sitemap_url(self):
         sitemap_index_content = load_fixture("sitemap_index_with_empty_loc.xml")
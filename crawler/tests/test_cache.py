@@ -0,0 +1,168 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import requests
+import responses
+
+from crawler.cache import TEMPORARY_FILE_MAX_AGE, HttpCache
+from crawler.http import fetch, set_http_cache
+from crawler.lxml_parser import LxmlNewsParser
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.cache = HttpCache(directory=self.directory, max_bytes=10)
+        self.addCleanup(self.cache.close)
+
+    def test_store_and_load(self):
+        self.assertIsNone(self.cache.load("http://article1.com"))
+        self.assertEqual({}, self.cache.validators("http://article1.com"))
+
+        self.cache.store(
+            "http://article1.com",
+            content=b"<html>",
+            etag='"v1"',
+            last_modified="Mon, 01 Jan 2024 12:00:00 GMT",
+            content_type="text/html; charset=utf-8",
+        )
+
+        self.assertEqual(b"<html>", self.cache.load("http://article1.com"))
+        self.assertEqual(
+            {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 12:00:00 GMT"},
+            self.cache.validators("http://article1.com"),
+        )
+        self.assertEqual(["http://article1.com"], self.cache.urls(content_type="text/html"))
+        self.assertEqual([], self.cache.urls(content_type="application/xml"))
+
+    def test_content_addressed(self):
+        first_path = self.cache.store("http://article1.com", content=b"same")
+        second_path = self.cache.store("http://article2.com", content=b"same")
+
+        self.assertEqual(first_path, second_path)
+        self.assertEqual(4, self.cache.size)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.store("http://article1.com", content=b"1111")
+        self.cache.store("http://article2.com", content=b"2222")
+        self.cache.load("http://article1.com")
+
+        self.cache.store("http://article3.com", content=b"3333")
+
+        self.assertEqual(["http://article1.com", "http://article3.com"], self.cache.urls())
+        self.assertEqual(8, self.cache.size)
+        self.assertEqual(2, len(list((self.directory / "objects").glob("*/*"))))
+
+    def test_replaced_body_removed(self):
+        for version in range(50):
+            self.cache.store("http://article1.com", content=f"v{version:03}".encode())
+
+        self.assertEqual(b"v049", self.cache.load("http://article1.com"))
+        self.assertEqual(4, self.cache.size)
+        self.assertEqual(1, len(list((self.directory / "objects").glob("*/*"))))
+
+    def test_shared_body_kept(self):
+        self.cache.store("http://article1.com", content=b"same")
+        self.cache.store("http://article2.com", content=b"same")
+
+        self.cache.store("http://article1.com", content=b"new")
+
+        self.assertEqual(b"same", self.cache.load("http://article2.com"))
+        self.assertEqual(7, self.cache.size)
+
+    def test_orphans_removed_on_open(self):
+        self.cache.store("http://article1.com", content=b"<html>")
+        orphan = self.directory / "objects" / "ab" / "ab0123"
+        orphan.parent.mkdir()
+        orphan.write_bytes(b"left behind")
+
+        reopened_cache = HttpCache(directory=self.directory, max_bytes=10)
+        self.addCleanup(reopened_cache.close)
+
+        self.assertFalse(orphan.exists())
+        self.assertEqual(6, reopened_cache.size)
+
+    def test_stale_temporary_files_removed_on_open(self):
+        stale, fresh = self.directory / "objects" / "ab" / "tmpstale", self.directory / "objects" / "ab" / "tmpfresh"
+        stale.parent.mkdir()
+        stale.write_bytes(b"partial")
+        fresh.write_bytes(b"partial")
+        os.utime(stale, (time.time() - TEMPORARY_FILE_MAX_AGE - 1,) * 2)
+
+        reopened_cache = HttpCache(directory=self.directory, max_bytes=10)
+        self.addCleanup(reopened_cache.close)
+
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+
+    def test_persistent(self):
+        self.cache.store("http://article1.com", content=b"<html>", etag='"v1"')
+
+        reopened_cache = HttpCache(directory=self.directory)
+        self.addCleanup(reopened_cache.close)
+
+        self.assertEqual(b"<html>", reopened_cache.load("http://article1.com"))
+
+    def test_reparse_offline(self):
+        html_content = (Path(__file__).parent / "data" / "sample_001.html").read_bytes()
+        self.cache.max_bytes = len(html_content)
+        self.cache.store("http://article1.com", content=html_content, content_type="text/html")
+
+        parser = LxmlNewsParser.from_file(
+            url="http://article1.com", filepath=self.cache.path_for("http://article1.com")
+        )
+
+        self.assertEqual(LxmlNewsParser(url="http://article1.com", html_content=html_content).article, parser.article)
+
+
+class TestConditionalFetch(unittest.TestCase):
+    url = "http://www.test.com/article1.html"
+
+    def setUp(self):
+        self.cache = HttpCache(directory=Path(self.enterContext(tempfile.TemporaryDirectory())))
+        self.addCleanup(self.cache.close)
+        set_http_cache(self.cache)
+        self.addCleanup(set_http_cache, None)
+
+    @responses.activate
+    def test_not_modified_served_from_cache(self):
+        responses.add(responses.GET, self.url, body=b"<html>", headers={"ETag": '"v1"'}, status=200)
+        responses.add(responses.GET, self.url, status=304)
+
+        self.assertEqual(b"<html>", fetch(self.url))
+        self.assertEqual(b"<html>", fetch(self.url))
+
+        self.assertNotIn("If-None-Match", responses.calls[0].request.headers)
+        self.assertEqual('"v1"', responses.calls[1].request.headers["If-None-Match"])
+
+    @responses.activate
+    def test_modified_replaces_cache(self):
+        responses.add(responses.GET, self.url, body=b"<html>", headers={"ETag": '"v1"'}, status=200)
+        responses.add(responses.GET, self.url, body=b"<html>updated", headers={"ETag": '"v2"'}, status=200)
+
+        fetch(self.url)
+        self.assertEqual(b"<html>updated", fetch(self.url))
+
+        self.assertEqual(b"<html>updated", self.cache.load(self.url))
+        self.assertEqual({"If-None-Match": '"v2"'}, self.cache.validators(self.url))
+
+    @responses.activate
+    def test_not_modified_but_evicted(self):
+        self.cache.store(self.url, content=b"<html>", etag='"v1"')
+        self.cache.path_for(self.url).unlink()
+        responses.add(responses.GET, self.url, status=304)
+        responses.add(responses.GET, self.url, body=b"<html>", status=200)
+
+        self.assertEqual(b"<html>", fetch(self.url))
+        self.assertNotIn("If-None-Match", responses.calls[1].request.headers)
+
+    @responses.activate
+    def test_error_not_cached(self):
+        responses.add(responses.GET, self.url, status=500)
+
+        with self.assertRaises(requests.HTTPError):
+            fetch(self.url)
+        self.assertIsNone(self.cache.get(self.url))
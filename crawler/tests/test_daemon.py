@@ -0,0 +1,69 @@
+import os
+import signal
+import threading
+import unittest
+
+from crawler.daemon import CrawlDaemon, PollInterval
+
+
+class TestPollInterval(unittest.TestCase):
+    def setUp(self):
+        self.interval = PollInterval(minimum=30, maximum=900, initial=120, target=5)
+
+    def test_busy(self):
+        # 10 new articles a minute: a poll every 30 seconds finds 5 of them
+        self.assertEqual(30, self.interval.update(new=10, elapsed=60))
+        self.assertEqual(30, self.interval.update(new=1000, elapsed=60))  # never shorter than the minimum
+
+    def test_quiet(self):
+        self.interval.update(new=10, elapsed=60)
+
+        intervals = [self.interval.update(new=0, elapsed=60) for _ in range(10)]
+
+        self.assertEqual(sorted(intervals), intervals)  # growing back, gradually
+        self.assertLess(intervals[0], 60)
+        self.assertEqual(900, self.interval.update(new=0, elapsed=0))
+
+    def test_nothing_new_yet(self):
+        self.assertEqual(900, self.interval.update(new=0, elapsed=120))
+
+
+class TestCrawlDaemon(unittest.TestCase):
+    def setUp(self):
+        self.polls = 0
+
+    def _daemon(self, poll) -> CrawlDaemon:
+        return CrawlDaemon(poll=poll, interval=PollInterval(minimum=0, maximum=0.01, initial=0))
+
+    def test_poll_until_stopped(self):
+        def poll(stop: threading.Event) -> int:
+            self.polls += 1
+            if self.polls == 3:  # e.g. on SIGTERM, while crawling
+                stop.set()
+            return 1
+
+        self._daemon(poll).run()
+
+        self.assertEqual(3, self.polls)
+
+    def test_failed_poll(self):
+        def poll(stop: threading.Event) -> int:
+            self.polls += 1
+            if self.polls == 1:
+                raise ValueError("sitemap unavailable")
+            stop.set()
+            return 0
+
+        self._daemon(poll).run()
+
+        self.assertEqual(2, self.polls)
+
+    def test_sigterm(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        daemon = self._daemon(lambda stop: 0)
+        daemon.handle_signals()
+
+        os.kill(os.getpid(), signal.SIGTERM)
+
+        self.assertTrue(daemon.stopping.is_set())
@@ -0,0 +1,40 @@
+import unittest
+from datetime import UTC, datetime, timedelta
+
+from crawler.dates import parse_release_date
+
+
+class TestParseReleaseDate(unittest.TestCase):
+    def test_header_format(self):
+        self.assertEqual(datetime(2025, 6, 10, 17, 39, tzinfo=UTC), parse_release_date("Jun 10, 2025, 13:39 ET"))
+
+    def test_daylight_saving_time(self):
+        summer = parse_release_date("Oct 17, 2026, 09:00 ET")
+        winter = parse_release_date("Dec 17, 2026, 09:00 ET")
+
+        self.assertEqual(timedelta(hours=-4), summer.utcoffset())
+        self.assertEqual(timedelta(hours=-5), winter.utcoffset())
+
+    def test_fixed_offset_zone(self):
+        self.assertEqual(timedelta(hours=-5), parse_release_date("Jun 10, 2025, 13:39 EST").utcoffset())
+
+    def test_twelve_hour_clock(self):
+        self.assertEqual(
+            datetime(2026, 10, 17, 16, 30, tzinfo=UTC), parse_release_date("October 17, 2026 at 9:30 a.m. PT")
+        )
+        self.assertEqual(datetime(2026, 10, 17, 16, tzinfo=UTC), parse_release_date("Oct 17, 2026, 12:00 PM ET"))
+
+    def test_other_format(self):
+        self.assertEqual(datetime(2026, 10, 17, 13, tzinfo=UTC), parse_release_date("2026-10-17 09:00 ET"))
+
+    def test_not_a_date(self):
+        with self.assertRaises(ValueError):
+            parse_release_date("Breaking news")
+
+    def test_memoized(self):
+        parse_release_date("Jan 2, 2026, 08:00 ET")
+        hits = parse_release_date.cache_info().hits
+
+        parse_release_date("Jan 2, 2026, 08:00 ET")
+
+        self.assertEqual(hits + 1, parse_release_date.cache_info().hits)
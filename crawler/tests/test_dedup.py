@@ -0,0 +1,62 @@
+import unittest
+from datetime import datetime
+
+from crawler.dedup import DuplicateIndex
+from models.tests.factories import ArticleFactory, press_release_content, revised
+from storage import fingerprint, get_database
+
+
+class TestDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.content = press_release_content()
+        self.index = DuplicateIndex()
+        self.index.add("http://article1.com", fingerprint(self.content))
+
+    def test_same_content(self):
+        self.assertEqual(
+            "http://article1.com", self.index.find_duplicate("http://article2.com", fingerprint(self.content.upper()))
+        )
+
+    def test_nearly_the_same_content(self):
+        self.assertEqual(
+            "http://article1.com", self.index.find_duplicate("http://article2.com", fingerprint(revised(self.content)))
+        )
+
+    def test_different_content(self):
+        self.assertIsNone(self.index.find_duplicate("http://article2.com", fingerprint(press_release_content(seed=1))))
+
+    def test_same_url(self):
+        # an updated version of the same article is not a duplicate of itself
+        self.assertIsNone(self.index.find_duplicate("http://article1.com", fingerprint(self.content)))
+        self.assertIsNone(self.index.find_duplicate("http://article1.com", fingerprint(revised(self.content))))
+
+    def test_exact_only(self):
+        index = DuplicateIndex(max_distance=0)
+        index.add("http://article1.com", fingerprint(self.content))
+
+        self.assertIsNone(index.find_duplicate("http://article2.com", fingerprint(revised(self.content))))
+        self.assertEqual("http://article1.com", index.find_duplicate("http://article2.com", fingerprint(self.content)))
+
+    def test_content_too_short(self):
+        for content in ("", "Contact: press@acme.com"):
+            with self.subTest(content=content):
+                self.index.add("http://article2.com", fingerprint(content))
+
+                self.assertIsNone(self.index.find_duplicate("http://article3.com", fingerprint(content)))
+        self.assertEqual(1, len(self.index))
+
+    def test_invalid_max_distance(self):
+        for max_distance in (-1, 64):
+            with self.subTest(max_distance=max_distance), self.assertRaises(ValueError):
+                DuplicateIndex(max_distance=max_distance)
+
+    def test_load(self):
+        db = get_database()
+        self.addCleanup(db._db.articles.drop)
+        recent = ArticleFactory.create(content=self.content, date=datetime(2024, 1, 2))  # noqa: DTZ001
+        ArticleFactory.create(content=press_release_content(seed=1), date=datetime(2023, 1, 1))  # noqa: DTZ001, too old
+
+        index = DuplicateIndex.load(db, since=datetime(2024, 1, 1))  # noqa: DTZ001
+
+        self.assertEqual(1, len(index))
+        self.assertEqual(recent.url, index.find_duplicate("http://article2.com", fingerprint(revised(self.content))))
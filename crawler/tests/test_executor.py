@@ -0,0 +1,46 @@
+import threading
+import unittest
+from collections.abc import Generator
+
+from crawler.executor import map_bounded
+
+
+class TestMapBounded(unittest.TestCase):
+    def test_all_results(self):
+        self.assertEqual({n * 2 for n in range(100)}, set(map_bounded(lambda n: n * 2, range(100), max_workers=4)))
+
+    def test_completion_order(self):
+        released = threading.Event()
+
+        def slow_first(n: int) -> int:
+            if n == 0:
+                released.wait(timeout=5)
+            return n
+
+        results = map_bounded(slow_first, range(2), max_workers=2)
+        self.assertEqual(1, next(results))
+        released.set()
+        self.assertEqual([0], list(results))
+
+    def test_bounded_window(self):
+        pulled = 0
+
+        def items() -> Generator[int]:
+            nonlocal pulled
+            for n in range(1_000_000):
+                pulled += 1
+                yield n
+
+        results = map_bounded(lambda n: n, items(), max_workers=2, window=5)
+        next(results)
+        self.assertLessEqual(pulled, 5 + 5)  # the window, refilled once at most
+
+        results.close()
+        self.assertLess(pulled, 100)
+
+    def test_error(self):
+        def fail(n: int) -> int:
+            raise ValueError(n)
+
+        with self.assertRaises(ValueError):
+            list(map_bounded(fail, range(10), max_workers=2))
@@ -0,0 +1,53 @@
+import unittest
+from datetime import UTC, datetime, timedelta
+
+from crawler.browser import SitemapEntry
+from crawler.index import SeenUrlIndex
+
+
+class TestSeenUrlIndex(unittest.TestCase):
+    def setUp(self):
+        self.stored_at = datetime(2024, 1, 1, 12, 0, tzinfo=UTC).replace(tzinfo=None)  # naive, as MongoDB returns it
+        self.index = SeenUrlIndex(
+            known_urls={
+                "http://article1.com": self.stored_at,
+                "http://article2.com": None,
+            }
+        )
+
+    def test_contains(self):
+        self.assertIn("http://article1.com", self.index)
+        self.assertNotIn("http://article3.com", self.index)
+        self.assertEqual(2, len(self.index))
+
+    def test_new_url(self):
+        entry = SitemapEntry(url="http://article3.com")
+        self.assertTrue(self.index.is_new_or_changed(entry))
+
+    def test_known_url_without_modification_hint(self):
+        entry = SitemapEntry(url="http://article1.com")
+        self.assertFalse(self.index.is_new_or_changed(entry))
+
+    def test_known_url_without_stored_modification(self):
+        entry = SitemapEntry(url="http://article2.com", lastmod=datetime.now(tz=UTC))
+        self.assertFalse(self.index.is_new_or_changed(entry))
+
+    def test_known_url_unchanged(self):
+        entry = SitemapEntry(url="http://article1.com", lastmod=self.stored_at.replace(tzinfo=UTC))
+        self.assertFalse(self.index.is_new_or_changed(entry))
+
+    def test_known_url_changed(self):
+        entry = SitemapEntry(url="http://article1.com", lastmod=self.stored_at.replace(tzinfo=UTC) + timedelta(hours=1))
+        self.assertTrue(self.index.is_new_or_changed(entry))
+
+    def test_known_url_changed_by_publication_date(self):
+        entry = SitemapEntry(
+            url="http://article1.com",
+            publication_date=self.stored_at.replace(tzinfo=UTC) + timedelta(minutes=1),
+        )
+        self.assertTrue(self.index.is_new_or_changed(entry))
+
+    def test_add(self):
+        entry = SitemapEntry(url="http://article3.com", lastmod=self.stored_at)
+        self.index.add(url=entry.url, modified_at=entry.modified_at)
+        self.assertFalse(self.index.is_new_or_changed(entry))
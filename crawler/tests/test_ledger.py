@@ -0,0 +1,126 @@
+import threading
+import unittest
+from datetime import UTC, datetime, timedelta
+
+from crawler.browser import SitemapEntry
+from crawler.ledger import CrawlLedger, UrlState
+from storage import get_database
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2024, 1, 1, tzinfo=UTC)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class TestCrawlLedger(unittest.TestCase):
+    def setUp(self):
+        self.db = get_database()
+        self.addCleanup(self.db._db.crawl_urls.drop)
+        self.addCleanup(self.db._db.crawl_runs.drop)
+        self.clock = FakeClock()
+        self.entries = [SitemapEntry(url=f"http://article{n}.com") for n in range(3)]
+
+    def _start(self) -> CrawlLedger:
+        return CrawlLedger.start(self.db, engine="threads", flush_size=2, clock=self.clock)
+
+    def _states(self) -> dict[str, str]:
+        return {state["_id"]: state["state"] for state in self.db._db.crawl_urls.find()}
+
+    def test_plan(self):
+        ledger = self._start()
+
+        planned = ledger.plan(self.entries)
+        next(planned)
+
+        # recorded as pending before they're crawled, by batch
+        self.assertEqual(
+            {"http://article0.com": UrlState.PENDING, "http://article1.com": UrlState.PENDING}, self._states()
+        )
+        self.assertEqual(self.entries[1:], list(planned))
+        self.assertEqual(3, len(self._states()))
+
+    def test_record_states(self):
+        ledger = self._start()
+        list(ledger.plan(self.entries))
+
+        ledger.fetched("http://article0.com")
+        ledger.parsed("http://article0.com")
+        ledger.stored(["http://article0.com"])
+        ledger.failed("http://article1.com", reason=ValueError("no title"))
+        ledger.close()
+
+        self.assertEqual(
+            {
+                "http://article0.com": UrlState.STORED,
+                "http://article1.com": UrlState.FAILED,
+                "http://article2.com": UrlState.PENDING,
+            },
+            self._states(),
+        )
+        failed = self.db._db.crawl_urls.find_one({"_id": "http://article1.com"})
+        self.assertEqual("ValueError('no title')", failed["reason"])
+        self.assertEqual(1, failed["attempts"])
+        self.assertEqual("completed", self.db._db.crawl_runs.find_one({"_id": ledger.run_id})["status"])
+
+    def test_retry_failed(self):
+        ledger = self._start()
+        list(ledger.plan(self.entries))
+        ledger.failed("http://article1.com", reason="timeout")
+        ledger.close()
+
+        # not due yet: skipped
+        ledger = self._start()
+        self.assertEqual([self.entries[0], self.entries[2]], list(ledger.plan(self.entries)))
+        ledger.close()
+
+        # due: retried first, whether still in the sitemap or not
+        self.clock.now += timedelta(minutes=15)
+        ledger = self._start()
+        self.assertEqual(
+            ["http://article1.com", "http://article0.com"], [entry.url for entry in ledger.plan(self.entries[:1])]
+        )
+
+    def test_retry_backoff(self):
+        ledger = CrawlLedger.start(self.db, engine="threads", clock=self.clock, max_attempts=3)
+
+        delays = []
+        for _ in range(3):
+            ledger.failed("http://article0.com", reason="timeout")
+            ledger.flush()
+            ledger = CrawlLedger.start(self.db, engine="threads", clock=self.clock, max_attempts=3)
+            next_attempt_at = self.db._db.crawl_urls.find_one()["next_attempt_at"]
+            delays.append(next_attempt_at and next_attempt_at.replace(tzinfo=UTC) - self.clock.now)
+
+        self.assertEqual([timedelta(minutes=15), timedelta(minutes=30), None], delays)  # given up on the 3rd
+
+    def test_resume(self):
+        ledger = self._start()
+        list(ledger.plan(self.entries))
+        ledger.stored(["http://article0.com"])
+        ledger.failed("http://article1.com", reason="timeout")
+        ledger.close(completed=False)
+
+        resumed = CrawlLedger.resume(self.db, clock=self.clock)
+
+        self.assertEqual(ledger.run_id, resumed.run_id)
+        self.assertEqual(["http://article2.com"], [entry.url for entry in resumed.plan(None)])
+        resumed.close()
+        self.assertIsNone(CrawlLedger.resume(self.db))
+
+    def test_stop(self):
+        stop = threading.Event()
+        ledger = CrawlLedger.start(self.db, engine="threads", flush_size=2, clock=self.clock, stop=stop)
+
+        planned = ledger.plan(self.entries)
+        next(planned)
+        stop.set()
+
+        self.assertEqual([], list(planned))
+        self.assertTrue(ledger.stopped)
+        ledger.close(completed=False)
+        resumed = CrawlLedger.resume(self.db, clock=self.clock)
+        # the batch planned when stopped; the entries after it are left in the sitemap
+        self.assertEqual(self.entries[:2], list(resumed.plan(None)))
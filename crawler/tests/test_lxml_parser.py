@@ -0,0 +1,48 @@
+import unittest
+from pathlib import Path
+
+from crawler.lxml_parser import LxmlNewsParser
+from crawler.parser import NewsParser
+from crawler.tests import test_parser
+
+
+class TestLxmlNewsParserCornerCases(test_parser.TestNewsParserCornerCases):
+    PARSER_CLASS = LxmlNewsParser
+
+    def test_empty_document(self):
+        parser = LxmlNewsParser(url="http://fake.url", html_content="")
+        self.assertIsNone(parser.title)
+        self.assertEqual("", parser.content)
+        self.assertEqual({}, parser._metadata)
+
+    def test_text_like_beautifulsoup(self):
+        html_content = (
+            '<html><body><section class="release-body"><div class="row col-lg-10">\n'
+            "  <p>First <b>bold</b> line</p>\n  <script>var skipped = 1;</script><!-- comment -->"
+            "<p>Second</p> <pre>  kept  \n  as is</pre>"
+            "</div></section></body></html>"
+        )
+        soup_parser = NewsParser(url="http://fake.url", html_content=html_content)
+        lxml_parser = LxmlNewsParser(url="http://fake.url", html_content=html_content)
+        self.assertEqual(soup_parser._body_content, lxml_parser._body_content)
+
+
+class LxmlParserTestSample001(test_parser.ParserTestSample001):
+    PARSER_CLASS = LxmlNewsParser
+
+
+class LxmlParserTestSample002(test_parser.ParserTestSample002):
+    PARSER_CLASS = LxmlNewsParser
+
+
+class TestParsersParity(unittest.TestCase):
+    def test_same_article(self):
+        for sample_path in sorted((Path(__file__).parent / "data").glob("sample_*.html")):
+            with self.subTest(sample=sample_path.name):
+                html_content = sample_path.read_bytes()
+                soup_parser = NewsParser(url="https://fake.url", html_content=html_content)
+                lxml_parser = LxmlNewsParser(url="https://fake.url", html_content=html_content)
+
+                self.assertEqual(soup_parser.article, lxml_parser.article)
+                self.assertEqual(soup_parser._metadata, lxml_parser._metadata)
+                self.assertEqual(soup_parser.publisher, lxml_parser.publisher)
@@ -0,0 +1,90 @@
+import unittest
+from pathlib import Path
+
+import requests
+import responses
+
+from crawler.lxml_parser import LxmlNewsParser
+from crawler.metrics import (
+    ARTICLES_WRITTEN,
+    FETCH_SECONDS,
+    FETCHES,
+    PARSE_FAILURES,
+    PARSE_SECONDS,
+    WRITE_BATCH_SECONDS,
+    failure_reason,
+)
+from crawler.parser import NewsParser
+from crawler.writer import ArticleWriter
+from models.tests.factories import ArticleFactory
+from storage.mongo import get_database
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+class TestFetchMetrics(unittest.TestCase):
+    def test_failure_reason(self):
+        response = requests.Response()
+        response.status_code = 503
+
+        self.assertEqual("http_503", failure_reason(requests.HTTPError(response=response)))
+        self.assertEqual("ConnectionError", failure_reason(requests.ConnectionError()))
+
+    @responses.activate
+    def test_article_fetches(self):
+        responses.add(responses.GET, "http://fake.url/ok", body="<html></html>")
+        responses.add(responses.GET, "http://fake.url/gone", status=404)
+        fetched = FETCH_SECONDS.count(kind="article")
+        ok = FETCHES.value(kind="article", outcome="ok")
+        not_found = FETCHES.value(kind="article", outcome="http_404")
+
+        NewsParser.from_url("http://fake.url/ok")
+        with self.assertRaises(requests.HTTPError):
+            NewsParser.from_url("http://fake.url/gone")
+
+        self.assertEqual(fetched + 2, FETCH_SECONDS.count(kind="article"))
+        self.assertEqual(ok + 1, FETCHES.value(kind="article", outcome="ok"))
+        self.assertEqual(not_found + 1, FETCHES.value(kind="article", outcome="http_404"))
+
+
+class TestParseMetrics(unittest.TestCase):
+    def test_parse_stages(self):
+        for parser_class in (NewsParser, LxmlNewsParser):
+            parser = parser_class.from_file(url="http://fake.url", filepath=DATA_DIR / "sample_001.html")
+            name = parser_class.__name__
+            stages = ("document", "title", "date", "provider", "content")
+            counts = [PARSE_SECONDS.count(parser=name, stage=stage) for stage in stages]
+
+            parser.article
+
+            self.assertEqual(
+                [count + 1 for count in counts], [PARSE_SECONDS.count(parser=name, stage=stage) for stage in stages]
+            )
+
+    def test_parse_failure(self):
+        failures = PARSE_FAILURES.value(parser="LxmlNewsParser", reason="missing_fields")
+
+        with self.assertRaises(ValueError):
+            LxmlNewsParser(url="http://fake.url", html_content="<html></html>").article
+
+        self.assertEqual(failures + 1, PARSE_FAILURES.value(parser="LxmlNewsParser", reason="missing_fields"))
+
+
+class TestWriteMetrics(unittest.TestCase):
+    def setUp(self):
+        self.db = get_database()
+        self.addCleanup(self.db._db.articles.drop)
+
+    def test_write_results(self):
+        article = ArticleFactory.build()
+        batches = WRITE_BATCH_SECONDS.count()
+        inserted = ARTICLES_WRITTEN.value(result="inserted")
+        unchanged = ARTICLES_WRITTEN.value(result="unchanged")
+
+        with ArticleWriter(db=self.db, batch_size=1) as writer:
+            writer.put(article)
+            writer.put(article)
+
+        self.assertEqual(batches + 2, WRITE_BATCH_SECONDS.count())
+        self.assertEqual(inserted + 1, ARTICLES_WRITTEN.value(result="inserted"))
+        self.assertEqual(unchanged + 1, ARTICLES_WRITTEN.value(result="unchanged"))
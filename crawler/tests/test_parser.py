@@ -14,14 +14,16 @@ class TestNewsParserCornerCases(unittest.TestCase):
     This test class simulates corner cases of handling the HTML content.
     """
 
+    PARSER_CLASS: type[NewsParser] = NewsParser
+
     def setUp(self):
-        self.parser = NewsParser(url="http://fake.url", html_content="<html></html>")
+        self.parser = self.PARSER_CLASS(url="http://fake.url", html_content="<html></html>")
 
     @responses.activate
     def test_from_url(self):
         url = "http://fake.url"
         responses.add(responses.GET, url, body="<html></html>", status=200)
-        parser = NewsParser.from_url(url)
+        parser = self.PARSER_CLASS.from_url(url)
         self.assertEqual(parser.url, url)
         self.assertEqual(parser.html_content, b"<html></html>")
 
@@ -30,10 +32,10 @@ class TestNewsParserCornerCases(unittest.TestCase):
         url = "http://fake.url"
         responses.add(responses.GET, url, status=500)
         with self.assertRaises(Exception):
-            NewsParser.from_url(url)
+            self.PARSER_CLASS.from_url(url)
 
     def test_article_property_missing_fields(self):
-        parser = NewsParser(url="http://fake.url", html_content="<html></html>")
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content="<html></html>")
         with self.assertRaises(ValueError):
             _ = parser.article
 
@@ -42,12 +44,12 @@ class TestNewsParserCornerCases(unittest.TestCase):
 
     def test_body_title_no_h1(self):
         html_content = '<html><body><header class="release-header"></header></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertIsNone(parser._body_title)
 
     def test_body_provider_no_provider(self):
         html_content = '<html><body><header class="release-header"></header></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertIsNone(parser._body_provider)
 
     def test_body_date(self):
@@ -56,12 +58,12 @@ class TestNewsParserCornerCases(unittest.TestCase):
 
         # Header, but no date element
         html_content = '<html><body><header class="release-header"></header></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertIsNone(parser._body_date)
 
         # Date element, but empty
         html_content = '<html><body><header class="release-header"><p class="mb-no"></p></header></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertIsNone(parser._body_date)
 
     def test_body_content_no_content(self):
@@ -73,17 +75,17 @@ class TestNewsParserCornerCases(unittest.TestCase):
 
         # Empty script tag
         html_content = '<html><body><script type="application/ld+json"></script></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertEqual(parser._metadata, {})
 
         # Invalid JSON
         html_content = '<html><body><script type="application/ld+json">{,}</script></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertEqual(parser._metadata, {})
 
     def test_metadata_publisher_no_publisher(self):
         html_content = '<html><body><script type="application/ld+json">{"key": "value"}</script></body></html>'
-        parser = NewsParser(url="http://fake.url", html_content=html_content)
+        parser = self.PARSER_CLASS(url="http://fake.url", html_content=html_content)
         self.assertIsNone(parser._metadata_publisher)
 
 
@@ -106,10 +108,11 @@ class ParserTestMixin:
     """
 
     TEST_CASE: TestSample
+    PARSER_CLASS: type[NewsParser] = NewsParser
 
     def setUp(self):
         sample_html_path = Path(__file__).parent / "data" / self.TEST_CASE.sample_file
-        self.parser = NewsParser.from_file(url="https://fake.url", filepath=sample_html_path)
+        self.parser = self.PARSER_CLASS.from_file(url="https://fake.url", filepath=sample_html_path)
 
     def test_title(self):
         self.assertEqual(self.TEST_CASE.expected_title, self.parser.title)
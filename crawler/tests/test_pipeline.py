@@ -0,0 +1,87 @@
+import unittest
+from pathlib import Path
+
+from crawler.browser import SitemapEntry
+from crawler.pipeline import CrawlPipeline, StageCounter
+from crawler.tests.server import CollectingWriter, StandInServer
+
+
+def load_fixture(filename):
+    return (Path(__file__).parent / "data" / filename).read_bytes()
+
+
+class TestCrawlPipeline(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(
+            routes={
+                "/article-1.html": load_fixture("sample_001.html"),
+                "/article-2.html": load_fixture("sample_002.html"),
+                "/blank.html": b"<html></html>",
+            }
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_run(self):
+        entries = [
+            SitemapEntry(url=f"{self.server.base_url}/article-1.html"),
+            SitemapEntry(url=f"{self.server.base_url}/article-2.html"),
+            SitemapEntry(url=f"{self.server.base_url}/blank.html"),
+            SitemapEntry(url=f"{self.server.base_url}/missing.html"),
+        ]
+        writer = CollectingWriter()
+        pipeline = CrawlPipeline(writer=writer, fetch_workers=2, parse_workers=2, queue_size=1)
+
+        written = pipeline.run(entries)
+
+        self.assertEqual(2, written)
+        self.assertEqual(
+            {"Workday Inc.", "Whataburger"},
+            {article.news_provided_by for article in writer.articles},
+        )
+        self.assertEqual((3, 1), (pipeline.counters["fetch"].processed, pipeline.counters["fetch"].failed))
+        self.assertEqual((2, 1), (pipeline.counters["parse"].processed, pipeline.counters["parse"].failed))
+        self.assertEqual((2, 0), (pipeline.counters["handover"].processed, pipeline.counters["handover"].failed))
+
+    def test_run_entries_failing(self):
+        def entries():
+            yield SitemapEntry(url=f"{self.server.base_url}/article-1.html")
+            raise ConnectionError("sitemap unreachable")
+
+        writer = CollectingWriter()
+        pipeline = CrawlPipeline(writer=writer, fetch_workers=2, parse_workers=1)
+
+        with self.assertRaises(ConnectionError):
+            pipeline.run(entries())
+        self.assertEqual(1, len(writer.articles))  # the entries read before are still crawled
+
+    def test_run_writer_failing(self):
+        class FailingWriter:
+            def put(self, article):
+                raise RuntimeError("The article writer stopped, articles are no longer stored")
+
+        entries = [SitemapEntry(url=f"{self.server.base_url}/article-1.html") for _ in range(10)]
+        pipeline = CrawlPipeline(writer=FailingWriter(), fetch_workers=2, parse_workers=1, queue_size=1)
+
+        with self.assertRaisesRegex(RuntimeError, "writer stopped"):
+            pipeline.run(entries)
+        self.assertEqual(0, pipeline.counters["handover"].processed)
+        self.assertGreaterEqual(pipeline.counters["handover"].failed, 1)
+
+    def test_run_without_entries(self):
+        pipeline = CrawlPipeline(writer=CollectingWriter(), fetch_workers=1, parse_workers=1)
+
+        self.assertEqual(0, pipeline.run([]))
+
+
+class TestStageCounter(unittest.TestCase):
+    def test_counts(self):
+        counter = StageCounter(name="fetch")
+        counter.success()
+        counter.success()
+        counter.failure()
+
+        self.assertEqual(2, counter.processed)
+        self.assertEqual(1, counter.failed)
+        self.assertGreater(counter.throughput, 0)
+        self.assertTrue(str(counter).startswith("fetch: 2 ok, 1 failed"))
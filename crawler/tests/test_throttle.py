@@ -0,0 +1,186 @@
+import random
+import unittest
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+import requests
+import responses
+
+from crawler.executor import map_bounded
+from crawler.http import fetch, set_throttle
+from crawler.tests.server import StandInServer
+from crawler.throttle import AdaptiveConcurrency, Throttle, TokenBucket, retry_after
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=2, burst=3, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_then_rate(self):
+        self.assertEqual([0, 0, 0, 0.5, 0.5], [self.bucket.acquire() for _ in range(5)])
+
+    def test_refill_while_idle(self):
+        for _ in range(3):
+            self.bucket.acquire()
+        self.clock.now += 10
+
+        self.assertEqual([0, 0, 0, 0.5], [self.bucket.acquire() for _ in range(4)])  # up to the burst only
+
+    def test_hold(self):
+        self.bucket.hold(5)
+
+        self.assertEqual([5, 0.5], [self.bucket.acquire() for _ in range(2)])
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.concurrency = AdaptiveConcurrency(initial=4, maximum=6, target_latency=1, clock=self.clock)
+
+    def test_additive_increase(self):
+        for _ in range(4):
+            self.concurrency.release(self.concurrency.acquire())
+
+        self.assertAlmostEqual(4.9, self.concurrency.limit, places=1)  # about one more per round trip
+
+        for _ in range(100):
+            self.concurrency.release(self.concurrency.acquire())
+        self.assertEqual(6, self.concurrency.limit)
+
+    def test_multiplicative_decrease(self):
+        sent_at = [self.concurrency.acquire() for _ in range(4)]
+        self.clock.now += 0.1
+
+        for sent in sent_at:  # a burst of errors, from requests sent before the first cut
+            self.concurrency.release(sent, throttled=True)
+        self.assertEqual(2, self.concurrency.limit)
+
+        self.concurrency.release(self.concurrency.acquire(), throttled=True)
+        self.assertEqual(1, self.concurrency.limit)
+        self.concurrency.release(self.concurrency.acquire(), throttled=True)
+        self.assertEqual(1, self.concurrency.limit)  # down to the minimum only
+
+    def test_slow_response(self):
+        sent_at = self.concurrency.acquire()
+        self.clock.now += 1.5
+
+        self.concurrency.release(sent_at)
+
+        self.assertEqual(2, self.concurrency.limit)
+
+
+class TestRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(120, retry_after("120"))
+
+    def test_http_date(self):
+        value = format_datetime(datetime.now(UTC) + timedelta(minutes=2), usegmt=True)
+
+        self.assertAlmostEqual(120, retry_after(value), delta=2)
+
+    def test_invalid(self):
+        self.assertIsNone(retry_after(None))
+        self.assertIsNone(retry_after("soon"))
+
+
+class TestThrottle(unittest.TestCase):
+    url = "http://www.test.com/article1.html"
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.throttle = Throttle(
+            rate=100, max_retries=3, clock=self.clock, sleep=self.clock.sleep, rng=random.Random(0)
+        )
+        set_throttle(self.throttle)
+        self.addCleanup(set_throttle, None)
+
+    @responses.activate
+    def test_retry_after(self):
+        responses.add(responses.GET, self.url, status=429, headers={"Retry-After": "7"})
+        responses.add(responses.GET, self.url, body=b"<html>", status=200)
+
+        self.assertEqual(b"<html>", fetch(self.url))
+        self.assertEqual([7], self.clock.slept)
+
+    @responses.activate
+    def test_jittered_backoff(self):
+        for _ in range(3):
+            responses.add(responses.GET, self.url, status=503)
+        responses.add(responses.GET, self.url, body=b"<html>", status=200)
+
+        self.assertEqual(b"<html>", fetch(self.url))
+        self.assertEqual(3, self.throttle.retries)
+        for attempt, delay in enumerate(self.clock.slept):
+            self.assertLessEqual(delay, 0.5 * 2**attempt)
+
+    @responses.activate
+    def test_give_up(self):
+        responses.add(responses.GET, self.url, status=503)
+
+        with self.assertRaises(requests.HTTPError):
+            fetch(self.url)
+        self.assertEqual(4, len(responses.calls))
+
+    @responses.activate
+    def test_retry_after_too_late(self):
+        responses.add(responses.GET, self.url, status=429, headers={"Retry-After": "3600"})
+
+        with self.assertRaises(requests.HTTPError):
+            fetch(self.url)
+        self.assertEqual(1, len(responses.calls))
+
+    def test_error_releases_concurrency(self):
+        throttle = Throttle(initial_concurrency=2, clock=self.clock, sleep=self.clock.sleep)
+
+        def request():
+            raise requests.exceptions.ChunkedEncodingError
+
+        for _ in range(3):  # would block on the third one if the failed ones were still counted in flight
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                throttle.send(self.url, request)
+        self.assertEqual(0, throttle.limits(self.url).concurrency.in_flight)
+        self.assertEqual(0, throttle.retries)
+
+    @responses.activate
+    def test_not_found_not_retried(self):
+        responses.add(responses.GET, self.url, status=404)
+
+        with self.assertRaises(requests.HTTPError):
+            fetch(self.url)
+        self.assertEqual(1, len(responses.calls))
+
+
+class TestThrottledServer(unittest.TestCase):
+    def setUp(self):
+        paths = [f"/article-{n}.html" for n in range(40)]
+        self.server = StandInServer(
+            routes={path: b"<html></html>" for path in paths}, delay=0.02, capacity=4, retry_after="0"
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.urls = [f"{self.server.base_url}{path}" for path in paths]
+
+    def test_adapt_to_capacity(self):
+        throttle = Throttle(rate=1000, initial_concurrency=16)
+        set_throttle(throttle)
+        self.addCleanup(set_throttle, None)
+
+        fetched = list(map_bounded(fetch, self.urls, max_workers=16))
+
+        self.assertEqual(40, len(fetched))  # no article lost
+        self.assertGreater(self.server.throttled, 0)
+        self.assertLess(throttle.limits(self.urls[0]).concurrency.limit, 16)
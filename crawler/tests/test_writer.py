@@ -0,0 +1,159 @@
+import unittest
+from unittest import mock
+
+from crawler.dedup import DuplicateIndex
+from crawler.index import SeenUrlIndex
+from crawler.ledger import CrawlLedger, UrlState
+from crawler.writer import ArticleWriter
+from models.tests.factories import ArticleFactory, press_release_content, revised
+from storage.mongo import BulkWriteSummary, get_database
+
+
+class TestArticleWriter(unittest.TestCase):
+    def setUp(self):
+        self.db = get_database()
+        self.addCleanup(self.db._db.articles.drop)
+
+    def test_write_in_batches(self):
+        articles = ArticleFactory.build_batch(size=7)
+
+        with ArticleWriter(db=self.db, batch_size=3, max_pending=2) as writer:
+            for article in articles:
+                writer.put(article)
+
+        self.assertEqual(BulkWriteSummary(inserted=7), writer.summary)
+        self.assertEqual(0, writer.failed)
+        self.assertEqual(7, self.db._db.articles.count_documents({}))
+
+    def test_write_same_article_twice(self):
+        article = ArticleFactory.build()
+
+        with ArticleWriter(db=self.db, batch_size=1) as writer:
+            writer.put(article)
+            writer.put(article)
+
+        self.assertEqual(BulkWriteSummary(inserted=1, unchanged=1), writer.summary)
+        self.assertEqual(1, self.db._db.articles.count_documents({}))
+
+    def test_write_duplicates(self):
+        original = ArticleFactory.build(content=press_release_content())
+        republished = ArticleFactory.build(content=original.content)
+        revision = ArticleFactory.build(content=revised(original.content))
+
+        with ArticleWriter(db=self.db, duplicates=DuplicateIndex()) as writer:
+            for article in (original, republished, revision):
+                writer.put(article)
+
+        self.assertEqual(BulkWriteSummary(inserted=3), writer.summary)
+        self.assertEqual(2, writer.duplicated)
+        self.assertEqual(
+            {original.url: None, republished.url: original.url, revision.url: original.url},
+            {article["url"]: article["_duplicate_of"] for article in self.db._db.articles.find()},
+        )
+
+    def test_empty_content_not_duplicates(self):
+        articles = ArticleFactory.build_batch(size=2, content="")
+
+        with ArticleWriter(db=self.db, duplicates=DuplicateIndex(), skip_duplicates=True) as writer:
+            for article in articles:
+                writer.put(article)
+
+        self.assertEqual(BulkWriteSummary(inserted=2), writer.summary)
+        self.assertEqual(0, writer.duplicated)
+
+    def test_skip_duplicates(self):
+        original = ArticleFactory.build(content=press_release_content())
+        republished = ArticleFactory.build(content=original.content)
+
+        with ArticleWriter(db=self.db, batch_size=1, duplicates=DuplicateIndex(), skip_duplicates=True) as writer:
+            writer.put(original)
+            writer.put(republished)
+            writer.put(original)  # stored again, not a duplicate of itself
+
+        self.assertEqual(BulkWriteSummary(inserted=1, unchanged=1), writer.summary)
+        self.assertEqual(1, writer.duplicated)
+        self.assertEqual([original.url], [article["url"] for article in self.db._db.articles.find()])
+
+    def test_record_stored_articles(self):
+        self.addCleanup(self.db._db.crawl_urls.drop)
+        self.addCleanup(self.db._db.crawl_runs.drop)
+        ledger = CrawlLedger.start(self.db, engine="threads")
+        articles = ArticleFactory.build_batch(size=3)
+
+        with ArticleWriter(db=self.db, batch_size=2, ledger=ledger) as writer:
+            for article in articles:
+                writer.put(article)
+        ledger.close()
+
+        self.assertEqual(
+            {article.url: UrlState.STORED for article in articles},
+            {state["_id"]: state["state"] for state in self.db._db.crawl_urls.find()},
+        )
+
+    def test_add_stored_articles_to_seen(self):
+        seen = SeenUrlIndex(known_urls={})
+        articles = ArticleFactory.build_batch(size=2)
+
+        with ArticleWriter(db=self.db, seen=seen) as writer:
+            for article in articles:
+                writer.put(article)
+
+        self.assertEqual(2, len(seen))
+        self.assertTrue(all(article.url in seen for article in articles))
+
+    def test_close_without_articles(self):
+        writer = ArticleWriter(db=self.db)
+        writer.start()
+
+        summary = writer.close()
+
+        self.assertEqual(BulkWriteSummary(), summary)
+
+    def test_ledger_unavailable(self):
+        self.addCleanup(self.db._db.crawl_runs.drop)
+        ledger = CrawlLedger.start(self.db, engine="threads")
+        articles = ArticleFactory.build_batch(size=3)
+
+        with (
+            mock.patch.object(ledger, "stored", side_effect=ConnectionError("MongoDB is down")),
+            ArticleWriter(db=self.db, batch_size=1, ledger=ledger) as writer,
+        ):
+            for article in articles:
+                writer.put(article)
+
+        self.assertEqual(BulkWriteSummary(inserted=3), writer.summary)  # the writer outlived the ledger
+
+    def test_record_failed_articles(self):
+        self.addCleanup(self.db._db.crawl_urls.drop)
+        self.addCleanup(self.db._db.crawl_runs.drop)
+        ledger = CrawlLedger.start(self.db, engine="threads")
+        original = ArticleFactory.build(content=press_release_content())
+        republished = ArticleFactory.build(content=original.content)
+
+        with (
+            mock.patch.object(self.db, "save_articles", side_effect=ConnectionError("MongoDB is down")),
+            ArticleWriter(db=self.db, ledger=ledger, duplicates=DuplicateIndex(), skip_duplicates=True) as writer,
+        ):
+            writer.put(original)
+            writer.put(republished)
+        ledger.close()
+
+        self.assertEqual(1, writer.failed)
+        self.assertEqual(
+            {original.url: UrlState.FAILED, republished.url: UrlState.STORED},  # the duplicate was skipped, not sent
+            {state["_id"]: state["state"] for state in self.db._db.crawl_urls.find()},
+        )
+
+    def test_writer_died(self):
+        writer = ArticleWriter(db=self.db, batch_size=1)
+
+        with mock.patch.object(writer, "_mark_duplicates", side_effect=ValueError("bug")):
+            writer.duplicates = DuplicateIndex()
+            writer.start()
+            writer.put(ArticleFactory.build())
+
+            # raising, rather than blocking for good once the queue is full
+            with self.assertRaises(RuntimeError):
+                writer.close()
+            with self.assertRaises(RuntimeError):
+                writer.put(ArticleFactory.build())
@@ -0,0 +1,284 @@
+import asyncio
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from crawler.metrics import FETCH_RETRIES, failure_reason
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe rate limiter: `rate` tokens per second, up to `burst` of them saved up while idle."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated_at = clock()
+        self._held_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, waiting for one if there are none left, and return how long that took."""
+        waited = 0.0
+        while wait := self._take():
+            self._sleep(wait)
+            waited += wait
+        return waited
+
+    async def acquire_async(self) -> float:
+        """`acquire`, waiting without blocking the event loop."""
+        waited = 0.0
+        while wait := self._take():
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    def _take(self) -> float:
+        """Take a token if there is one and return 0, or return how long to wait for the next one."""
+        with self._lock:
+            now = self._clock()
+            wait = self._held_until - now
+            if wait > 0:
+                return wait
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def hold(self, seconds: float) -> None:
+        """Hand out no token for `seconds`, e.g. as told by a `Retry-After`."""
+        with self._lock:
+            self._held_until = max(self._held_until, self._clock() + seconds)
+            self._updated_at = self._held_until
+            self._tokens = 1.0  # then resume at the rate, rather than with a burst
+
+
+class AdaptiveConcurrency:
+    """
+    Thread-safe limit of requests in flight, adjusted AIMD-style like TCP congestion control:
+    it grows by `increase` per limit-worth of fast responses (so by about `increase` per round trip),
+    and is cut by `decrease` on a throttled or slower than `target_latency` one.
+    Responses to requests sent before the last cut don't cut it again: a burst of errors only counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        target_latency: float = 2.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self._clock = clock
+        self._decreased_at = -math.inf
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a request to fit in the limit, and return when it was sent, to be handed back to `release`."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self._clock()
+
+    def release(self, sent_at: float, throttled: bool = False) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            now = self._clock()
+            if throttled or now - sent_at > self.target_latency:
+                if sent_at >= self._decreased_at:
+                    self.limit = max(float(self.minimum), self.limit * self.decrease)
+                    self._decreased_at = now
+            else:
+                self.limit = min(float(self.maximum), self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+
+@dataclass
+class HostLimits:
+    bucket: TokenBucket
+    concurrency: AdaptiveConcurrency
+
+
+class Throttle:
+    """
+    Limits shared by all the fetches to each host: a token bucket of `rate` requests per second, and an adaptive
+    limit of requests in flight. Throttled (429) and failed (5xx) responses are retried up to `max_retries` times,
+    after their `Retry-After` if any (holding back every request to the host meanwhile), or a jittered backoff.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: float | None = None,
+        initial_concurrency: int = 8,
+        max_concurrency: int = 64,
+        target_latency: float = 2.0,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._hosts: dict[str, HostLimits] = {}
+        self._lock = threading.Lock()
+
+    def limits(self, url: str) -> HostLimits:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostLimits(
+                    bucket=TokenBucket(self.rate, burst=self.burst, clock=self._clock, sleep=self._sleep),
+                    concurrency=AdaptiveConcurrency(
+                        initial=self.initial_concurrency,
+                        maximum=self.max_concurrency,
+                        target_latency=self.target_latency,
+                        clock=self._clock,
+                    ),
+                )
+            return self._hosts[host]
+
+    def send(self, url: str, request: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Send `request` to `url` within the limits of its host, retrying it as needed.
+        The last response is returned whatever its status, e.g. when told to retry later than `max_backoff`.
+        """
+        limits = self.limits(url)
+        for attempt in itertools.count():
+            limits.bucket.acquire()
+            sent_at = limits.concurrency.acquire()
+            try:
+                resp = request()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                limits.concurrency.release(sent_at, throttled=True)
+                delay = self._retry_delay(attempt, limits)
+                if delay is None:
+                    raise
+                reason = failure_reason(e)
+            except BaseException:  # not worth retrying, but the request is no longer in flight either
+                limits.concurrency.release(sent_at)
+                raise
+            else:
+                throttled = resp.status_code in RETRY_STATUSES
+                limits.concurrency.release(sent_at, throttled=throttled)
+                delay = self._retry_delay(attempt, limits, resp) if throttled else None
+                if delay is None:
+                    return resp
+                resp.close()
+                reason = f"http_{resp.status_code}"
+
+            self._count_retry(url, delay, reason, limits.concurrency)
+            self._sleep(delay)
+
+    async def send_async(self, url: str, request: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        `send` for asyncio engines: within the same rate and retried the same way, waiting without blocking the loop.
+        Requests in flight are left to the limits of the engine, as the adaptive ones block their thread.
+        """
+        limits = self.limits(url)
+        for attempt in itertools.count():
+            await limits.bucket.acquire_async()
+            try:
+                resp = await request()
+            except httpx.TransportError as e:
+                delay = self._retry_delay(attempt, limits)
+                if delay is None:
+                    raise
+                reason = failure_reason(e)
+            else:
+                delay = self._retry_delay(attempt, limits, resp) if resp.status_code in RETRY_STATUSES else None
+                if delay is None:
+                    return resp
+                reason = f"http_{resp.status_code}"
+
+            self._count_retry(url, delay, reason)
+            await asyncio.sleep(delay)
+
+    def _retry_delay(
+        self, attempt: int, limits: HostLimits, resp: requests.Response | httpx.Response | None = None
+    ) -> float | None:
+        """
+        How long to wait before retrying a request that failed, or got `resp` with one of `RETRY_STATUSES`;
+        None to give up. A `Retry-After` holds back every request to the host meanwhile.
+        """
+        if attempt == self.max_retries:
+            return None
+        delay = retry_after(resp.headers.get("Retry-After")) if resp is not None else None
+        if delay is None:
+            return self._backoff_delay(attempt)
+        if delay > self.max_backoff:
+            return None
+        limits.bucket.hold(delay)
+        return delay
+
+    def _count_retry(self, url: str, delay: float, reason: str, concurrency: AdaptiveConcurrency | None = None) -> None:
+        with self._lock:
+            self.retries += 1
+        FETCH_RETRIES.inc(reason=reason)
+        limit = f", concurrency limit down to {int(concurrency.limit)}" if concurrency is not None else ""
+        logging.warning(f"Retrying {url} in {delay:.1f}s after {reason}{limit}")
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # "full jitter": retries of concurrent failures spread out instead of hitting the host again all at once
+        return self._rng.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+def retry_after(value: str | None) -> float | None:
+    """Seconds to wait as told by a `Retry-After` header: a number of seconds, or an HTTP date."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
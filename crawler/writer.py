@@ -0,0 +1,183 @@
+import logging
+import queue
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Self
+
+from crawler.dedup import DuplicateIndex
+from crawler.index import SeenUrlIndex
+from crawler.ledger import CrawlLedger
+from crawler.metrics import ARTICLES_WRITTEN, WRITE_BATCH_SECONDS, WRITE_BATCH_SIZE, WRITE_FAILURES, failure_reason
+from models.article import Article
+from storage import BulkWriteSummary, MongoRepository, fingerprint
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+_CLOSE = object()
+
+
+class ArticleWriter:
+    """
+    Single writer for the crawler workers: articles are handed over through a bounded queue
+    and stored in bulk batches from a dedicated thread.
+    Workers block on `put` when the writer falls behind, instead of piling up articles in memory.
+    With a `duplicates` index, articles repeating another one under a different URL are stored marked as
+    duplicates of it, or not stored at all if `skip_duplicates` is set.
+    Articles stored are added to the `seen` index, if any, so that a long-running crawler skips them from then on.
+    """
+
+    def __init__(
+        self,
+        db: MongoRepository,
+        batch_size: int = 500,
+        max_pending: int = 2_000,
+        flush_interval: float = 1.0,
+        duplicates: DuplicateIndex | None = None,
+        skip_duplicates: bool = False,
+        ledger: CrawlLedger | None = None,
+        seen: SeenUrlIndex | None = None,
+    ) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.duplicates = duplicates
+        self.skip_duplicates = skip_duplicates
+        self.ledger = ledger
+        self.seen = seen
+        self.summary = BulkWriteSummary()
+        self.failed = 0
+        self.duplicated = 0
+        self._error: Exception | None = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="article-writer", daemon=True)
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def put(self, article: Article) -> None:
+        if self.ledger is not None:
+            self.ledger.parsed(article.url)
+        self._put(article)
+
+    def close(self) -> BulkWriteSummary:
+        """Flush all pending articles and stop the writer thread."""
+        self._put(_CLOSE)
+        self._thread.join()
+        self._raise_if_dead()
+        return self.summary
+
+    def _put(self, item: object) -> None:
+        # never blocking for good on a full queue nobody consumes anymore
+        while True:
+            self._raise_if_dead()
+            try:
+                self._queue.put(item, timeout=self.flush_interval)
+            except queue.Full:
+                continue
+            return
+
+    def _raise_if_dead(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("The article writer stopped, articles are no longer stored") from self._error
+
+    def _run(self) -> None:
+        try:
+            self._consume()
+        except Exception as e:
+            logging.exception("The article writer stopped")
+            self._error = e
+
+    def _consume(self) -> None:
+        batch: list[Article] = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, Article):
+                batch.append(item)
+            if batch and (item is None or item is _CLOSE or len(batch) >= self.batch_size):
+                self._flush(batch)
+                batch = []
+            if item is _CLOSE:
+                return
+
+    def _flush(self, batch: list[Article]) -> None:
+        # skipped duplicates included: they're done with too
+        modified_at = {article.url: article.last_modified or datetime.now(UTC) for article in batch}
+        if self.duplicates is not None:
+            kept = self._mark_duplicates(batch)
+            ARTICLES_WRITTEN.inc(len(batch) - len(kept), result="skipped")
+            batch = kept
+        summary = BulkWriteSummary()
+        try:
+            if batch:
+                WRITE_BATCH_SIZE.observe(len(batch))
+                with WRITE_BATCH_SECONDS.time():
+                    summary = self.db.save_articles(batch, batch_size=self.batch_size)
+        except Exception as e:  # the writer must outlive a failed batch, or workers would block forever
+            self.failed += len(batch)
+            WRITE_FAILURES.inc(len(batch), reason=failure_reason(e))
+            logging.exception(f"Failed to store a batch of {len(batch)} articles")
+            sent = {article.url for article in batch}
+            if self.ledger is not None:
+                with _ledger_failures_logged():
+                    for url in sent:
+                        self.ledger.failed(url, reason=e)
+            # the skipped duplicates were never sent: they're done with all the same
+            self._done({url: last_modified for url, last_modified in modified_at.items() if url not in sent})
+            return
+        self.summary += summary
+        for result in ("inserted", "updated", "unchanged"):
+            ARTICLES_WRITTEN.inc(getattr(summary, result), result=result)
+        self._done(modified_at)
+        logging.info(f"Stored a batch of {len(batch)} articles")
+
+    def _done(self, modified_at: dict[str, datetime]) -> None:
+        """Record the URLs of `modified_at` as stored, in the ledger and the seen index."""
+        if not modified_at:
+            return
+        if self.ledger is not None:
+            with _ledger_failures_logged():
+                self.ledger.stored(modified_at)
+        if self.seen is not None:
+            for url, last_modified in modified_at.items():
+                self.seen.add(url, last_modified)
+
+    def _mark_duplicates(self, batch: list[Article]) -> list[Article]:
+        # only ever called from the writer thread, so the index needs no lock
+        kept = []
+        for article in batch:
+            content_fingerprint = fingerprint(article.content)
+            original_url = self.duplicates.find_duplicate(article.url, content_fingerprint)
+            if original_url is None:
+                self.duplicates.add(article.url, content_fingerprint)
+                kept.append(article)
+                continue
+
+            self.duplicated += 1
+            logging.info(f"Article at {article.url} duplicates {original_url}")
+            if not self.skip_duplicates:
+                kept.append(article.model_copy(update={"duplicate_of": original_url}))
+        return kept
+
+
+@contextmanager
+def _ledger_failures_logged() -> Generator[None]:
+    # the ledger may write states to the database: failing to must not stop the writer, as workers would block
+    try:
+        yield
+    except Exception:  # the URLs are left in their previous state, to be resumed or retried
+        logging.exception("Failed to record URL states in the crawl ledger")
@@ -0,0 +1,12 @@
+from metrics.exposition import serve, write_textfile
+from metrics.registry import CONTENT_TYPE, REGISTRY, Counter, Histogram, Registry
+
+__all__ = [
+    "CONTENT_TYPE",
+    "REGISTRY",
+    "Counter",
+    "Histogram",
+    "Registry",
+    "serve",
+    "write_textfile",
+]
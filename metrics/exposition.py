@@ -0,0 +1,40 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from metrics.registry import CONTENT_TYPE, REGISTRY, Registry
+
+
+def serve(port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve the metrics of `registry` on `/metrics` from a background thread, for Prometheus to scrape."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.partition("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_textfile(path: Path, registry: Registry = REGISTRY) -> None:
+    """
+    Write the metrics of `registry` to `path`, e.g. for node_exporter's textfile collector to pick them up
+    after a one-off run. Written aside then renamed, so they're never read half-written.
+    """
+    partial_path = path.with_name(f".{path.name}.{os.getpid()}")
+    partial_path.write_text(registry.render())
+    partial_path.replace(path)
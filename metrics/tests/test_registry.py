@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+from metrics import CONTENT_TYPE, Registry, serve, write_textfile
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        counter = self.registry.counter("fetches_total", "Fetches.", labels=["outcome"])
+        counter.inc(outcome="ok")
+        counter.inc(2, outcome="ok")
+        counter.inc(outcome='http "429"')
+
+        self.assertEqual(3, counter.value(outcome="ok"))
+        self.assertEqual(
+            "# HELP fetches_total Fetches.\n"
+            "# TYPE fetches_total counter\n"
+            'fetches_total{outcome="http \\"429\\""} 1\n'
+            'fetches_total{outcome="ok"} 3\n',
+            self.registry.render(),
+        )
+
+    def test_counter_goes_up_only(self):
+        counter = self.registry.counter("fetches_total", "Fetches.")
+
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+
+    def test_histogram(self):
+        histogram = self.registry.histogram("fetch_seconds", "Fetch time.", buckets=[0.1, 1])
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        self.assertEqual(
+            "# HELP fetch_seconds Fetch time.\n"
+            "# TYPE fetch_seconds histogram\n"
+            'fetch_seconds_bucket{le="0.1"} 2\n'
+            'fetch_seconds_bucket{le="1"} 3\n'
+            'fetch_seconds_bucket{le="+Inf"} 4\n'
+            "fetch_seconds_sum 3.65\n"
+            "fetch_seconds_count 4\n",
+            self.registry.render(),
+        )
+
+    def test_timer(self):
+        histogram = self.registry.histogram("parse_seconds", "Parse time.", labels=["stage"])
+
+        @histogram.time(stage="title")
+        def parse_title():
+            return "title"
+
+        with histogram.time(stage="document"):
+            pass
+        self.assertEqual("title", parse_title())
+
+        self.assertEqual(1, histogram.count(stage="document"))
+        self.assertEqual(1, histogram.count(stage="title"))
+
+    def test_labels(self):
+        counter = self.registry.counter("fetches_total", "Fetches.", labels=["outcome"])
+
+        with self.assertRaises(ValueError):
+            counter.inc(reason="timeout")
+
+    def test_register_again(self):
+        counter = self.registry.counter("fetches_total", "Fetches.")
+
+        self.assertIs(counter, self.registry.counter("fetches_total", "Fetches."))
+        with self.assertRaises(ValueError):
+            self.registry.histogram("fetches_total", "Fetches.")
+
+
+class TestExposition(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.registry.counter("fetches_total", "Fetches.").inc()
+
+    def test_serve(self):
+        server = serve(port=0, host="127.0.0.1", registry=self.registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as resp:
+            self.assertEqual(CONTENT_TYPE, resp.headers["Content-Type"])
+            self.assertEqual(self.registry.render(), resp.read().decode())
+
+    def test_write_textfile(self):
+        path = Path(self.enterContext(tempfile.TemporaryDirectory())) / "crawler.prom"
+
+        write_textfile(path, registry=self.registry)
+
+        self.assertEqual(self.registry.render(), path.read_text())
+        self.assertEqual([path], list(path.parent.iterdir()))
@@ -1,11 +1,14 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Article(BaseModel):
+    id: str | None = Field(None, exclude=True)  # set once stored, never stored itself
     url: str
     title: str
     date: datetime
     news_provided_by: str
     content: str
+    last_modified: datetime | None = None
+    duplicate_of: str | None = Field(None, exclude=True)  # URL of the article it repeats, found as it's stored
@@ -1,14 +1,32 @@
 import factory
+from faker import Faker
 
 from models.article import Article
 from storage.mongo import get_database
 
 
+def press_release_content(seed: int = 0, paragraphs: int = 30) -> str:
+    """
+    Content as long as a press release, for what takes a whole one, like telling near-duplicates apart.
+    The same for the same `seed`, so that similarity thresholds are tested deterministically.
+    """
+    fake = Faker()
+    fake.seed_instance(seed)
+    return "\n\n".join(fake.paragraphs(nb=paragraphs))
+
+
+def revised(content: str) -> str:
+    """Nearly the same content, as republished with a couple of words changed."""
+    words = content.split(" ")
+    words[5], words[-5] = "Revised", "today"
+    return " ".join(words) + " Updated."
+
+
 class ArticleFactory(factory.Factory):
     class Meta:
         model = Article
 
-    url = factory.Faker("url")
+    url = factory.Sequence(lambda n: f"https://www.prnewswire.com/news-releases/article-{n}.html")
     title = factory.Faker("sentence")
     date = factory.Faker("date_time")
     news_provided_by = factory.Faker("company")
@@ -1,3 +1,20 @@
-from storage.mongo import MongoRepository, get_database
+from storage.fingerprint import Fingerprint, fingerprint
+from storage.mongo import (
+    AsyncMongoRepository,
+    BulkWriteSummary,
+    DuplicatedUrlsError,
+    MongoRepository,
+    get_async_database,
+    get_database,
+)
 
-__all__ = ["MongoRepository", "get_database"]
+__all__ = [
+    "AsyncMongoRepository",
+    "BulkWriteSummary",
+    "DuplicatedUrlsError",
+    "Fingerprint",
+    "MongoRepository",
+    "fingerprint",
+    "get_async_database",
+    "get_database",
+]
@@ -0,0 +1,47 @@
+import functools
+import hashlib
+import re
+from dataclasses import dataclass
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3  # words per shingle
+MIN_SHINGLES = 10  # about a sentence: contents with fewer distinct shingles are too short to tell apart
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """
+    Fingerprints of an article content: `content_hash` is the same for contents that only differ by case,
+    whitespace or punctuation, and `simhash` signatures of nearly the same contents are a few bits apart.
+    """
+
+    content_hash: str
+    simhash: int
+    shingles: int = 0  # how many distinct ones the content has: too few, and it's too short to tell anything apart
+
+    def distance(self, other: "Fingerprint") -> int:
+        return (self.simhash ^ other.simhash).bit_count()
+
+
+@functools.lru_cache(maxsize=1024)  # computed at least twice per article stored: to find duplicates, and to store it
+def fingerprint(content: str) -> Fingerprint:
+    words = _WORD.findall(content.casefold())
+    content_hash = hashlib.blake2b(" ".join(words).encode(), digest_size=16).hexdigest()
+    shingles = {" ".join(words[i : i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))} - {""}
+    return Fingerprint(content_hash=content_hash, simhash=_simhash(shingles), shingles=len(shingles))
+
+
+def _simhash(shingles: set[str]) -> int:
+    if not shingles:
+        return 0
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=SIMHASH_BITS // 8).digest())
+        for shingle in shingles
+    ]
+    # each bit of the signature is set when it's set in most of the shingle hashes: counting them column by column
+    # over the hashes spelled in binary is much faster than shifting and masking each of them 64 times
+    columns = zip(*(f"{h:0{SIMHASH_BITS}b}" for h in hashes), strict=True)
+    bits = "".join("1" if column.count("1") * 2 > len(hashes) else "0" for column in columns)
+    return int(bits, 2)
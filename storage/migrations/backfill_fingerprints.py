@@ -0,0 +1,30 @@
+"""
+Fingerprint the articles stored before their content was, so the crawler can find their duplicates, and unmark
+those taken for duplicates while their content is too short to compare (see `DuplicateIndex`).
+
+    uv run python -m storage.migrations.backfill_fingerprints
+"""
+
+import argparse
+import logging
+
+from storage import get_database
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--batch-size", type=int, default=500, help="articles fingerprinted per bulk write")
+    args = arg_parser.parse_args()
+
+    db = get_database()
+    try:
+        logging.info(f"Fingerprinted {db.backfill_fingerprints(batch_size=args.batch_size)} articles")
+        logging.info(f"Unmarked {db.unmark_short_duplicates()} articles too short to be duplicates")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Move the content of the stored articles to compressed bodies, or back with --decompress (see `MongoRepository`).
+Run it along with setting `MONGO_COMPRESS_CONTENT` for the crawler, or unsetting it.
+
+    uv run python -m storage.migrations.compress_content [--decompress]
+"""
+
+import argparse
+import logging
+
+from storage import get_database
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--decompress", action="store_true", help="store the content of all articles whole again")
+    arg_parser.add_argument("--batch-size", type=int, default=500, help="articles migrated per bulk write")
+    args = arg_parser.parse_args()
+
+    db = get_database()
+    try:
+        if args.decompress:
+            logging.info(f"Decompressed the content of {db.decompress_contents(batch_size=args.batch_size)} articles")
+        else:
+            logging.info(f"Compressed the content of {db.compress_contents(batch_size=args.batch_size)} articles")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Remove the articles stored more than once under the same URL, keeping their latest version, then create the indexes.
+Needed once on databases filled before URLs were unique, as `MongoRepository.ensure_indexes` refuses to.
+
+    uv run python -m storage.migrations.remove_duplicated_urls
+"""
+
+import argparse
+import logging
+
+from storage import get_database
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+
+    db = get_database()
+    try:
+        logging.info(f"Removed {db.remove_duplicated_urls()} duplicated articles")
+        db.ensure_indexes()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
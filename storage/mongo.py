@@ -1,49 +1,659 @@
+import itertools
 import os
-from collections.abc import Generator, Mapping
+import zlib
+from collections.abc import AsyncGenerator, Generator, Iterable, Mapping
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any
 
-from pymongo import MongoClient
+from bson import Binary, ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, AsyncMongoClient, IndexModel, MongoClient, ReturnDocument, UpdateOne
+from pymongo.asynchronous.cursor import AsyncCursor
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.cursor import Cursor
 from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
 
 from models.article import Article
+from storage.fingerprint import MIN_SHINGLES, Fingerprint, fingerprint
+from storage.monitoring import COMMAND_METRICS
+
+ARTICLE_INDEXES = [
+    IndexModel([("url", ASCENDING)], name="url_unique", unique=True),
+    IndexModel([("title", TEXT), ("content", TEXT)], name="title_content_text", weights={"title": 10, "content": 1}),
+    IndexModel([("date", DESCENDING), ("_id", DESCENDING)], name="date_id_desc"),
+    IndexModel(
+        [("_provider_key", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)],
+        name="provider_key_date_id_desc",
+    ),
+    IndexModel([("_ingested_at", ASCENDING)], name="ingested_at"),
+]
+CRAWL_URL_INDEXES = [
+    IndexModel([("run_id", ASCENDING), ("state", ASCENDING)], name="run_id_state"),
+    IndexModel([("state", ASCENDING), ("next_attempt_at", ASCENDING)], name="state_next_attempt_at"),
+    # URLs stored are only kept for a while, as a record of what was crawled
+    IndexModel(
+        [("updated_at", ASCENDING)],
+        name="stored_expiry",
+        expireAfterSeconds=7 * 24 * 3600,
+        partialFilterExpression={"state": "stored"},
+    ),
+]
+CRAWL_RUN_INDEXES = [
+    IndexModel([("started_at", DESCENDING)], name="started_at_desc"),
+    # runs finished are only kept for a while too: a daemon records one per poll; unfinished ones stay to be resumed
+    IndexModel([("finished_at", ASCENDING)], name="finished_expiry", expireAfterSeconds=30 * 24 * 3600),
+]
+INDEX_SCAN_STAGES = {"IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN", "EXPRESS_IXSCAN"}
+NEWEST_FIRST_SORT = [("date", DESCENDING), ("_id", DESCENDING)]  # deterministic, even among articles of the same date
+TEXT_SCORE_SORT = [("score", {"$meta": "textScore"})]  # most relevant first, for `$text` queries
+ARTICLE_FIELDS = ["url", "title", "date", "news_provided_by", "content", "last_modified"]
+CONTENT_LEAD_LENGTH = 2048  # characters of content compressed articles keep in plain text: more than any snippet
+INFLATE_BATCH_SIZE = 500  # compressed articles whose bodies are fetched at once
+
+
+def snippet_projection(length: int) -> dict[str, Any]:
+    """Projection of all article fields, with only the first `length` characters of the content, cut by MongoDB."""
+    return {field: True for field in ARTICLE_FIELDS} | {"content": {"$substrCP": ["$content", 0, length]}}
+
+
+def provider_key(provider: str) -> str:
+    """Normalized provider name, stored along each article so it can be matched exactly or by prefix on an index."""
+    return " ".join(provider.split()).casefold()
+
+
+class DuplicatedUrlsError(RuntimeError):
+    pass
+
+
+@dataclass
+class BulkWriteSummary:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other: "BulkWriteSummary") -> "BulkWriteSummary":
+        return BulkWriteSummary(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            unchanged=self.unchanged + other.unchanged,
+        )
 
 
 class MongoRepository:
-    def __init__(self, database_name: str, uri: str | None) -> None:
-        self._client: MongoClient = MongoClient(uri)
+    """
+    Articles are stored whole in the `articles` collection, unless `compress_content` is set: then articles longer
+    than `CONTENT_LEAD_LENGTH` only keep the beginning of their content there, and the whole of it is stored
+    compressed in `article_bodies`, keyed by URL. Article documents get much smaller, and so does the working set
+    of the queries on their metadata; the content is decompressed only when it's read whole.
+    Both kinds of articles are read the same way, whatever `compress_content`.
+    """
+
+    def __init__(self, database_name: str, uri: str | None, compress_content: bool = False) -> None:
+        self._client: MongoClient = MongoClient(uri, event_listeners=[COMMAND_METRICS])
         self._db: Database = self._client[database_name]
+        self.compress_content = compress_content
+
+    def close(self) -> None:
+        self._client.close()
+
+    def ensure_indexes(self) -> None:
+        articles_collection = self._db.articles
+        try:
+            articles_collection.create_indexes(ARTICLE_INDEXES)
+        except DuplicateKeyError as e:
+            raise DuplicatedUrlsError(
+                "Articles are stored more than once under the same URL, keep only their latest version first with: "
+                "python -m storage.migrations.remove_duplicated_urls"
+            ) from e
+        self._backfill_provider_keys()
+        self._db.crawl_urls.create_indexes(CRAWL_URL_INDEXES)
+        self._db.crawl_runs.create_indexes(CRAWL_RUN_INDEXES)
+
+    def _backfill_provider_keys(self) -> None:
+        articles_collection = self._db.articles
+        missing = articles_collection.find({"_provider_key": {"$exists": False}}, {"news_provided_by": True})
+        for batch in itertools.batched(missing, 500):
+            articles_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": article["_id"]},
+                        {"$set": {"_provider_key": provider_key(article.get("news_provided_by", ""))}},
+                    )
+                    for article in batch
+                ],
+                ordered=False,
+            )
+
+    def backfill_fingerprints(self, batch_size: int = 500) -> int:
+        """Fingerprint the whole content of the articles stored without a fingerprint, or its shingle count."""
+        articles_collection = self._db.articles
+        missing = articles_collection.find(
+            {"_shingles": {"$exists": False}}, {"url": True, "content": True, "_body_compressed": True}
+        )
+        backfilled = 0
+        for batch in itertools.batched(missing, batch_size):
+            articles_collection.bulk_write(
+                [
+                    UpdateOne({"_id": article["_id"]}, {"$set": _fingerprint_fields(article.get("content", ""))})
+                    for article in self._inflate(list(batch))
+                ],
+                ordered=False,
+            )
+            backfilled += len(batch)
+        return backfilled
+
+    def unmark_short_duplicates(self, min_shingles: int = MIN_SHINGLES) -> int:
+        """
+        Unmark the articles marked as duplicates while their content is too short to compare, e.g. empty:
+        they were, before `DuplicateIndex` ignored such contents. Returns how many.
+        """
+        return self._db.articles.update_many(
+            {"_shingles": {"$lt": min_shingles}, "_duplicate_of": {"$ne": None}}, {"$set": {"_duplicate_of": None}}
+        ).modified_count
+
+    def explain_articles_query(self, query: dict[str, Any], sort: list[tuple[str, Any]] | None = None) -> dict:
+        articles_cursor: Cursor = self._db.articles.find(query)
+        if sort:
+            articles_cursor = articles_cursor.sort(sort)
+        return articles_cursor.explain()
+
+    def used_indexes(self, query: dict[str, Any], sort: list[tuple[str, Any]] | None = None) -> set[str]:
+        """Names of the indexes read by the winning plan of an articles query; empty for a collection scan."""
+        winning_plan = self.explain_articles_query(query, sort=sort)["queryPlanner"]["winningPlan"]
+        return set(_index_names(winning_plan))
+
+    def remove_duplicated_urls(self) -> int:
+        """Delete all but the latest ingested version of articles stored more than once under a URL; returns how many."""
+        articles_collection = self._db.articles
+        duplicates = articles_collection.aggregate(
+            [
+                {"$sort": {"_ingested_at": -1}},
+                {"$group": {"_id": "$url", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": 1}}},
+            ]
+        )
+        removed = 0
+        for duplicate in duplicates:
+            removed += articles_collection.delete_many({"_id": {"$in": duplicate["ids"][1:]}}).deleted_count
+        return removed
 
     def save_article(self, article: Article) -> Mapping:
         articles_collection = self._db.articles
-        document = article.model_dump() | {"_ingested_at": datetime.now(UTC)}
-        result = articles_collection.insert_one(document)
-        return result.inserted_id
+        if self._is_compressed(article):
+            self._db.article_bodies.update_one(*self._body_update(article), upsert=True)
+        result = articles_collection.find_one_and_update(
+            {"url": article.url},
+            self._upsert_update(article),
+            projection={"_id": True},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return result["_id"]
+
+    def save_articles(self, articles: Iterable[Article], batch_size: int = 500) -> BulkWriteSummary:
+        """
+        Upsert articles by URL, in unordered bulk writes of `batch_size` articles.
+        Saving an article that is already stored and did not change is a no-op.
+        """
+        articles_collection = self._db.articles
+        summary = BulkWriteSummary()
+        for batch in itertools.batched(articles, batch_size):
+            latest_by_url = {article.url: article for article in batch}
+            # bodies first, so that articles are never read as compressed before their body is stored
+            bodies = [
+                UpdateOne(*self._body_update(article), upsert=True)
+                for article in latest_by_url.values()
+                if self._is_compressed(article)
+            ]
+            if bodies:
+                self._db.article_bodies.bulk_write(bodies, ordered=False)
+            operations = [
+                UpdateOne({"url": url}, self._upsert_update(article), upsert=True)
+                for url, article in latest_by_url.items()
+            ]
+            result = articles_collection.bulk_write(operations, ordered=False)
+            summary += BulkWriteSummary(
+                inserted=result.upserted_count,
+                updated=result.modified_count,
+                unchanged=result.matched_count - result.modified_count + len(batch) - len(latest_by_url),
+            )
+        return summary
+
+    def _upsert_update(self, article: Article) -> dict[str, Any]:
+        # articles parsed without a sitemap hint (e.g. re-parsed offline) keep the modification date already stored
+        exclude = {"last_modified"} if article.last_modified is None else None
+        derived_fields = {
+            "_provider_key": provider_key(article.news_provided_by),
+            "_duplicate_of": article.duplicate_of,
+            **_fingerprint_fields(article.content),
+        }
+        update = {
+            "$set": article.model_dump(exclude=exclude) | derived_fields,
+            "$setOnInsert": {"_ingested_at": datetime.now(UTC)},
+        }
+        if self._is_compressed(article):
+            update["$set"] |= {"content": article.content[:CONTENT_LEAD_LENGTH], "_body_compressed": True}
+        else:
+            update["$unset"] = {"_body_compressed": ""}
+        return update
+
+    def _is_compressed(self, article: Article) -> bool:
+        return self.compress_content and len(article.content) > CONTENT_LEAD_LENGTH
+
+    @staticmethod
+    def _body_update(article: Article) -> tuple[dict[str, Any], dict[str, Any]]:
+        return {"_id": article.url}, {"$set": {"content": _compress(article.content)}}
+
+    def compress_contents(self, batch_size: int = 500) -> int:
+        """Move the content of long articles stored whole to compressed bodies, see the class; returns how many."""
+        articles_collection = self._db.articles
+        stored_whole = articles_collection.find({"_body_compressed": {"$ne": True}}, {"url": True, "content": True})
+        long_articles = (article for article in stored_whole if len(article.get("content", "")) > CONTENT_LEAD_LENGTH)
+        compressed = 0
+        for batch in itertools.batched(long_articles, batch_size):
+            self._db.article_bodies.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": article["url"]}, {"$set": {"content": _compress(article["content"])}}, upsert=True
+                    )
+                    for article in batch
+                ],
+                ordered=False,
+            )
+            articles_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": article["_id"]},
+                        {"$set": {"content": article["content"][:CONTENT_LEAD_LENGTH], "_body_compressed": True}},
+                    )
+                    for article in batch
+                ],
+                ordered=False,
+            )
+            compressed += len(batch)
+        return compressed
 
-    def get_articles(self, query: dict[str, Any], skip: int = 0, limit: int = 50) -> Generator[Article]:
+    def decompress_contents(self, batch_size: int = 500) -> int:
+        """Store the content of compressed articles whole again; returns how many."""
         articles_collection = self._db.articles
-        articles_cursor: Cursor = articles_collection.find(query).skip(skip).limit(limit)
+        compressed_articles = articles_collection.find(
+            {"_body_compressed": True}, {"url": True, "_body_compressed": True}
+        )
+        decompressed = 0
+        for batch in itertools.batched(compressed_articles, batch_size):
+            articles = self._inflate(list(batch))
+            articles_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": article["_id"]},
+                        {"$set": {"content": article.get("content", "")}, "$unset": {"_body_compressed": ""}},
+                    )
+                    for article in articles
+                ],
+                ordered=False,
+            )
+            self._db.article_bodies.delete_many({"_id": {"$in": [article["url"] for article in batch]}})
+            decompressed += len(batch)
+        return decompressed
+
+    def _inflate(self, articles: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Put the whole content back in the compressed articles among `articles`."""
+        urls = [article["url"] for article in articles if article.get("_body_compressed")]
+        if urls:
+            _put_bodies_back(articles, bodies=self._db.article_bodies.find({"_id": {"$in": urls}}))
+        return articles
+
+    def get_url_index(self) -> dict[str, datetime | None]:
+        """Map every stored article URL to when it was last modified (or ingested, if unknown)."""
+        articles_collection = self._db.articles
+        projection = {"_id": False, "url": True, "last_modified": True, "_ingested_at": True}
+        articles_cursor: Cursor = articles_collection.find({}, projection=projection, batch_size=10_000)
+        return {
+            article["url"]: article.get("last_modified") or article.get("_ingested_at") for article in articles_cursor
+        }
+
+    def get_fingerprints(self, since: datetime) -> Generator[tuple[str, Fingerprint]]:
+        """URL and content fingerprint of every article published since `since`, but those duplicating another."""
+        articles_cursor: Cursor = self._db.articles.find(
+            {"date": {"$gte": since}, "_duplicate_of": None, "_content_hash": {"$exists": True}},
+            {"_id": False, "url": True, "_content_hash": True, "_simhash": True, "_shingles": True},
+            batch_size=10_000,
+        )
         for article in articles_cursor:
-            yield Article(
-                title=article.get("title", ""),
-                content=article.get("content", ""),
-                url=article.get("url", ""),
-                date=article.get("date"),
-                news_provided_by=article.get("news_provided_by", ""),
+            yield (
+                article["url"],
+                Fingerprint(
+                    content_hash=article["_content_hash"],
+                    simhash=article["_simhash"] & _UINT64_MASK,
+                    shingles=article.get("_shingles", 0),
+                ),
             )
 
+    def get_last_crawl_at(self) -> datetime | None:
+        """When the last successful crawl started."""
+        state = self._db.meta.find_one({"_id": "last_crawl"})
+        return state["started_at"] if state else None
+
+    def set_last_crawl_at(self, started_at: datetime) -> None:
+        self._db.meta.update_one({"_id": "last_crawl"}, {"$set": {"started_at": started_at}}, upsert=True)
+
+    def start_crawl_run(self, engine: str) -> str:
+        run_id = str(ObjectId())
+        self._db.crawl_runs.insert_one(
+            {"_id": run_id, "engine": engine, "started_at": datetime.now(UTC), "status": "running"}
+        )
+        return run_id
+
+    def finish_crawl_run(self, run_id: str, completed: bool) -> None:
+        self._db.crawl_runs.update_one(
+            {"_id": run_id},
+            {"$set": {"status": "completed" if completed else "failed", "finished_at": datetime.now(UTC)}},
+        )
+
+    def get_unfinished_crawl_run(self) -> Mapping | None:
+        """The last crawl run, unless it completed: it failed, or is still running, or died before it could tell."""
+        last_run = self._db.crawl_runs.find_one({}, sort=[("started_at", DESCENDING)])
+        return last_run if last_run and last_run["status"] != "completed" else None
+
+    def record_url_states(self, run_id: str, states: Mapping[str, Mapping[str, Any]]) -> None:
+        """Record the state of crawled URLs (and whatever goes along), by URL."""
+        updated_at = datetime.now(UTC)
+        self._db.crawl_urls.bulk_write(
+            [
+                UpdateOne({"_id": url}, {"$set": {**fields, "run_id": run_id, "updated_at": updated_at}}, upsert=True)
+                for url, fields in states.items()
+            ],
+            ordered=False,
+        )
+
+    def get_url_states(self, run_id: str, states: Iterable[str]) -> Generator[Mapping]:
+        yield from self._db.crawl_urls.find({"run_id": run_id, "state": {"$in": list(states)}})
+
+    def get_failed_urls(self) -> dict[str, tuple[int, datetime | None]]:
+        """Map every URL that failed to be crawled to its number of attempts, and when to try it again, if ever."""
+        failed = self._db.crawl_urls.find({"state": "failed"}, {"attempts": True, "next_attempt_at": True})
+        return {state["_id"]: (state.get("attempts", 1), state.get("next_attempt_at")) for state in failed}
+
+    def bump_generation(self) -> int:
+        """Mark the articles as changed, so whatever was derived from them (e.g. cached responses) is stale."""
+        state = self._db.meta.find_one_and_update(
+            {"_id": "generation"}, {"$inc": {"value": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return state["value"]
+
+    def get_articles(
+        self,
+        query: dict[str, Any],
+        skip: int = 0,
+        limit: int = 50,
+        sort: list[tuple[str, Any]] | None = None,
+        projection: Mapping[str, Any] | None = None,
+    ) -> Generator[Article]:
+        articles_collection = self._db.articles
+        projection, whole_content = _whole_content_projection(projection)
+        articles_cursor: Cursor = articles_collection.find(query, projection).skip(skip).limit(limit)
+        if sort:
+            articles_cursor = articles_cursor.sort(sort)
+        for batch in itertools.batched(articles_cursor, INFLATE_BATCH_SIZE):
+            for article in self._inflate(list(batch)) if whole_content else batch:
+                yield _to_article(article)
+
+    def get_article(self, article_id: str) -> Article | None:
+        if not ObjectId.is_valid(article_id):
+            return None
+        article = self._db.articles.find_one({"_id": ObjectId(article_id)})
+        return _to_article(self._inflate([article])[0]) if article else None
+
+
+class AsyncMongoRepository:
+    """
+    Read side of `MongoRepository` for async code, such as the API.
+    Its client holds a connection pool and monitoring tasks: create one per process, and share it.
+    """
+
+    def __init__(self, database_name: str, uri: str | None) -> None:
+        self._client: AsyncMongoClient = AsyncMongoClient(uri, event_listeners=[COMMAND_METRICS])
+        self._db: AsyncDatabase = self._client[database_name]
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    async def get_articles(
+        self,
+        query: dict[str, Any],
+        skip: int = 0,
+        limit: int = 50,
+        sort: list[tuple[str, Any]] | None = None,
+        projection: Mapping[str, Any] | None = None,
+    ) -> AsyncGenerator[Article]:
+        async for article in self.find_articles(query, skip=skip, limit=limit, sort=sort, projection=projection):
+            yield _to_article(article)
+
+    async def find_articles(
+        self,
+        query: dict[str, Any],
+        skip: int = 0,
+        limit: int = 50,
+        sort: list[tuple[str, Any]] | None = None,
+        projection: Mapping[str, Any] | None = None,
+        batch_size: int | None = None,
+    ) -> AsyncGenerator[dict[str, Any]]:
+        """
+        Like `get_articles`, but the raw documents, for paths too hot to build a model for each.
+        A `limit` of 0 returns all the articles matching, fetched `batch_size` at a time.
+        """
+        projection, whole_content = _whole_content_projection(projection)
+        articles_cursor: AsyncCursor = self._db.articles.find(query, projection).skip(skip).limit(limit)
+        if sort:
+            articles_cursor = articles_cursor.sort(sort)
+        if batch_size:
+            articles_cursor = articles_cursor.batch_size(batch_size)
+        if not whole_content:
+            async for article in articles_cursor:
+                yield article
+            return
+
+        batch = []
+        async for article in articles_cursor:
+            batch.append(article)
+            if len(batch) == INFLATE_BATCH_SIZE:
+                for inflated in await self._inflate(batch):
+                    yield inflated
+                batch = []
+        for inflated in await self._inflate(batch):
+            yield inflated
+
+    async def count_by_provider(self, query: dict[str, Any], limit: int = 50) -> list[dict[str, Any]]:
+        """Number of articles matching `query` of each provider, those with the most first."""
+        pipeline = [{"$match": query}, *_provider_count_stages(limit)]
+        return await (await self._db.articles.aggregate(pipeline)).to_list()
+
+    async def find_articles_with_counts(
+        self,
+        query: dict[str, Any],
+        page_query: dict[str, Any] | None = None,
+        skip: int = 0,
+        limit: int = 50,
+        sort: list[tuple[str, Any]] | None = None,
+        projection: Mapping[str, Any] | None = None,
+        count: bool = False,
+        count_limit: int | None = None,
+        provider_counts: int = 0,
+    ) -> dict[str, Any]:
+        """
+        A page of raw documents, like `find_articles`, along with counts over all the articles matching `query`,
+        in a single aggregation scanning them once: their `total` if `count` (up to `count_limit`),
+        and their number of each of the top `provider_counts` providers. `page_query` only narrows the page down.
+        The documents of the page are then read by id.
+        """
+        items: list[dict[str, Any]] = [{"$skip": skip}]
+        if page_query:
+            items.insert(0, {"$match": page_query})
+        if limit:
+            items.append({"$limit": limit})
+        # only the ids: the facets are returned as a single document, capped at 16 MB however large the articles are
+        items.append({"$project": {"_id": True}})
+        facets = {"items": items}
+        if count:
+            facets["total"] = [*([{"$limit": count_limit}] if count_limit else []), {"$count": "count"}]
+        if provider_counts:
+            facets["providers"] = _provider_count_stages(provider_counts)
+
+        pipeline: list[dict[str, Any]] = [{"$match": query}]
+        if sort:
+            pipeline.append({"$sort": dict(sort)})  # before the facets, so it's read in order from the index
+        pipeline.append({"$facet": facets})
+        [result] = await (await self._db.articles.aggregate(pipeline)).to_list()
+
+        ids = [item["_id"] for item in result["items"]]
+        documents = {
+            document["_id"]: document
+            async for document in self.find_articles({"_id": {"$in": ids}}, limit=0, projection=projection)
+        }
+        return {
+            "items": [documents[article_id] for article_id in ids if article_id in documents],  # unless just deleted
+            "total": (result["total"][0]["count"] if result["total"] else 0) if count else None,
+            "providers": result["providers"] if provider_counts else None,
+        }
+
+    async def estimate_articles_count(self) -> int:
+        """Number of all the articles, from the collection metadata: no scan, but may be off after an unclean shutdown."""
+        return await self._db.articles.estimated_document_count()
+
+    async def count_by_date(self, query: dict[str, Any], unit: str = "day") -> list[dict[str, Any]]:
+        """Number of articles matching `query` in each `unit` (day, week, month or year) of time, oldest first."""
+        bucket = {"date": "$date", "unit": unit, "startOfWeek": "monday"}
+        pipeline = [
+            {"$match": query},
+            {"$group": {"_id": {"$dateTrunc": bucket}, "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": False, "date": "$_id", "count": True}},
+        ]
+        return await (await self._db.articles.aggregate(pipeline)).to_list()
+
+    async def get_generation(self) -> int:
+        """Bumped whenever the articles change, see `MongoRepository.bump_generation`."""
+        state = await self._db.meta.find_one({"_id": "generation"})
+        return state["value"] if state else 0
+
+    async def get_article(self, article_id: str) -> Article | None:
+        if not ObjectId.is_valid(article_id):
+            return None
+        article = await self._db.articles.find_one({"_id": ObjectId(article_id)})
+        return _to_article((await self._inflate([article]))[0]) if article else None
+
+    async def _inflate(self, articles: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """See `MongoRepository._inflate`."""
+        urls = [article["url"] for article in articles if article.get("_body_compressed")]
+        if urls:
+            bodies = await self._db.article_bodies.find({"_id": {"$in": urls}}).to_list()
+            _put_bodies_back(articles, bodies=bodies)
+        return articles
+
+
+def _to_article(article: Mapping[str, Any]) -> Article:
+    return Article(
+        id=str(article["_id"]),
+        title=article.get("title", ""),
+        content=article.get("content", ""),
+        url=article.get("url", ""),
+        date=article.get("date"),
+        news_provided_by=article.get("news_provided_by", ""),
+        last_modified=article.get("last_modified"),
+        duplicate_of=article.get("_duplicate_of"),
+    )
+
+
+def _whole_content_projection(projection: Mapping[str, Any] | None) -> tuple[Mapping[str, Any] | None, bool]:
+    """Whether a projection reads the whole content, and the projection to read it with from compressed articles."""
+    if projection is None:
+        return None, True
+    if projection.get("content") is True:  # rather than a part of it
+        return {**projection, "url": True, "_body_compressed": True}, True
+    return projection, False
+
+
+def _put_bodies_back(articles: list[dict[str, Any]], bodies: Iterable[Mapping[str, Any]]) -> None:
+    contents = {body["_id"]: _decompress(body["content"]) for body in bodies}
+    for article in articles:
+        if article.get("_body_compressed") and article["url"] in contents:
+            article["content"] = contents[article["url"]]
+
+
+def _compress(content: str) -> Binary:
+    return Binary(zlib.compress(content.encode()))
+
+
+def _decompress(body: bytes) -> str:
+    return zlib.decompress(body).decode()
+
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def _fingerprint_fields(content: str) -> dict[str, Any]:
+    content_fingerprint = fingerprint(content)
+    simhash = content_fingerprint.simhash
+    return {
+        "_content_hash": content_fingerprint.content_hash,
+        "_simhash": simhash - (1 << 64) if simhash > _UINT64_MASK >> 1 else simhash,  # as a signed int64 for BSON
+        "_shingles": content_fingerprint.shingles,
+    }
+
+
+def _provider_count_stages(limit: int) -> list[dict[str, Any]]:
+    return [
+        # grouped on the normalized name, so "ACME Inc." and "Acme  Inc." count as one
+        {
+            "$group": {
+                "_id": "$_provider_key",
+                "news_provided_by": {"$first": "$news_provided_by"},
+                "count": {"$sum": 1},
+            }
+        },
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": False, "news_provided_by": True, "count": True}},
+    ]
+
+
+def _index_names(plan: Any) -> Generator[str]:
+    # plans are trees of stages; the slot-based engine nests them under "queryPlan"
+    if isinstance(plan, Mapping):
+        if plan.get("stage") in INDEX_SCAN_STAGES and "indexName" in plan:
+            yield plan["indexName"]
+        for value in plan.values():
+            yield from _index_names(value)
+    elif isinstance(plan, list):
+        for stage in plan:
+            yield from _index_names(stage)
+
 
 def get_database(
     database_name: str | None = None,
     uri: str | None = None,
+    compress_content: bool | None = None,
 ) -> MongoRepository:
     db_name = database_name or os.getenv("MONGO_DATABASE")
     if not db_name:
         db_name = "wire-scout"
 
     mongo_uri = uri or os.getenv("MONGO_URI")
+    if compress_content is None:
+        compress_content = os.getenv("MONGO_COMPRESS_CONTENT", "").lower() in {"1", "true", "yes"}
     return MongoRepository(
         database_name=db_name,
         uri=mongo_uri,
+        compress_content=compress_content,
+    )
+
+
+def get_async_database(
+    database_name: str | None = None,
+    uri: str | None = None,
+) -> AsyncMongoRepository:
+    return AsyncMongoRepository(
+        database_name=database_name or os.getenv("MONGO_DATABASE") or "wire-scout",
+        uri=uri or os.getenv("MONGO_URI"),
     )
@@ -0,0 +1,61 @@
+import threading
+from typing import Any
+
+from pymongo import monitoring
+
+from metrics import REGISTRY
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "mongo_command_duration_seconds",
+    "Time taken by MongoDB commands, round trip included.",
+    labels=["command", "collection"],
+)
+DOCUMENTS_RETURNED = REGISTRY.histogram(
+    "mongo_documents_returned",
+    "Documents returned by each batch of MongoDB queries (find, aggregate and getMore commands).",
+    labels=["command", "collection"],
+    buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10_000),
+)
+COMMAND_FAILURES = REGISTRY.counter(
+    "mongo_command_failures_total",
+    "MongoDB commands that failed, by error code name.",
+    labels=["command", "collection", "reason"],
+)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Driver listener recording how long every MongoDB command takes, and how many documents queries return.
+    Pass it to clients as one of their `event_listeners`; callbacks are synchronous, for async clients too.
+    """
+
+    def __init__(self) -> None:
+        self._collections: dict[tuple[Any, int], str] = {}  # of the commands in flight, by connection and request
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        # a getMore names the cursor it continues, and its collection aside
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        with self._lock:
+            self._collections[event.connection_id, event.request_id] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        labels = {"command": event.command_name, "collection": self._collection(event)}
+        COMMAND_SECONDS.observe(event.duration_micros / 1_000_000, **labels)
+        cursor = event.reply.get("cursor")
+        if isinstance(cursor, dict):
+            batch = cursor.get("firstBatch", cursor.get("nextBatch", ()))
+            DOCUMENTS_RETURNED.observe(len(batch), **labels)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        labels = {"command": event.command_name, "collection": self._collection(event)}
+        COMMAND_SECONDS.observe(event.duration_micros / 1_000_000, **labels)
+        reason = event.failure.get("codeName", "unknown")
+        COMMAND_FAILURES.inc(reason=reason, **labels)
+
+    def _collection(self, event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent) -> str:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), "")
+
+
+COMMAND_METRICS = CommandMetrics()
@@ -0,0 +1,35 @@
+import unittest
+
+from models.tests.factories import press_release_content, revised
+from storage.fingerprint import fingerprint
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.content = press_release_content()
+
+    def test_same_content(self):
+        reformatted = "  " + self.content.upper().replace(" ", "\n ").replace(".", " . ")
+
+        self.assertEqual(fingerprint(self.content), fingerprint(reformatted))
+
+    def test_nearly_the_same_content(self):
+        original, revision = fingerprint(self.content), fingerprint(revised(self.content))
+
+        self.assertNotEqual(original.content_hash, revision.content_hash)
+        self.assertLessEqual(original.distance(revision), 7)
+
+    def test_different_content(self):
+        original, other = fingerprint(self.content), fingerprint(press_release_content(seed=1))
+
+        self.assertNotEqual(original.content_hash, other.content_hash)
+        self.assertGreater(original.distance(other), 7)
+
+    def test_shingles(self):
+        self.assertEqual(3, fingerprint("Acme announces its results today").shingles)
+        self.assertEqual(1, fingerprint("Acme").shingles)
+
+    def test_empty_content(self):
+        self.assertEqual(0, fingerprint("").simhash)
+        self.assertEqual(0, fingerprint("").shingles)
+        self.assertEqual(fingerprint(""), fingerprint(" . "))
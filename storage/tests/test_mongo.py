@@ -1,14 +1,27 @@
 import unittest
+from datetime import UTC, datetime
+
+from pymongo.errors import DuplicateKeyError
 
 from models.article import Article
-from models.tests.factories import ArticleFactory
-from storage.mongo import get_database
+from models.tests.factories import ArticleFactory, press_release_content
+from storage.fingerprint import fingerprint
+from storage.mongo import (
+    ARTICLE_FIELDS,
+    CONTENT_LEAD_LENGTH,
+    NEWEST_FIRST_SORT,
+    BulkWriteSummary,
+    DuplicatedUrlsError,
+    get_async_database,
+    get_database,
+)
 
 
 class TestMongoRepository(unittest.TestCase):
     def setUp(self):
         self.repo = get_database()
         self.addCleanup(self.repo._db.articles.drop)
+        self.addCleanup(self.repo._db.meta.drop)
 
     def assertNumberOfArticles(self, expected_count: int):
         actual_count = self.repo._db.articles.count_documents({})
@@ -39,6 +52,146 @@ class TestMongoRepository(unittest.TestCase):
 
         self.assertNumberOfArticles(expected_count=10)
 
+    def test_save_article_twice(self):
+        article = ArticleFactory.build()
+
+        first_id = self.repo.save_article(article=article)
+        updated_article = article.model_copy(update={"title": "Updated title"})
+        second_id = self.repo.save_article(article=updated_article)
+
+        self.assertEqual(first_id, second_id)
+        self.assertNumberOfArticles(expected_count=1)
+        self.assertArticleSaved(article=updated_article)
+
+    def test_save_articles_in_bulk(self):
+        articles = ArticleFactory.build_batch(size=10)
+
+        summary = self.repo.save_articles(articles, batch_size=3)
+
+        self.assertEqual(BulkWriteSummary(inserted=10), summary)
+        self.assertNumberOfArticles(expected_count=10)
+        for article in articles:
+            self.assertArticleSaved(article=article)
+
+    def test_save_articles_again(self):
+        articles = ArticleFactory.build_batch(size=5)
+        self.repo.save_articles(articles)
+
+        updated_article = articles[0].model_copy(update={"content": "Updated content"})
+        new_article = ArticleFactory.build()
+        summary = self.repo.save_articles([updated_article, *articles[1:], new_article], batch_size=2)
+
+        self.assertEqual(BulkWriteSummary(inserted=1, updated=1, unchanged=4), summary)
+        self.assertNumberOfArticles(expected_count=6)
+        self.assertArticleSaved(article=updated_article)
+
+    def test_save_articles_without_last_modified(self):
+        last_modified = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        article = ArticleFactory.create(last_modified=last_modified)
+
+        self.repo.save_articles([article.model_copy(update={"last_modified": None, "title": "Re-parsed"})])
+
+        saved_article = self.repo._db.articles.find_one({"url": article.url})
+        self.assertEqual("Re-parsed", saved_article["title"])
+        self.assertEqual(last_modified.replace(tzinfo=None), saved_article["last_modified"])
+
+    def test_ensure_indexes_with_duplicated_urls(self):
+        article = ArticleFactory.build()
+        self.repo._db.articles.insert_many(
+            [
+                article.model_dump() | {"_ingested_at": datetime(2024, 1, 1, tzinfo=UTC)},
+                article.model_dump() | {"title": "Latest", "_ingested_at": datetime(2024, 1, 2, tzinfo=UTC)},
+            ]
+        )
+
+        with self.assertRaises(DuplicatedUrlsError):  # never deleting anything on its own
+            self.repo.ensure_indexes()
+        self.assertNumberOfArticles(expected_count=2)
+
+        self.assertEqual(1, self.repo.remove_duplicated_urls())
+        self.repo.ensure_indexes()
+
+        self.assertNumberOfArticles(expected_count=1)
+        self.assertEqual("Latest", self.repo._db.articles.find_one({"url": article.url})["title"])
+        with self.assertRaises(DuplicateKeyError):
+            self.repo._db.articles.insert_one(article.model_dump())
+
+    def test_ensure_indexes(self):
+        self.repo.ensure_indexes()
+        self.repo.ensure_indexes()  # idempotent
+
+        self.assertLessEqual(
+            {"url_unique", "title_content_text", "date_id_desc", "provider_key_date_id_desc", "ingested_at"},
+            set(self.repo._db.articles.index_information()),
+        )
+        crawl_run_indexes = self.repo._db.crawl_runs.index_information()
+        self.assertEqual(30 * 24 * 3600, crawl_run_indexes["finished_expiry"]["expireAfterSeconds"])
+
+    def test_ensure_indexes_backfills_provider_keys(self):
+        self.repo._db.articles.insert_one(ArticleFactory.build(news_provided_by=" Acme  Inc. ").model_dump())
+
+        self.repo.ensure_indexes()
+
+        self.assertEqual("acme inc.", self.repo._db.articles.find_one()["_provider_key"])
+
+    def test_backfill_fingerprints(self):
+        self.repo._db.articles.insert_one(ArticleFactory.build(content="Acme announces results").model_dump())
+
+        self.repo.ensure_indexes()  # left to the migration, as it reads every article
+        self.assertNotIn("_content_hash", self.repo._db.articles.find_one())
+        self.assertEqual(1, self.repo.backfill_fingerprints())
+        self.assertEqual(0, self.repo.backfill_fingerprints())
+
+        stored = self.repo._db.articles.find_one()
+        self.assertEqual(fingerprint("Acme announces results").content_hash, stored["_content_hash"])
+        self.assertIn("_simhash", stored)
+        self.assertEqual(1, stored["_shingles"])
+
+    def test_unmark_short_duplicates(self):
+        original = ArticleFactory.create(content=press_release_content())
+        ArticleFactory.create(content="", duplicate_of=original.url)
+        republished = ArticleFactory.create(content=original.content, duplicate_of=original.url)
+
+        self.assertEqual(1, self.repo.unmark_short_duplicates())
+
+        self.assertEqual(
+            [original.url],
+            [article["_duplicate_of"] for article in self.repo._db.articles.find({"_duplicate_of": {"$ne": None}})],
+        )
+        self.assertEqual(original.url, self.repo._db.articles.find_one({"url": republished.url})["_duplicate_of"])
+
+    def test_get_fingerprints(self):
+        content = press_release_content()
+        original = ArticleFactory.create(content=content, date=datetime(2024, 1, 2))  # noqa: DTZ001
+        ArticleFactory.create(content=content, date=datetime(2024, 1, 3), duplicate_of=original.url)  # noqa: DTZ001
+        ArticleFactory.create(date=datetime(2023, 12, 31))  # noqa: DTZ001
+
+        fingerprints = list(self.repo.get_fingerprints(since=datetime(2024, 1, 1, tzinfo=UTC)))
+
+        self.assertEqual([(original.url, fingerprint(content))], fingerprints)  # unsigned again
+
+    def test_get_url_index(self):
+        last_modified = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        modified_article = ArticleFactory.create(last_modified=last_modified)
+        legacy_article = ArticleFactory.create()
+
+        url_index = self.repo.get_url_index()
+
+        self.assertEqual(2, len(url_index))
+        self.assertEqual(last_modified.replace(tzinfo=None), url_index[modified_article.url])
+        self.assertIsNotNone(url_index[legacy_article.url])  # falls back to the ingestion time
+
+    def test_last_crawl_at(self):
+        self.assertIsNone(self.repo.get_last_crawl_at())
+
+        for started_at in (datetime(2024, 1, 1, tzinfo=UTC), datetime(2024, 1, 2, tzinfo=UTC)):
+            self.repo.set_last_crawl_at(started_at)
+            self.assertEqual(started_at.replace(tzinfo=None), self.repo.get_last_crawl_at())
+
+    def test_bump_generation(self):
+        self.assertEqual(1, self.repo.bump_generation())
+        self.assertEqual(2, self.repo.bump_generation())
+
     def test_get_articles(self):
         articles = ArticleFactory.create_batch(size=5)
         self.assertNumberOfArticles(5)
@@ -60,3 +213,171 @@ class TestMongoRepository(unittest.TestCase):
             retrieved_articles = list(self.repo.get_articles(query={}, skip=2, limit=2))
             self.assertEqual(len(retrieved_articles), 2)
             self.assertArticlesEqual(retrieved_articles, articles[2:4])
+
+
+class TestCompressedContent(unittest.TestCase):
+    def setUp(self):
+        self.repo = get_database(compress_content=True)
+        self.addCleanup(self.repo._db.articles.drop)
+        self.addCleanup(self.repo._db.article_bodies.drop)
+        self.long_article = ArticleFactory.build(content=press_release_content(paragraphs=60))
+        self.short_article = ArticleFactory.build(content="Acme announces results")
+
+    def test_save_articles(self):
+        self.assertEqual(BulkWriteSummary(inserted=2), self.repo.save_articles([self.long_article, self.short_article]))
+        self.repo.save_article(self.long_article)
+
+        stored = self.repo._db.articles.find_one({"url": self.long_article.url})
+        self.assertTrue(stored["_body_compressed"])
+        self.assertEqual(self.long_article.content[:CONTENT_LEAD_LENGTH], stored["content"])
+        self.assertEqual(1, self.repo._db.article_bodies.count_documents({}))  # short articles are stored whole
+        self.assertNotIn("_body_compressed", self.repo._db.articles.find_one({"url": self.short_article.url}))
+
+        with self.subTest("Saved again"):
+            summary = self.repo.save_articles([self.long_article, self.short_article])
+            self.assertEqual(BulkWriteSummary(unchanged=2), summary)
+
+    def test_get_articles(self):
+        self.repo.save_articles([self.long_article, self.short_article])
+
+        self.assertEqual(
+            {self.long_article.url: self.long_article.content, self.short_article.url: self.short_article.content},
+            {article.url: article.content for article in self.repo.get_articles(query={})},
+        )
+        metadata = {field: True for field in ARTICLE_FIELDS if field != "content"}
+        [article] = self.repo.get_articles(query={"url": self.long_article.url}, projection=metadata)
+        self.assertEqual("", article.content)  # not read, so not decompressed
+
+        stored_id = self.repo._db.articles.find_one({"url": self.long_article.url})["_id"]
+        self.assertEqual(self.long_article.content, self.repo.get_article(str(stored_id)).content)
+
+    def test_save_articles_uncompressed(self):
+        self.repo.save_articles([self.long_article])
+
+        get_database(compress_content=False).save_articles([self.long_article])
+
+        stored = self.repo._db.articles.find_one()
+        self.assertEqual(self.long_article.content, stored["content"])
+        self.assertNotIn("_body_compressed", stored)
+        self.assertEqual(self.long_article.content, next(self.repo.get_articles(query={})).content)
+
+    def test_backfill_fingerprints(self):
+        self.repo.save_articles([self.long_article])
+        self.repo._db.articles.update_many({}, {"$unset": {"_content_hash": "", "_simhash": "", "_shingles": ""}})
+
+        self.repo.backfill_fingerprints()
+
+        # of the whole content, not only the part kept in plain text
+        stored = self.repo._db.articles.find_one()
+        self.assertEqual(fingerprint(self.long_article.content).content_hash, stored["_content_hash"])
+
+    def test_compress_and_decompress_contents(self):
+        plain_repo = get_database(compress_content=False)
+        plain_repo.save_articles([self.long_article, self.short_article])
+
+        self.assertEqual(1, self.repo.compress_contents())
+        self.assertEqual(0, self.repo.compress_contents())  # idempotent
+        self.assertTrue(self.repo._db.articles.find_one({"url": self.long_article.url})["_body_compressed"])
+        self.assertEqual(
+            self.long_article.content, next(self.repo.get_articles({"url": self.long_article.url})).content
+        )
+
+        self.assertEqual(1, self.repo.decompress_contents())
+        stored = self.repo._db.articles.find_one({"url": self.long_article.url})
+        self.assertEqual(self.long_article.content, stored["content"])
+        self.assertNotIn("_body_compressed", stored)
+        self.assertEqual(0, self.repo._db.article_bodies.count_documents({}))
+
+
+class TestAsyncMongoRepository(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.addCleanup(get_database()._db.articles.drop)
+        self.repo = get_async_database()
+        self.addAsyncCleanup(self.repo.close)
+
+    async def test_get_articles(self):
+        articles = ArticleFactory.create_batch(size=5)
+
+        retrieved_articles = [article async for article in self.repo.get_articles(query={}, sort=NEWEST_FIRST_SORT)]
+
+        self.assertEqual(
+            [article.url for article in sorted(articles, key=lambda article: article.date, reverse=True)],
+            [article.url for article in retrieved_articles],
+        )
+        self.assertTrue(all(article.id for article in retrieved_articles))
+
+        with self.subTest("With skip and limit"):
+            retrieved_articles = [article async for article in self.repo.get_articles(query={}, skip=2, limit=2)]
+            self.assertEqual(
+                [article.url for article in articles[2:4]], [article.url for article in retrieved_articles]
+            )
+
+    async def test_count_by_provider(self):
+        ArticleFactory.create_batch(size=2, news_provided_by="Acme Inc.")
+        ArticleFactory.create(news_provided_by="Noise Corp.")
+
+        self.assertEqual(
+            [{"news_provided_by": "Acme Inc.", "count": 2}, {"news_provided_by": "Noise Corp.", "count": 1}],
+            await self.repo.count_by_provider(query={}),
+        )
+        self.assertEqual(
+            [{"news_provided_by": "Acme Inc.", "count": 2}], await self.repo.count_by_provider(query={}, limit=1)
+        )
+
+    async def test_find_articles_with_counts(self):
+        articles = ArticleFactory.create_batch(size=3, news_provided_by="Acme Inc.")
+        ArticleFactory.create(news_provided_by="Noise Corp.")
+
+        result = await self.repo.find_articles_with_counts(
+            query={"_provider_key": "acme inc."}, skip=1, limit=1, sort=NEWEST_FIRST_SORT, count=True, provider_counts=5
+        )
+
+        newest_first = sorted(articles, key=lambda article: article.date, reverse=True)
+        self.assertEqual([newest_first[1].url], [document["url"] for document in result["items"]])
+        self.assertEqual(3, result["total"])
+        self.assertEqual([{"news_provided_by": "Acme Inc.", "count": 3}], result["providers"])
+
+        with self.subTest("Counting up to a limit"):
+            result = await self.repo.find_articles_with_counts(query={}, count=True, count_limit=2)
+            self.assertEqual(2, result["total"])
+            self.assertEqual(4, len(result["items"]))
+            self.assertIsNone(result["providers"])
+
+    async def test_count_by_date(self):
+        ArticleFactory.create_batch(size=2, date=datetime(2024, 1, 31, 12))  # noqa: DTZ001
+        ArticleFactory.create(date=datetime(2024, 2, 1))  # noqa: DTZ001
+
+        self.assertEqual(
+            [{"date": datetime(2024, 1, 1), "count": 2}, {"date": datetime(2024, 2, 1), "count": 1}],  # noqa: DTZ001
+            await self.repo.count_by_date(query={}, unit="month"),
+        )
+
+    async def test_find_articles_compressed(self):
+        self.addCleanup(get_database()._db.article_bodies.drop)
+        article = ArticleFactory.build(content=press_release_content(paragraphs=60))
+        get_database(compress_content=True).save_articles([article])
+
+        [document] = [document async for document in self.repo.find_articles(query={})]
+        self.assertEqual(article.content, document["content"])
+
+        [document] = [document async for document in self.repo.find_articles(query={}, projection={"title": True})]
+        self.assertNotIn("content", document)
+
+        result = await self.repo.find_articles_with_counts(query={}, count=True)
+        self.assertEqual(article.content, result["items"][0]["content"])
+        self.assertEqual(article.content, (await self.repo.get_article(str(document["_id"]))).content)
+
+    async def test_get_generation(self):
+        self.addCleanup(get_database()._db.meta.drop)
+        self.assertEqual(0, await self.repo.get_generation())
+
+        get_database().bump_generation()
+        self.assertEqual(1, await self.repo.get_generation())
+
+    async def test_get_article(self):
+        ArticleFactory.create_batch(size=2)
+        [article] = [article async for article in self.repo.get_articles(query={}, limit=1)]
+
+        self.assertEqual(article, await self.repo.get_article(article.id))
+        self.assertIsNone(await self.repo.get_article("0123456789abcdef01234567"))
+        self.assertIsNone(await self.repo.get_article("invalid"))
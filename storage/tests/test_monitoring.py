@@ -0,0 +1,54 @@
+import unittest
+from datetime import timedelta
+
+from pymongo import monitoring
+
+from storage.monitoring import COMMAND_FAILURES, COMMAND_SECONDS, DOCUMENTS_RETURNED, CommandMetrics
+
+CONNECTION = ("localhost", 27017)
+
+
+class TestCommandMetrics(unittest.TestCase):
+    def setUp(self):
+        self.listener = CommandMetrics()
+
+    def _run(self, command: dict, reply: dict, request_id: int) -> None:
+        self.listener.started(monitoring.CommandStartedEvent(command, "wire-scout", request_id, CONNECTION, None))
+        command_name = next(iter(command))
+        duration = timedelta(milliseconds=20)
+        self.listener.succeeded(
+            monitoring.CommandSucceededEvent(duration, reply, command_name, request_id, CONNECTION, None)
+        )
+
+    def test_query(self):
+        count = COMMAND_SECONDS.count(command="find", collection="articles")
+        total = DOCUMENTS_RETURNED.sum(command="getMore", collection="articles")
+
+        self._run({"find": "articles", "filter": {}}, {"cursor": {"id": 1, "firstBatch": [{}, {}]}, "ok": 1}, 1)
+        self._run({"getMore": 1, "collection": "articles"}, {"cursor": {"id": 0, "nextBatch": [{}] * 3}, "ok": 1}, 2)
+
+        self.assertEqual(count + 1, COMMAND_SECONDS.count(command="find", collection="articles"))
+        self.assertEqual(total + 3, DOCUMENTS_RETURNED.sum(command="getMore", collection="articles"))
+
+    def test_other_command(self):
+        count = DOCUMENTS_RETURNED.count(command="update", collection="meta")
+
+        self._run({"update": "meta", "updates": []}, {"n": 1, "ok": 1}, 3)
+
+        self.assertEqual(count, DOCUMENTS_RETURNED.count(command="update", collection="meta"))
+
+    def test_failed(self):
+        failures = COMMAND_FAILURES.value(command="aggregate", collection="articles", reason="Location40324")
+
+        self.listener.started(
+            monitoring.CommandStartedEvent({"aggregate": "articles"}, "wire-scout", 4, CONNECTION, None)
+        )
+        self.listener.failed(
+            monitoring.CommandFailedEvent(
+                timedelta(milliseconds=5), {"codeName": "Location40324"}, "aggregate", 4, CONNECTION, None
+            )
+        )
+
+        self.assertEqual(
+            failures + 1, COMMAND_FAILURES.value(command="aggregate", collection="articles", reason="Location40324")
+        )